@@ -1,20 +1,71 @@
-from flask import Flask, render_template
+import time
+from flask import Flask, Response, g, render_template, jsonify
 from auth.routes import auth_bp
-from ml.ml_routes import ml_bp 
 from flask_cors import CORS 
 from config import Config
+from metrics import registry as metrics_registry
+from logging_config import configure_logging
+import tracing
 
 
 def create_app():
+    configure_logging()
     app = Flask(__name__)
     CORS(app, resources={r"/*": {"origins": "http://localhost:3000"}}, supports_credentials=True)
     app.config['SECRET_KEY'] = Config.FLASK_SECRET_KEY
+    # Reject oversized bodies before werkzeug parses them (1MB slack for form fields)
+    app.config['MAX_CONTENT_LENGTH'] = Config.MAX_UPLOAD_BYTES + 1024 * 1024
     app.register_blueprint(auth_bp)
-    app.register_blueprint(ml_bp)
+
+    if Config.ENABLE_ML:
+        # Imported here so auth-only workers never load torch/transformers
+        from ml.ml_routes import ml_bp
+        from ml.registry import model_registry
+        from ml.assets import asset_bundler
+        from ml.uploads import UploadRequest
+        # Uploaded files are hashed and size-checked as Werkzeug spools them (no second copy)
+        app.request_class = UploadRequest
+        app.register_blueprint(ml_bp)
+        # Read the furniture GLBs and pack the full bundle once, before the first scene
+        asset_bundler.load()
+        if Config.ML_MODEL_SHARING == 'preload':
+            # Load in the master before fork so workers share the weights copy-on-write
+            model_registry.warmup(background=False)
+        elif Config.ML_MODEL_LOADING == 'background':
+            model_registry.warmup(background=True)
+
+    if Config.SERVER_TIMING:
+        @app.before_request
+        def start_server_timing():
+            tracing.start_server_timing()
+            g.request_started = time.perf_counter()
+
+        @app.after_request
+        def add_server_timing(response):
+            started = g.pop('request_started', None)
+            if started is not None:
+                response.headers['Server-Timing'] = tracing.server_timing_header(time.perf_counter() - started)
+                # Lets the frontend read the entries through the Resource Timing API
+                response.headers['Timing-Allow-Origin'] = 'http://localhost:3000'
+            return response
+
+    @app.route('/stats')
+    def stats():
+        # Batch size / queue wait histograms etc. for tuning
+        return jsonify(metrics_registry.snapshot())
+
+    @app.route('/metrics')
+    def metrics():
+        # Prometheus scrape target; per worker process, like /stats
+        return Response(metrics_registry.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
     return app
 
 
-app = create_app()
+# Spawned children (the bcrypt pool) re-run the parent's main module as __mp_main__;
+# they must not build the app, register the ML blueprint or warm up models
+if __name__ != '__mp_main__':
+    app = create_app()
 
 if __name__ == "__main__":
     app.run(debug=True)
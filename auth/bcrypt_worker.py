@@ -0,0 +1,15 @@
+"""
+Entry points for the bcrypt process pool (auth/hashing.py).
+
+Spawned children unpickle these by module name, so this module imports
+nothing but bcrypt: no config, no Flask, no ML stack.
+"""
+import bcrypt
+
+
+def hashpw(password, rounds):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def checkpw(password, hashed_password):
+    return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
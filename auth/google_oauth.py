@@ -1,8 +1,63 @@
-import requests
+import re
 from urllib.parse import urlencode
 from google.oauth2 import id_token
-from google.auth.transport import requests as google_requests
+from clients import get_http_session, get_google_transport
 from config import Config
+from ttl_cache import TTLCache
+
+# Claims that make the userinfo call redundant (scope 'openid email profile')
+PROFILE_CLAIMS = ('email', 'name', 'picture')
+
+
+class CachingRequest:
+    """
+    google-auth transport that serves repeated GETs (Google's signing certs)
+    from memory for as long as their Cache-Control max-age allows.
+    """
+
+    def __init__(self, transport, max_ttl=Config.GOOGLE_CERTS_MAX_TTL):
+        self.transport = transport
+        self._responses = TTLCache('google_certs', maxsize=8, ttl=max_ttl)
+
+    def __call__(self, url, method='GET', body=None, headers=None, timeout=None, **kwargs):
+        if method != 'GET' or body is not None:
+            return self.transport(url, method=method, body=body, headers=headers, timeout=timeout, **kwargs)
+
+        response = self._responses.get(url)
+        if response is None:
+            response = self.transport(url, method=method, headers=headers, timeout=timeout, **kwargs)
+            ttl = _cache_ttl(response)
+            if ttl:
+                self._responses.set(url, response, ttl)
+        return response
+
+
+def _cache_ttl(response):
+    # Seconds the response stays fresh: max-age minus the Age it already has
+    if response.status != 200:
+        return 0
+    headers = {k.lower(): v for k, v in response.headers.items()}
+    cache_control = headers.get('cache-control', '')
+    if 'no-store' in cache_control or 'no-cache' in cache_control:
+        return 0
+    match = re.search(r'max-age=(\d+)', cache_control)
+    if not match:
+        return 0
+    try:
+        age = int(headers.get('age', 0))
+    except ValueError:
+        age = 0
+    return max(int(match.group(1)) - age, 0)
+
+
+_cert_request = None
+
+
+def _google_cert_request():
+    global _cert_request
+    if _cert_request is None:
+        _cert_request = CachingRequest(get_google_transport())
+    return _cert_request
 
 def get_google_auth_url():
     params = {
@@ -28,7 +83,7 @@ def exchange_code_for_token(code):
         'grant_type': 'authorization_code'
     }
     
-    response = requests.post(token_url, data=data)
+    response = get_http_session().post(token_url, data=data)
     return response.json()
 
 def get_google_user_info(access_token):
@@ -36,7 +91,7 @@ def get_google_user_info(access_token):
     user_info_url = 'https://www.googleapis.com/oauth2/v2/userinfo'
     headers = {'Authorization': f'Bearer {access_token}'}
     
-    response = requests.get(user_info_url, headers=headers)
+    response = get_http_session().get(user_info_url, headers=headers)
     return response.json()
 
 def verify_google_id_token(id_token_str):
@@ -44,7 +99,7 @@ def verify_google_id_token(id_token_str):
     try:
         idinfo = id_token.verify_oauth2_token(
             id_token_str,
-            google_requests.Request(),
+            _google_cert_request(),
             Config.GOOGLE_CLIENT_ID
         )
         
@@ -56,4 +111,10 @@ def verify_google_id_token(id_token_str):
     except ValueError:
         # Invalid token
         return None
+
+def get_google_profile(id_info, access_token):
+    # The ID token usually carries the profile already; only ask userinfo when it doesn't
+    if all(id_info.get(claim) for claim in PROFILE_CLAIMS):
+        return id_info
+    return get_google_user_info(access_token)
     
@@ -0,0 +1,81 @@
+"""
+bcrypt off the request threads.
+
+Hashing and checking run in a small process pool, so key stretching neither
+holds the GIL nor ties up every worker thread during a login spike.
+Admission is bounded: at most BCRYPT_WORKERS running plus BCRYPT_QUEUE_SIZE
+waiting, anything beyond that fails fast with HashingBusy.
+"""
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from auth import bcrypt_worker
+from config import Config
+
+_executor = None
+_executor_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(Config.BCRYPT_WORKERS + Config.BCRYPT_QUEUE_SIZE)
+
+
+class HashingBusy(Exception):
+    def __init__(self, retry_after=Config.BCRYPT_RETRY_AFTER):
+        super().__init__('Too many sign-in requests, try again shortly')
+        self.retry_after = retry_after
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                # spawn, not fork: the parent is multi-threaded (and may hold torch).
+                # Tasks are auth.bcrypt_worker functions, which children import without the app
+                _executor = ProcessPoolExecutor(
+                    max_workers=Config.BCRYPT_WORKERS,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+    return _executor
+
+
+def _reset_executor(broken):
+    global _executor
+    with _executor_lock:
+        if _executor is broken:
+            _executor = None
+    broken.shutdown(wait=False)
+
+
+def _run(fn, *args):
+    if not _slots.acquire(blocking=False):
+        raise HashingBusy()
+    try:
+        executor = _get_executor()
+        try:
+            return executor.submit(fn, *args).result()
+        except BrokenProcessPool:
+            # A worker died (OOM kill etc.); start a fresh pool and retry once
+            _reset_executor(executor)
+            return _get_executor().submit(fn, *args).result()
+    finally:
+        _slots.release()
+
+
+def hash_password(password, rounds=None):
+    return _run(bcrypt_worker.hashpw, password, rounds or Config.BCRYPT_ROUNDS)
+
+
+def check_password(password, hashed_password):
+    return _run(bcrypt_worker.checkpw, password, hashed_password)
+
+
+def hash_rounds(hashed_password):
+    # '$2b$12$<salt+hash>' -> 12
+    try:
+        return int(hashed_password.split('$')[2])
+    except (IndexError, ValueError):
+        return None
+
+
+def needs_rehash(hashed_password):
+    return hash_rounds(hashed_password) != Config.BCRYPT_ROUNDS
@@ -1,3 +1,4 @@
+import logging
 from flask import Blueprint, request, jsonify, redirect, render_template
 from auth.utils import (
     hash_password, 
@@ -7,27 +8,36 @@ from auth.utils import (
     validate_email_format,
     verify_token
 )
+from auth.hashing import HashingBusy, needs_rehash
 from auth.google_oauth import (
     get_google_auth_url,
     exchange_code_for_token,
-    get_google_user_info,
+    get_google_profile,
     verify_google_id_token
 )
 from database.users import (
     create_user_with_password,
     create_user_with_google,
     get_user_by_email,
-    get_user_by_google_id,
-    get_user_by_id,
-    link_google_account
+    get_user_by_google_id_or_email,
+    get_user_profile,
+    link_google_account,
+    update_password_hash
 )
 from functools import wraps
 
 # Blueprint
 auth_bp = Blueprint('auth', __name__, url_prefix='/auth')
+logger = logging.getLogger(__name__)
 
 # Middlewares
 
+def busy_response(e):
+    # bcrypt pool saturated: tell the client when to retry instead of queuing
+    response = jsonify({'error': str(e)})
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response, 503
+
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
@@ -121,8 +131,10 @@ def signup():
             }
         }), 201
         
-    except Exception as e:
-        print(f"Signup error: {e}")
+    except HashingBusy as e:
+        return busy_response(e)
+    except Exception:
+        logger.exception("Signup error")
         return jsonify({
             'error': 'Internal server error'
         }), 500
@@ -162,6 +174,13 @@ def login():
                 'error': 'Invalid email or password'
             }), 401
         
+        # Upgrade the stored hash when BCRYPT_ROUNDS changed; best effort, retried next login
+        if needs_rehash(user['password_hash']):
+            try:
+                update_password_hash(user['id'], hash_password(password))
+            except HashingBusy:
+                pass
+        
         # Generate JWT token
         token = create_access_token(user['id'], user['email'])
         
@@ -178,8 +197,10 @@ def login():
             }
         }), 200
         
-    except Exception as e:
-        print(f"Login error: {e}")
+    except HashingBusy as e:
+        return busy_response(e)
+    except Exception:
+        logger.exception("Login error")
         return jsonify({
             'error': 'Internal server error'
         }), 500
@@ -225,8 +246,8 @@ def google_callback():
                 'error': 'Invalid ID token'
             }), 401
         
-        # Get user info from Google
-        user_info = get_google_user_info(access_token)
+        # Profile from the ID token claims, userinfo only if they are missing
+        user_info = get_google_profile(id_info, access_token)
         
         google_id = id_info['sub']  # Google user ID
         email = user_info['email']
@@ -234,8 +255,8 @@ def google_callback():
         last_name = user_info.get('family_name', '')
         picture = user_info.get('picture', '')
         
-        # Check if user exists by Google ID
-        user = get_user_by_google_id(google_id)
+        # Existing user by Google ID, or by email (signed up with email/password), in one query
+        user, email_user = get_user_by_google_id_or_email(google_id, email)
         
         if user:
             # User exists, log them in
@@ -244,10 +265,7 @@ def google_callback():
             frontend_url = f'http://localhost:3000/?token={token}'
             return redirect(frontend_url) 
         
-        # Check if user exists by email (signed up with email/password)
-        user = get_user_by_email(email)
-        
-        if user:
+        if email_user:
             # Link Google account to existing user
             user = link_google_account(email, google_id, picture)
             
@@ -280,8 +298,8 @@ def google_callback():
         frontend_url = f'http://localhost:3000/?token={token}'
         return redirect(frontend_url)
         
-    except Exception as e:
-        print(f"Google callback error: {e}")
+    except Exception:
+        logger.exception("Google callback error")
         return jsonify ({
             'error': 'Internal server error'
         }), 500
@@ -294,7 +312,7 @@ def google_callback():
 def get_current_user(user_id):
 
     try:
-        user = get_user_by_id(user_id)
+        user = get_user_profile(user_id)
         
         if not user:
             return jsonify({
@@ -313,8 +331,8 @@ def get_current_user(user_id):
             }
         }), 200
         
-    except Exception as e:
-        print(f"Get user error: {e}")
+    except Exception:
+        logger.exception("Get user error")
         return jsonify({
             'error': 'Internal server error'
         }), 500
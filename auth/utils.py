@@ -1,18 +1,20 @@
-import bcrypt
+import hashlib
 import jwt
+import time
 from datetime import datetime, timedelta
+from auth import hashing
 from config import Config
+from ttl_cache import TTLCache
+
+# Verified payloads keyed by token hash; an entry never outlives the token's exp
+_verified_tokens = TTLCache('verified_tokens', maxsize=Config.TOKEN_CACHE_SIZE, ttl=Config.TOKEN_CACHE_TTL)
 
 def hash_password(password):
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-    return hashed.decode('utf-8') 
+    # Runs in the bcrypt process pool; raises HashingBusy when it is saturated
+    return hashing.hash_password(password)
 
 def verify_password(password, hashed_password):
-    return bcrypt.checkpw(
-        password.encode('utf-8'), 
-        hashed_password.encode('utf-8')
-    )
+    return hashing.check_password(password, hashed_password)
 
 def create_access_token(user_id, email):
     payload = {
@@ -31,12 +33,18 @@ def create_access_token(user_id, email):
     return token
 
 def verify_token(token):
+    token_key = hashlib.sha256(token.encode('utf-8')).hexdigest()
+    payload = _verified_tokens.get(token_key)
+    if payload is not None:
+        return payload
+    
     try:
         payload = jwt.decode(
             token, 
             Config.JWT_SECRET_KEY, 
             algorithms=[Config.JWT_ALGORITHM]
         )
+        _verified_tokens.set(token_key, payload, ttl=payload['exp'] - time.time())
         return payload
     except jwt.ExpiredSignatureError:
         return None
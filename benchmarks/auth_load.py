@@ -0,0 +1,96 @@
+"""
+Requests/s for /auth/verify and /auth/me with the token and profile caches
+off (TOKEN_CACHE_TTL=0, PROFILE_CACHE_TTL=0) and on.
+
+Each setup starts an auth-only app server in a subprocess on the real config
+(.env), so /auth/me hits Supabase; pass the id of an existing user.
+
+Usage (from repo root):
+    python benchmarks/auth_load.py --user-id 1 --threads 16 --seconds 10
+"""
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import requests
+from auth.utils import create_access_token
+
+SERVER = """
+import sys
+from app import app
+app.run(port=int(sys.argv[1]), threaded=True)
+"""
+
+SETUPS = {
+    'uncached': {'TOKEN_CACHE_TTL': '0', 'PROFILE_CACHE_TTL': '0'},
+    'cached': {},
+}
+
+
+def wait_until_up(base_url, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            requests.get(f"{base_url}/stats", timeout=1)
+            return
+        except requests.ConnectionError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not start")
+
+
+def hammer(url, token, threads, seconds):
+    counts = [0] * threads
+    errors = [0] * threads
+    deadline = time.perf_counter() + seconds
+
+    def run(i):
+        session = requests.Session()
+        headers = {'Authorization': f'Bearer {token}'}
+        while time.perf_counter() < deadline:
+            response = session.get(url, headers=headers)
+            if response.status_code == 200:
+                counts[i] += 1
+            else:
+                errors[i] += 1
+
+    workers = [threading.Thread(target=run, args=(i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return sum(counts) / seconds, sum(errors)
+
+
+def measure(setup_env, args):
+    env = dict(os.environ, ENABLE_ML='false', **setup_env)
+    server = subprocess.Popen([sys.executable, '-c', SERVER, str(args.port)], env=env, cwd=ROOT)
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        wait_until_up(base_url)
+        token = create_access_token(args.user_id, 'load-test@example.com')
+        results = {}
+        for path in ('/auth/verify', '/auth/me'):
+            rps, errors = hammer(base_url + path, token, args.threads, args.seconds)
+            results[path] = f"{rps:.0f} req/s ({errors} errors)"
+        return results
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--user-id', required=True)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--port', type=int, default=5055)
+    args = parser.parse_args()
+
+    for name, env in SETUPS.items():
+        print(name, measure(env, args))
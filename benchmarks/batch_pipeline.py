@@ -0,0 +1,134 @@
+"""
+Images/sec for N photos: N sequential single-image runs versus one batched run.
+
+Default: compute only (ingest, detection, depth, scene), no network.
+    sequential  ingest -> detect -> depth -> scene, one image after another
+    batched     all images ingested in parallel, all inference submitted at
+                once so same-size images share forward passes
+
+--full runs the real pipelines against R2 and Supabase (needs .env):
+run_room_pipeline N times versus run_batch_pipeline once.
+
+The result cache is disabled so every run does the work.
+
+Usage (from repo root):
+    python benchmarks/batch_pipeline.py photo1.jpg photo2.jpg ... [--quality fast]
+    python benchmarks/batch_pipeline.py --count 10 [--full --user-id 1]
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from config import Config
+
+
+class _Upload:
+    # Minimal stand-in for the SpooledUpload the routes build from the request
+    def __init__(self, data):
+        import hashlib
+        self.data = data
+        self.size = len(data)
+        self.sha256 = hashlib.sha256(data).hexdigest()
+
+    def open(self):
+        return io.BytesIO(self.data)
+
+    def close(self):
+        pass
+
+
+def load_images(paths, count):
+    if paths:
+        images = []
+        for path in paths:
+            with open(path, 'rb') as f:
+                images.append(f.read())
+        return images
+
+    # Synthetic 12MP JPEGs, all the same shape like photos from one phone
+    import numpy as np
+    from PIL import Image
+    rng = np.random.default_rng(0)
+    images = []
+    for _ in range(count):
+        buffer = io.BytesIO()
+        Image.fromarray(rng.integers(0, 255, (3024, 4032, 3), dtype=np.uint8)).save(buffer, format='JPEG', quality=85)
+        images.append(buffer.getvalue())
+    return images
+
+
+def compute_sequential(images, quality):
+    from ml import batching
+    from ml.pipeline import DETECTION_THRESHOLD
+    from ml.scene_builder import scene_builder
+    from ml.utils import ingest_image
+
+    for data in images:
+        processed, _ = ingest_image(data)
+        img = processed['pil_image']
+        detections = batching.detect(img, confidence_threshold=DETECTION_THRESHOLD)
+        depth = batching.estimate_depth(img, quality)
+        scene_builder.build_scene(detections, depth, *processed['processed_size'])
+
+
+def compute_batched(images, quality):
+    from ml import batching
+    from ml.pipeline import DETECTION_THRESHOLD, _ingest_all
+    from ml.scene_builder import scene_builder
+
+    processed = [p for p, _ in _ingest_all(images)]
+    detect_futures = [batching.detect_async(p['pil_image'], confidence_threshold=DETECTION_THRESHOLD) for p in processed]
+    depth_futures = [batching.estimate_depth_async(p['pil_image'], quality) for p in processed]
+    for p, detect_future, depth_future in zip(processed, detect_futures, depth_futures):
+        scene_builder.build_scene(detect_future.result(), depth_future.result(), *p['processed_size'])
+
+
+def full_sequential(images, quality, user_id):
+    from ml.pipeline import run_room_pipeline
+    for i, data in enumerate(images):
+        _, error = run_room_pipeline(_Upload(data), user_id, f"bench sequential {i}", quality=quality)
+        assert not error, error
+
+
+def full_batched(images, quality, user_id):
+    from ml.pipeline import run_batch_pipeline
+    _, error = run_batch_pipeline([_Upload(data) for data in images], user_id, "bench batch", quality=quality)
+    assert not error, error
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('images', nargs='*')
+    parser.add_argument('--count', type=int, default=10)
+    parser.add_argument('--quality', default=Config.DEFAULT_QUALITY)
+    parser.add_argument('--full', action='store_true')
+    parser.add_argument('--user-id', default='1')
+    args = parser.parse_args()
+
+    from ml.cache import result_cache
+    from ml.registry import model_registry
+
+    result_cache.max_bytes = 0
+    result_cache.disk_dir = None
+    model_registry.warmup(names=['grounding_dino', f"depth:{args.quality}"], background=False)
+
+    images = load_images(args.images, args.count)
+    if args.full:
+        runs = [('sequential', full_sequential), ('batched', full_batched)]
+        extra = (args.user_id,)
+    else:
+        runs = [('sequential', compute_sequential), ('batched', compute_batched)]
+        extra = ()
+
+    # Warm-up pass so lazy init and first-call overheads are not measured
+    runs[0][1](images[:1], args.quality, *extra)
+    for name, fn in runs:
+        started = time.perf_counter()
+        fn(images, args.quality, *extra)
+        elapsed = time.perf_counter() - started
+        print(f"{name:10s} {len(images)} images in {elapsed:6.2f} s = {len(images) / elapsed:5.2f} images/s")
@@ -0,0 +1,88 @@
+"""
+Depth post-processing per request on a 1024px input: the old full-resolution
+bicubic upsample + float/uint8 copies versus DepthMap at model resolution.
+
+Both paths do what SceneBuilder and the pipeline need: a handful of samples,
+mean/max and the PNG visualization. Each path runs in its own interpreter so
+peak RSS reflects only that path.
+
+Usage (from repo root):
+    python benchmarks/depth_postprocess.py [--runs 20]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from io import BytesIO
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+IMAGE_SIZE = (1024, 768)   # (width, height) after ImageProcessor.resize_image
+MODEL_SIZE = (384, 384)    # DPT output
+SAMPLE_POINTS = [(100, 100), (512, 384), (900, 700), (300, 600), (700, 200)]
+
+
+def old_path(predicted_depth):
+    import numpy as np
+    import torch
+    from PIL import Image
+
+    prediction = torch.nn.functional.interpolate(
+        predicted_depth.unsqueeze(1), size=IMAGE_SIZE[::-1], mode="bicubic", align_corners=False
+    )
+    depth_map = prediction.squeeze().cpu().numpy()
+    depth_min, depth_max = depth_map.min(), depth_map.max()
+    depth_uint8 = ((depth_map - depth_min) / (depth_max - depth_min) * 255).astype(np.uint8)
+    depth_image = Image.fromarray(depth_uint8, mode='L')
+
+    samples = [depth_map[y, x] for x, y in SAMPLE_POINTS]
+    stats = (np.mean(depth_map), np.max(depth_map))
+    depth_image.save(BytesIO(), format='PNG')
+    return samples, stats
+
+
+def new_path(predicted_depth):
+    from ml.depth_map import DepthMap
+
+    depth_map = DepthMap(predicted_depth.squeeze().cpu().numpy(), IMAGE_SIZE)
+    samples = [depth_map.sample(x, y) for x, y in SAMPLE_POINTS]
+    stats = (depth_map.mean(), depth_map.max())
+    depth_map.to_image().save(BytesIO(), format='PNG')
+    return samples, stats
+
+
+def measure(name, runs):
+    import torch
+
+    fn = old_path if name == 'old' else new_path
+    predicted_depth = torch.rand(1, *MODEL_SIZE) * 10
+    fn(predicted_depth)  # warm-up, loads libraries
+
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    for _ in range(runs):
+        fn(predicted_depth)
+    elapsed_ms = (time.perf_counter() - started) * 1000 / runs
+    peak_delta = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline
+
+    return {'path': name, 'ms_per_request': round(elapsed_ms, 2), 'peak_rss_delta_mb': round(peak_delta / 1024, 1)}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--path', choices=['old', 'new'])
+    args = parser.parse_args()
+
+    if args.path:
+        print(json.dumps(measure(args.path, args.runs)))
+    else:
+        for path in ('old', 'new'):
+            output = subprocess.check_output(
+                [sys.executable, __file__, '--path', path, '--runs', str(args.runs)], cwd=ROOT
+            )
+            print(json.loads(output.decode().strip().splitlines()[-1]))
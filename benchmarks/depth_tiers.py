@@ -0,0 +1,82 @@
+"""
+CPU latency and memory of each depth quality tier.
+
+Each tier runs in its own interpreter so peak RSS is per model.
+
+Usage (from repo root):
+    python benchmarks/depth_tiers.py [--image room.jpg] [--runs 5]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from config import Config
+
+
+def rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(tier, image_path, runs):
+    import numpy as np
+    import torch
+    from PIL import Image
+    from ml.depth_model import DepthEstimator
+    from ml.image_utils import ImageProcessor
+
+    torch.set_num_threads(os.cpu_count())
+    if image_path:
+        with open(image_path, 'rb') as f:
+            image = ImageProcessor.preprocess_for_detection(f.read(), resize=True)['pil_image']
+    else:
+        image = Image.fromarray(np.random.randint(0, 255, (768, 1024, 3), dtype=np.uint8))
+
+    baseline = rss_mb()
+    started = time.perf_counter()
+    settings = Config.DEPTH_TIERS[tier]
+    estimator = DepthEstimator(model_id=settings['model_id'], input_size=settings['input_size'])
+    load_seconds = time.perf_counter() - started
+    loaded = rss_mb()
+
+    estimator.estimate_depth(image)  # warm-up
+    latencies = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        estimator.estimate_depth(image)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    return {
+        'tier': tier,
+        'model_id': settings['model_id'],
+        'input_size': settings['input_size'],
+        'load_seconds': round(load_seconds, 2),
+        'weights_rss_mb': round(loaded - baseline, 1),
+        'peak_rss_mb': round(rss_mb(), 1),
+        'latency_ms_mean': round(sum(latencies) / len(latencies), 1),
+        'latency_ms_max': round(max(latencies), 1)
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--image')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--tier')
+    args = parser.parse_args()
+
+    if args.tier:
+        print(json.dumps(measure(args.tier, args.image, args.runs)))
+    else:
+        for tier in Config.DEPTH_TIERS:
+            cmd = [sys.executable, __file__, '--tier', tier, '--runs', str(args.runs)]
+            if args.image:
+                cmd += ['--image', args.image]
+            output = subprocess.check_output(cmd, cwd=ROOT).decode().strip().splitlines()[-1]
+            print(json.loads(output))
@@ -0,0 +1,108 @@
+"""
+Decode time and peak memory for a 12MP phone JPEG: the old multi-open path
+(verify + format open + full decode + full-resolution LANCZOS resize) versus
+ingest_image (one header read, draft-mode decode near 1024px).
+
+Each path runs in its own interpreter so peak RSS is per path.
+
+Usage (from repo root):
+    python benchmarks/ingest.py [--image photo.jpg] [--runs 5]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def peak_rss_kb():
+    # VmHWM resets on exec; ru_maxrss would inherit the parent's peak
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1])
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def make_phone_jpeg(path):
+    # 4032x3024 with smooth content + mild noise, roughly phone-sized file
+    import numpy as np
+    from PIL import Image
+
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:3024, 0:4032]
+    base = np.stack([(x / 16) % 256, (y / 12) % 256, ((x + y) / 28) % 256], axis=-1)
+    noise = rng.normal(0, 6, base.shape)
+    pixels = np.clip(base + noise, 0, 255).astype(np.uint8)
+    Image.fromarray(pixels).save(path, format='JPEG', quality=90)
+
+
+def old_path(file_data):
+    from PIL import Image
+    from ml.image_utils import ImageProcessor
+
+    img = Image.open(BytesIO(file_data))
+    img.verify()
+    image_format = Image.open(BytesIO(file_data)).format.lower()
+    pil_image = Image.open(BytesIO(file_data)).convert('RGB')
+    resized = ImageProcessor.target_size(pil_image.size)
+    return image_format, pil_image.resize(resized, Image.LANCZOS)
+
+
+def new_path(file_data):
+    from ml.utils import ingest_image
+
+    result, error = ingest_image(file_data)
+    assert error is None, error
+    return result['format'], result['pil_image']
+
+
+def measure(name, image_path, runs):
+    with open(image_path, 'rb') as f:
+        file_data = f.read()
+    fn = old_path if name == 'old' else new_path
+
+    baseline = peak_rss_kb()
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        _, image = fn(file_data)
+        timings.append((time.perf_counter() - started) * 1000)
+    peak_delta = peak_rss_kb() - baseline
+
+    return {
+        'path': name,
+        'output_size': image.size,
+        'ms_mean': round(sum(timings) / len(timings), 1),
+        'peak_rss_delta_mb': round(peak_delta / 1024, 1)
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--image')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--path', choices=['old', 'new'])
+    args = parser.parse_args()
+
+    if args.path:
+        print(json.dumps(measure(args.path, args.image, args.runs)))
+    else:
+        image_path = args.image
+        if not image_path:
+            image_path = os.path.join(tempfile.gettempdir(), 'roomview3d_12mp.jpg')
+            if not os.path.exists(image_path):
+                make_phone_jpeg(image_path)
+        print(f"{image_path}: {os.path.getsize(image_path) / 1e6:.1f} MB")
+        for path in ('old', 'new'):
+            output = subprocess.check_output(
+                [sys.executable, __file__, '--path', path, '--image', image_path, '--runs', str(args.runs)], cwd=ROOT
+            )
+            print(json.loads(output.decode().strip().splitlines()[-1]))
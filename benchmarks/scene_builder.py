@@ -0,0 +1,87 @@
+"""
+SceneBuilder furniture conversion: per-detection loop (convert_to_3d) versus
+the vectorized build_furniture, with 1, 50 and 1000 detections. Also asserts
+that both produce identical output (center-pixel depth), and times the robust
+median/mean region depth paths.
+
+Usage (from repo root):
+    python benchmarks/scene_builder.py
+"""
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.depth_map import DepthMap
+from ml.scene_builder import SceneBuilder
+
+WIDTH, HEIGHT = 1024, 768
+
+
+def fake_detections(count, rng):
+    detections = []
+    for _ in range(count):
+        x, y = rng.uniform(0, 0.9), rng.uniform(0, 0.9)
+        w, h = rng.uniform(0.01, 1 - x), rng.uniform(0.01, 1 - y)
+        detections.append({
+            'label': rng.choice(['bed', 'chair', 'table', 'wardrobe']),
+            'confidence': rng.uniform(0.4, 1.0),
+            'bbox_normalized': {'x': x, 'y': y, 'width': w, 'height': h},
+            'bbox_absolute': {'x': x * WIDTH, 'y': y * HEIGHT, 'width': w * WIDTH, 'height': h * HEIGHT}
+        })
+    return detections
+
+
+def loop_furniture(builder, detections, depth_map, room):
+    # The pre-vectorization build_scene loop
+    furniture = []
+    for detection in detections:
+        position = builder.convert_to_3d(detection, depth_map, WIDTH, HEIGHT)
+        bbox = detection['bbox_absolute']
+        furniture.append({
+            'id': len(furniture) + 1,
+            'type': detection['label'],
+            'confidence': detection['confidence'],
+            'position': position,
+            'size': {
+                'width': float((bbox['width'] / WIDTH) * room['width']),
+                'height': float((bbox['height'] / HEIGHT) * room['height']),
+                'depth': float(0.5)
+            },
+            'rotation': {'x': 0, 'y': 0, 'z': 0}
+        })
+    return furniture
+
+
+def best_of(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+if __name__ == '__main__':
+    rng = random.Random(0)
+    builder = SceneBuilder(depth_stat='center')
+    robust = {stat: SceneBuilder(depth_stat=stat) for stat in ('median', 'mean')}
+    depth_map = DepthMap(np.random.default_rng(0).random((384, 384), dtype=np.float32) * 8, (WIDTH, HEIGHT))
+    room = builder.estimate_room_dimensions(depth_map, WIDTH)
+
+    for count in (1, 50, 1000):
+        detections = fake_detections(count, rng)
+        expected = loop_furniture(builder, detections, depth_map, room)
+        actual = builder.build_furniture(detections, depth_map, room, WIDTH, HEIGHT)
+        assert actual == expected, f"vectorized output differs for {count} detections"
+
+        loop_ms = best_of(lambda: loop_furniture(builder, detections, depth_map, room), 5)
+        vec_ms = best_of(lambda: builder.build_furniture(detections, depth_map, room, WIDTH, HEIGHT), 5)
+        print(f"{count:>5} detections: loop {loop_ms:8.3f} ms  vectorized {vec_ms:8.3f} ms  ({loop_ms / vec_ms:.1f}x)")
+        for stat, robust_builder in robust.items():
+            ms = best_of(lambda: robust_builder.build_furniture(detections, depth_map, room, WIDTH, HEIGHT), 5)
+            print(f"{'':>17} {stat:>6} region depth {ms:8.3f} ms")
@@ -0,0 +1,71 @@
+"""
+Binary scene encoding (ml/scene_codec.py) versus the JSON the frontend gets
+today: payload size (raw and gzipped) and decode time for 10, 100 and 1000
+furniture items. Round-trip correctness is checked by
+scripts/scene_codec_check.py.
+
+Usage (from repo root):
+    python benchmarks/scene_codec.py
+"""
+import gzip
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.scene_codec import encode_scene, decode_scene
+
+TYPES = ['bed', 'chair', 'table', 'wardrobe', 'sofa', 'lamp']
+
+
+def fake_scene(count, rng):
+    # Same shape as SceneBuilder.build_scene
+    return {
+        'room': {
+            'dimensions': {'width': 5.3, 'height': 2.7, 'depth': 6.1},
+            'walls': {'color': '#ffffff', 'texture': 'default'},
+            'floor': {'color': '#8B7355', 'texture': 'wood'},
+            'ceiling': {'color': '#f0f0f0', 'texture': 'default'}
+        },
+        'furniture': [
+            {
+                'id': i + 1,
+                'type': rng.choice(TYPES),
+                'confidence': rng.uniform(0.4, 1.0),
+                'position': {'x': rng.uniform(-3, 3), 'y': rng.uniform(0, 3), 'z': rng.uniform(0, 6)},
+                'size': {'width': rng.uniform(0.1, 2), 'height': rng.uniform(0.1, 2), 'depth': 0.5},
+                'rotation': {'x': 0, 'y': 0, 'z': 0}
+            }
+            for i in range(count)
+        ],
+        'lighting': {'ambient': 0.5, 'directional': [{'position': [5, 5, 5], 'intensity': 1.0}]},
+        'camera': {'position': [0, 2, 5], 'target': [0, 1, 0]}
+    }
+
+
+def best_of(fn, repeat=20):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+if __name__ == '__main__':
+    rng = random.Random(0)
+
+    for count in (10, 100, 1000):
+        scene = fake_scene(count, rng)
+        as_json = json.dumps(scene).encode('utf-8')
+        as_binary = encode_scene(scene)
+        print(
+            f"{count:5d} items | json {len(as_json):8d} B (gzip {len(gzip.compress(as_json)):7d}) "
+            f"| binary {len(as_binary):7d} B (gzip {len(gzip.compress(as_binary)):7d}) "
+            f"| decode json {best_of(lambda: json.loads(as_json)):6.2f} ms "
+            f"binary {best_of(lambda: decode_scene(as_binary)):6.2f} ms "
+            f"| encode binary {best_of(lambda: encode_scene(scene)):6.2f} ms"
+        )
@@ -0,0 +1,39 @@
+"""
+Startup time / RSS of an app worker, auth-only vs ML-enabled.
+
+Usage (from repo root):
+    python benchmarks/startup.py
+"""
+import json
+import os
+import subprocess
+import sys
+
+PROBE = """
+import json, resource, sys, time
+started = time.perf_counter()
+import app
+elapsed = time.perf_counter() - started
+print(json.dumps({
+    'import_seconds': round(elapsed, 3),
+    'max_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    'torch_imported': 'torch' in sys.modules
+}))
+"""
+
+SETUPS = {
+    'auth_only': {'ENABLE_ML': 'false'},
+    'ml_lazy': {'ENABLE_ML': 'true', 'ML_MODEL_LOADING': 'lazy'},
+}
+
+
+def measure(extra_env):
+    env = dict(os.environ, **extra_env)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.check_output([sys.executable, '-c', PROBE], env=env, cwd=root)
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+if __name__ == '__main__':
+    for name, env in SETUPS.items():
+        print(name, measure(env))
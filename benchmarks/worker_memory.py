@@ -0,0 +1,102 @@
+"""
+Total memory (PSS) of N pre-forked workers holding the models, per sharing mode.
+
+    none     each worker loads its own weights after fork
+    preload  weights loaded in the parent, workers share them copy-on-write
+    server   one inference process owns the weights, workers hold RemoteModel proxies
+
+PSS splits shared pages between the processes that map them, so the sum over
+all processes is the real RAM cost of the setup. Linux only.
+
+Usage (from repo root):
+    python benchmarks/worker_memory.py --workers 4
+"""
+import argparse
+import multiprocessing
+import os
+import secrets
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from config import Config
+
+
+def pss_mb(pid):
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            if line.startswith('Pss:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def _worker(ready, done, load_models):
+    from ml.registry import model_registry
+    if load_models:
+        model_registry.warmup(background=False)
+    ready.set()
+    done.wait()
+
+
+def run(mode, num_workers):
+    ctx = multiprocessing.get_context('fork')
+    server = None
+    Config.ML_MODEL_SHARING = mode
+
+    if mode == 'preload':
+        from ml.registry import model_registry
+        model_registry.warmup(background=False)
+        import gc
+        gc.freeze()
+    elif mode == 'server':
+        if os.path.exists(Config.INFERENCE_SOCKET):
+            os.unlink(Config.INFERENCE_SOCKET)
+        # One-off secret shared by the server and the forked workers (they read Config)
+        Config.INFERENCE_AUTHKEY = Config.INFERENCE_AUTHKEY or secrets.token_hex(32)
+        env = dict(os.environ, ML_MODEL_SHARING='server', INFERENCE_AUTHKEY=Config.INFERENCE_AUTHKEY)
+        server = subprocess.Popen([sys.executable, '-m', 'ml.inference_server'], env=env, cwd=ROOT)
+        while not os.path.exists(Config.INFERENCE_SOCKET):
+            time.sleep(0.5)
+
+    done = ctx.Event()
+    workers = []
+    for _ in range(num_workers):
+        ready = ctx.Event()
+        # preload workers already see the parent's models; the others load (or connect) themselves
+        process = ctx.Process(target=_worker, args=(ready, done, mode != 'preload'))
+        process.start()
+        workers.append((process, ready))
+    for _, ready in workers:
+        ready.wait()
+
+    pids = [process.pid for process, _ in workers]
+    if server:
+        pids.append(server.pid)
+    if mode == 'preload':
+        pids.append(os.getpid())
+    total = sum(pss_mb(pid) for pid in pids)
+
+    done.set()
+    for process, _ in workers:
+        process.join()
+    if server:
+        server.terminate()
+        server.wait()
+    return total
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--mode', choices=['none', 'preload', 'server'])
+    args = parser.parse_args()
+
+    if args.mode:
+        print(f"{args.mode}: {run(args.mode, args.workers):.0f} MB total PSS for {args.workers} workers")
+    else:
+        # Each mode in a fresh interpreter so one run's loaded models don't skew the next
+        for mode in ('none', 'preload', 'server'):
+            subprocess.check_call([sys.executable, __file__, '--mode', mode, '--workers', str(args.workers)])
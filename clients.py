@@ -0,0 +1,221 @@
+"""
+Shared outbound clients: one keep-alive connection pool per service, reused
+by every thread in the worker.
+
+    get_http_session()      requests.Session for Google OAuth (and any other HTTP)
+    get_google_transport()  google-auth transport on top of that session
+    get_supabase()          the one Supabase client (ml/ and database/ both use it)
+    execute(query)          run a postgrest query with retry/backoff and metrics
+    get_r2_client()         boto3 S3 client for Cloudflare R2
+
+All of them are built on first use, not at import, and apply the timeouts and
+retry settings from Config.
+"""
+import threading
+import time
+from config import Config
+from metrics import registry as metrics_registry
+from tracing import outbound
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# postgrest request method -> op label for outbound_request_duration_seconds
+SUPABASE_OPS = {'GET': 'select', 'HEAD': 'select', 'POST': 'insert', 'PATCH': 'update', 'DELETE': 'delete'}
+
+_lock = threading.Lock()
+_http_session = None
+_google_transport = None
+_supabase = None
+_r2_client = None
+
+outbound_requests = metrics_registry.counter(
+    'outbound_requests_total',
+    'Outbound calls by client and outcome (ok, error, retry)'
+)
+outbound_in_flight = metrics_registry.gauge(
+    'outbound_requests_in_flight',
+    'Outbound calls currently waiting on a response, by client'
+)
+
+
+def _http_pool_stats():
+    # One urllib3 pool per host behind the session's HTTPS adapter
+    if _http_session is None:
+        return []
+    stats = []
+    adapter = _http_session.get_adapter('https://')
+    for key in list(adapter.poolmanager.pools.keys()):
+        pool = adapter.poolmanager.pools.get(key)
+        if pool is None:
+            continue
+        host = pool.host
+        stats.append(({'client': 'http', 'host': host, 'state': 'idle'}, pool.pool.qsize() if pool.pool else 0))
+        stats.append(({'client': 'http', 'host': host, 'state': 'opened'}, pool.num_connections))
+    return stats
+
+
+metrics_registry.gauge(
+    'http_pool_connections',
+    'requests connection pool per host: idle connections and total opened',
+    fn=_http_pool_stats
+)
+metrics_registry.gauge(
+    'outbound_pool_size',
+    'Configured connection pool size per client',
+    fn=lambda: [
+        ({'client': 'http'}, Config.HTTP_POOL_SIZE),
+        ({'client': 'supabase'}, Config.SUPABASE_POOL_SIZE),
+        ({'client': 'r2'}, Config.R2_MAX_POOL_CONNECTIONS),
+    ]
+)
+
+
+def _timeout():
+    return (Config.HTTP_CONNECT_TIMEOUT, Config.HTTP_READ_TIMEOUT)
+
+
+def get_http_session():
+    global _http_session
+    if _http_session is None:
+        with _lock:
+            if _http_session is None:
+                _http_session = _build_http_session()
+    return _http_session
+
+
+def _build_http_session():
+    import requests
+    from urllib.parse import urlsplit
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    class _Session(requests.Session):
+        def request(self, method, url, **kwargs):
+            kwargs.setdefault('timeout', _timeout())
+            outbound_in_flight.inc(client='http')
+            try:
+                with outbound('http', urlsplit(url).hostname or 'unknown'):
+                    response = super().request(method, url, **kwargs)
+            except requests.RequestException:
+                outbound_requests.inc(client='http', outcome='error')
+                raise
+            finally:
+                outbound_in_flight.dec(client='http')
+            outbound_requests.inc(client='http', outcome='ok' if response.ok else 'error')
+            return response
+
+    # Status retries only for idempotent methods (urllib3 default); a POST is
+    # retried only when the connection could not be made, i.e. nothing was sent
+    retry = Retry(
+        total=Config.HTTP_RETRIES,
+        backoff_factor=Config.HTTP_BACKOFF,
+        status_forcelist=RETRY_STATUSES,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=Config.HTTP_POOL_SIZE, max_retries=retry)
+    session = _Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_google_transport():
+    # google-auth fetches Google's signing certs through this, on the shared pool
+    global _google_transport
+    if _google_transport is None:
+        from google.auth.transport import requests as google_requests
+        _google_transport = google_requests.Request(session=get_http_session())
+    return _google_transport
+
+
+def get_supabase():
+    global _supabase
+    if _supabase is None:
+        with _lock:
+            if _supabase is None:
+                _supabase = _build_supabase()
+    return _supabase
+
+
+def _build_supabase():
+    import httpx
+    from supabase import create_client, ClientOptions
+
+    http_client = httpx.Client(
+        limits=httpx.Limits(
+            max_connections=Config.SUPABASE_POOL_SIZE,
+            max_keepalive_connections=Config.SUPABASE_POOL_SIZE
+        ),
+        timeout=httpx.Timeout(Config.HTTP_READ_TIMEOUT, connect=Config.HTTP_CONNECT_TIMEOUT)
+    )
+    try:
+        options = ClientOptions(httpx_client=http_client, postgrest_client_timeout=Config.HTTP_READ_TIMEOUT)
+    except TypeError:
+        # supabase-py before httpx_client support: default pool, timeout still applied
+        http_client.close()
+        options = ClientOptions(postgrest_client_timeout=Config.HTTP_READ_TIMEOUT)
+    return create_client(Config.SUPABASE_URL, Config.SUPABASE_KEY, options=options)
+
+
+def execute(query, idempotent=True):
+    """
+    query.execute() with retry and backoff on transport errors.
+
+    Reads and upserts are safe to repeat. For inserts pass idempotent=False:
+    those are retried only when the connection was never established.
+    """
+    import httpx
+
+    # Timed as one call: retries and backoff are part of what the caller waits for
+    op = SUPABASE_OPS.get(str(getattr(query, 'http_method', '')).upper(), 'other')
+    with outbound('supabase', op):
+        attempts = Config.HTTP_RETRIES + 1
+        for attempt in range(attempts):
+            outbound_in_flight.inc(client='supabase')
+            try:
+                result = query.execute()
+            except httpx.TransportError as e:
+                not_sent = isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+                if attempt == attempts - 1 or not (idempotent or not_sent):
+                    outbound_requests.inc(client='supabase', outcome='error')
+                    raise
+                outbound_requests.inc(client='supabase', outcome='retry')
+                time.sleep(Config.HTTP_BACKOFF * (2 ** attempt))
+                continue
+            except Exception:
+                outbound_requests.inc(client='supabase', outcome='error')
+                raise
+            finally:
+                outbound_in_flight.dec(client='supabase')
+            outbound_requests.inc(client='supabase', outcome='ok')
+            return result
+
+
+def get_r2_client():
+    global _r2_client
+    if _r2_client is None:
+        with _lock:
+            if _r2_client is None:
+                _r2_client = _build_r2_client()
+    return _r2_client
+
+
+def _build_r2_client():
+    import boto3
+    from botocore.config import Config as BotoConfig
+
+    # boto3 clients are thread safe; one pool sized for every pipeline thread
+    # plus the multipart transfer threads
+    return boto3.client(
+        's3',
+        endpoint_url=Config.R2_ENDPOINT_URL,
+        aws_access_key_id=Config.R2_ACCESS_KEY_ID,
+        aws_secret_access_key=Config.R2_SECRET_ACCESS_KEY,
+        region_name='auto',
+        config=BotoConfig(
+            max_pool_connections=Config.R2_MAX_POOL_CONNECTIONS,
+            connect_timeout=Config.HTTP_CONNECT_TIMEOUT,
+            read_timeout=Config.HTTP_READ_TIMEOUT,
+            retries={'max_attempts': Config.HTTP_RETRIES + 1, 'mode': 'standard'},
+            tcp_keepalive=True
+        )
+    )
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 
@@ -11,9 +12,21 @@ class Config:
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY')
     JWT_ALGORITHM = 'HS256'
     JWT_ACCESS_TOKEN_EXPIRES = 3600  
+    # In-process caches for token_required and /auth/me (TTL 0 disables)
+    TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', 10000))
+    TOKEN_CACHE_TTL = float(os.getenv('TOKEN_CACHE_TTL', 300))
+    PROFILE_CACHE_SIZE = int(os.getenv('PROFILE_CACHE_SIZE', 10000))
+    PROFILE_CACHE_TTL = float(os.getenv('PROFILE_CACHE_TTL', 30))
+    # bcrypt cost and its process pool; beyond workers + queue, signup/login get 503 + Retry-After
+    BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', 12))
+    BCRYPT_WORKERS = int(os.getenv('BCRYPT_WORKERS', 2))
+    BCRYPT_QUEUE_SIZE = int(os.getenv('BCRYPT_QUEUE_SIZE', 8))
+    BCRYPT_RETRY_AFTER = int(os.getenv('BCRYPT_RETRY_AFTER', 1))
     GOOGLE_CLIENT_ID = os.getenv('GOOGLE_CLIENT_ID')
     GOOGLE_CLIENT_SECRET = os.getenv('GOOGLE_CLIENT_SECRET')
     REDIRECT_URI = os.getenv('REDIRECT_URI')
+    # Upper bound on how long Google's signing certs are cached (their Cache-Control usually says ~6h)
+    GOOGLE_CERTS_MAX_TTL = int(os.getenv('GOOGLE_CERTS_MAX_TTL', 24 * 3600))
     CORS_ORIGINS = ['http://127.0.0.1:3000', 'http://localhost:5500']
     FLASK_SECRET_KEY = os.getenv('SECRET_KEY')
     R2_ACCESS_KEY_ID = os.getenv('R2_ACCESS_KEY_ID')
@@ -23,4 +36,97 @@ class Config:
     R2_BUCKET_NAME = os.getenv('R2_BUCKET_NAME')
     HF_TOKEN = os.getenv('HF_TOKEN')
     HF_API_URL = os.getenv('HF_API_URL')
-    FURNITURE_LIST = os.getenv('FURNITURE_PROMPT')
\ No newline at end of file
+    FURNITURE_LIST = os.getenv('FURNITURE_PROMPT')
+    # gunicorn worker processes (gunicorn.conf.py); torch threads are split across them
+    WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', 2))
+    # Inference job queue: pipelines mostly wait on I/O and the batchers, so enough of them
+    # to put several images into each forward pass
+    ML_JOB_WORKERS = int(os.getenv('ML_JOB_WORKERS', 8))
+    ML_JOB_QUEUE_SIZE = int(os.getenv('ML_JOB_QUEUE_SIZE', 32))
+    # Rows in the shared jobs table older than this are deleted (0 keeps them)
+    ML_JOB_RETENTION_HOURS = float(os.getenv('ML_JOB_RETENTION_HOURS', 24))
+    # Admission control: concurrent forward passes (torch gets cores // (workers x slots) threads),
+    # how many requests may wait for inference, and how long before a waiting request is dropped
+    ML_INFERENCE_SLOTS = int(os.getenv('ML_INFERENCE_SLOTS', 2))
+    ML_ADMISSION_QUEUE = int(os.getenv('ML_ADMISSION_QUEUE', 8))
+    ML_ADMISSION_TIMEOUT = float(os.getenv('ML_ADMISSION_TIMEOUT', 60))
+    # Micro-batching window for model inference
+    BATCH_MAX_SIZE = int(os.getenv('BATCH_MAX_SIZE', 8))
+    BATCH_MAX_WAIT_MS = float(os.getenv('BATCH_MAX_WAIT_MS', 20))
+    PIPELINE_THREADS = int(os.getenv('PIPELINE_THREADS', 8))
+    BATCH_MAX_IMAGES = int(os.getenv('BATCH_MAX_IMAGES', 20))
+    # /process/stream sends a keepalive comment after this many idle seconds
+    SSE_KEEPALIVE_SECONDS = float(os.getenv('SSE_KEEPALIVE_SECONDS', 15))
+    GROUNDING_DINO_MODEL_ID = os.getenv('GROUNDING_DINO_MODEL_ID', 'IDEA-Research/grounding-dino-tiny')
+    DEPTH_MODEL_ID = os.getenv('DEPTH_MODEL_ID', 'Intel/dpt-large')
+    # Depth quality tiers: the per-request 'quality' picks the depth model and its input size
+    DEPTH_TIERS = {
+        'fast': {
+            'model_id': os.getenv('DEPTH_MODEL_FAST', 'depth-anything/Depth-Anything-V2-Small-hf'),
+            'input_size': int(os.getenv('DEPTH_INPUT_SIZE_FAST', 252))
+        },
+        'balanced': {
+            'model_id': os.getenv('DEPTH_MODEL_BALANCED', 'Intel/dpt-hybrid-midas'),
+            'input_size': int(os.getenv('DEPTH_INPUT_SIZE_BALANCED', 384))
+        },
+        'high': {
+            'model_id': DEPTH_MODEL_ID,
+            'input_size': int(os.getenv('DEPTH_INPUT_SIZE_HIGH', 384))
+        }
+    }
+    DEFAULT_QUALITY = os.getenv('DEFAULT_QUALITY', 'high')
+    if DEFAULT_QUALITY not in DEPTH_TIERS:
+        # Fail at startup, not with a KeyError on the first request or the warm-up
+        raise ValueError(f"DEFAULT_QUALITY={DEFAULT_QUALITY!r} is not a depth tier ({', '.join(DEPTH_TIERS)})")
+    # Pipeline result cache (memory LRU, optional disk tier)
+    RESULT_CACHE_MAX_BYTES = int(os.getenv('RESULT_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+    RESULT_CACHE_DIR = os.getenv('RESULT_CACHE_DIR')
+    # ENABLE_ML=false starts an auth-only worker that never imports torch
+    ENABLE_ML = os.getenv('ENABLE_ML', 'true').lower() == 'true'
+    # 'background' = warm up models in a thread at startup, 'lazy' = load on first request
+    ML_MODEL_LOADING = os.getenv('ML_MODEL_LOADING', 'background')
+    # Weight sharing across workers: 'none' (one copy per worker), 'preload' (load in the
+    # gunicorn master, shared copy-on-write) or 'server' (ml.inference_server over a Unix socket)
+    ML_MODEL_SHARING = os.getenv('ML_MODEL_SHARING', 'none')
+    # The socket carries pickles: it lives in a per-user 0700 directory (XDG_RUNTIME_DIR when
+    # set), and the server and clients refuse to run without a secret INFERENCE_AUTHKEY
+    INFERENCE_SOCKET = os.getenv('INFERENCE_SOCKET') or os.path.join(
+        os.getenv('XDG_RUNTIME_DIR') or os.path.join(tempfile.gettempdir(), f"roomview3d-{os.getuid()}"),
+        'roomview3d-inference.sock'
+    )
+    INFERENCE_AUTHKEY = os.getenv('INFERENCE_AUTHKEY', '')
+    # Inference backend per model: eager | int8 | compile | onnx
+    GROUNDING_DINO_BACKEND = os.getenv('GROUNDING_DINO_BACKEND', 'eager')
+    DEPTH_BACKEND = os.getenv('DEPTH_BACKEND', 'eager')
+    ONNX_MODEL_DIR = os.getenv('ONNX_MODEL_DIR', 'models/onnx')
+    # Per-object depth in SceneBuilder: median | mean (over the inset bbox) | center (single pixel)
+    SCENE_DEPTH_STAT = os.getenv('SCENE_DEPTH_STAT', 'median')
+    SCENE_DEPTH_INSET = float(os.getenv('SCENE_DEPTH_INSET', 0.2))
+    # Uploads: in-memory spool size before falling back to a temp file, R2 multipart settings
+    MAX_UPLOAD_BYTES = 16 * 1024 * 1024
+    UPLOAD_SPOOL_BYTES = int(os.getenv('UPLOAD_SPOOL_BYTES', 1024 * 1024))
+    R2_MULTIPART_THRESHOLD = int(os.getenv('R2_MULTIPART_THRESHOLD', 8 * 1024 * 1024))
+    R2_MULTIPART_CHUNKSIZE = int(os.getenv('R2_MULTIPART_CHUNKSIZE', 8 * 1024 * 1024))
+    R2_MULTIPART_CONCURRENCY = int(os.getenv('R2_MULTIPART_CONCURRENCY', 4))
+    # Read-through cache for GET /api/ml/project/<id>
+    PROJECT_CACHE_SIZE = int(os.getenv('PROJECT_CACHE_SIZE', 1000))
+    PROJECT_CACHE_TTL = float(os.getenv('PROJECT_CACHE_TTL', 300))
+    # Furniture GLBs packed into per-scene bundles (ml/assets.py)
+    ASSET_MODELS_DIR = os.getenv('ASSET_MODELS_DIR') or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), 'frontend', 'public', 'models'
+    )
+    ASSET_BUNDLE_CACHE_SIZE = int(os.getenv('ASSET_BUNDLE_CACHE_SIZE', 64))
+    # Shared outbound clients (clients.py): timeouts in seconds, retries with exponential backoff
+    HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 3.05))
+    HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', 10))
+    HTTP_RETRIES = int(os.getenv('HTTP_RETRIES', 2))
+    HTTP_BACKOFF = float(os.getenv('HTTP_BACKOFF', 0.3))
+    HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', 10))
+    SUPABASE_POOL_SIZE = int(os.getenv('SUPABASE_POOL_SIZE', 20))
+    # Every pipeline thread may hold one R2 connection, plus the multipart transfer threads
+    R2_MAX_POOL_CONNECTIONS = int(os.getenv('R2_MAX_POOL_CONNECTIONS', PIPELINE_THREADS + R2_MULTIPART_CONCURRENCY))
+    # Logging (logging_config.py): level name, and 'text' or 'json' (one object per line)
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+    # Server-Timing response header with the stages and outbound calls of each request (tracing.py)
+    SERVER_TIMING = os.getenv('SERVER_TIMING', 'false').lower() == 'true'
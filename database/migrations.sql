@@ -0,0 +1,38 @@
+-- Indexes the API queries rely on. Run in the Supabase SQL editor.
+-- CONCURRENTLY avoids locking writes on a live table; it cannot run inside a transaction.
+
+-- Project listing (GET /api/ml/projects/<user_id>): keyset pagination on
+-- (created_at, id) newest first, per user. INCLUDE makes it an index-only
+-- scan for the summary columns.
+create index concurrently if not exists projects_user_created_id_idx
+    on projects (user_id, created_at desc, id desc)
+    include (project_name, status, image_url);
+
+-- Same listing with ?status= (e.g. only 'completed' projects)
+create index concurrently if not exists projects_user_status_created_id_idx
+    on projects (user_id, status, created_at desc, id desc);
+
+-- Multi-image projects (POST /api/ml/process/batch): which photo a row belongs to.
+-- Nullable, so single-image projects and existing rows are unaffected.
+alter table detections add column if not exists image_index smallint;
+alter table room_dimensions add column if not exists image_index smallint;
+
+create index concurrently if not exists detections_project_image_idx
+    on detections (project_id, image_index);
+
+-- Processing jobs (ml/jobs.py). Each worker keeps its own jobs in memory and
+-- mirrors status changes here, so a poll of GET /api/ml/jobs/<id> that lands
+-- on another worker still finds the job (and, once completed, its project).
+create table if not exists jobs (
+    id text primary key,
+    status text not null,
+    stage text,
+    project_id bigint references projects (id) on delete set null,
+    error text,
+    created_at timestamptz not null default now()
+);
+
+-- Retention: every worker deletes rows older than ML_JOB_RETENTION_HOURS about
+-- once an hour (JobDB.delete_older_than); by hand or from a scheduler:
+--   delete from jobs where created_at < now() - interval '24 hours';
+create index concurrently if not exists jobs_created_at_idx on jobs (created_at);
@@ -1,7 +1,17 @@
-from supabase import create_client
+import logging
+from clients import get_supabase, execute
 from config import Config
+from ttl_cache import TTLCache
 
-supabase = create_client(Config.SUPABASE_URL, Config.SUPABASE_KEY)
+logger = logging.getLogger(__name__)
+
+# Only the columns /auth/me returns
+PROFILE_COLUMNS = 'id, email, first_name, last_name, profile_picture, auth_provider, created_at'
+
+_profiles = TTLCache('user_profiles', maxsize=Config.PROFILE_CACHE_SIZE, ttl=Config.PROFILE_CACHE_TTL)
+
+def invalidate_user_profile(user_id):
+    _profiles.pop(str(user_id))
 
 def create_user_with_password(email, password_hash, first_name, last_name):
     try:
@@ -13,9 +23,10 @@ def create_user_with_password(email, password_hash, first_name, last_name):
             'auth_provider': 'email'
         }
         
-        result = supabase.table('users').insert(user_data).execute()
+        result = execute(get_supabase().table('users').insert(user_data), idempotent=False)
         
         if result.data:
+            invalidate_user_profile(result.data[0]['id'])
             return result.data[0], None
         else:
             return None, "Failed to create user"
@@ -34,9 +45,10 @@ def create_user_with_google(email, google_id, first_name, last_name, picture):
             'auth_provider': 'google'
         }
         
-        result = supabase.table('users').insert(user_data).execute()
+        result = execute(get_supabase().table('users').insert(user_data), idempotent=False)
             
         if result.data:
+            invalidate_user_profile(result.data[0]['id'])
             return result.data[0], None
         else:
             return None, "Failed to create user"
@@ -46,51 +58,101 @@ def create_user_with_google(email, google_id, first_name, last_name, picture):
 
 def get_user_by_email(email):
     try:
-        result = supabase.table('users').select('*').eq('email', email).execute()
+        result = execute(get_supabase().table('users').select('*').eq('email', email))
         
         if result.data and len(result.data) > 0:
             return result.data[0]
         return None
         
-    except Exception as e:
-        print(f"Error getting user: {e}")
+    except Exception:
+        logger.exception("Error getting user")
         return None
 
 def get_user_by_google_id(google_id):
     try:
-        result = supabase.table('users').select('*').eq('google_id', google_id).execute()
+        result = execute(get_supabase().table('users').select('*').eq('google_id', google_id))
         
         if result.data and len(result.data) > 0:
             return result.data[0]
         return None
         
-    except Exception as e:
-        print(f"Error getting user: {e}")
+    except Exception:
+        logger.exception("Error getting user")
         return None
 
+def get_user_by_google_id_or_email(google_id, email):
+    # One round trip for the OAuth callback: the google_id match wins over an email match
+    try:
+        result = execute(
+            get_supabase().table('users').select('*')
+            .or_(f'google_id.eq."{google_id}",email.eq."{email}"')
+        )
+        
+        rows = result.data or []
+        by_google_id = next((row for row in rows if row.get('google_id') == google_id), None)
+        by_email = next((row for row in rows if row.get('email') == email), None)
+        return by_google_id, by_email
+        
+    except Exception:
+        logger.exception("Error getting user")
+        return None, None
+
 def get_user_by_id(user_id):
     try:
-        result = supabase.table('users').select('*').eq('id', user_id).execute()
+        result = execute(get_supabase().table('users').select('*').eq('id', user_id))
         
         if result.data and len(result.data) > 0:
             return result.data[0]
         return None
         
-    except Exception as e:
-        print(f"Error getting user: {e}")
+    except Exception:
+        logger.exception("Error getting user")
         return None
 
+def get_user_profile(user_id):
+    # Read-through for /auth/me, which the frontend polls
+    profile = _profiles.get(str(user_id))
+    if profile is not None:
+        return profile
+    
+    try:
+        result = execute(get_supabase().table('users').select(PROFILE_COLUMNS).eq('id', user_id))
+        
+        if result.data and len(result.data) > 0:
+            _profiles.set(str(user_id), result.data[0])
+            return result.data[0]
+        return None
+        
+    except Exception:
+        logger.exception("Error getting user")
+        return None
+
+def update_password_hash(user_id, password_hash):
+    # Rehash-on-login after BCRYPT_ROUNDS changes
+    try:
+        execute(get_supabase().table('users').update({
+            'password_hash': password_hash
+        }).eq('id', user_id))
+        return True
+        
+    except Exception:
+        logger.exception("Error updating password hash for user %s", user_id)
+        return False
+
 def link_google_account(email, google_id, picture):
     try:
-        result = supabase.table('users').update({
+        result = execute(get_supabase().table('users').update({
             'google_id': google_id,
             'profile_picture': picture
-        }).eq('email', email).execute()
+        }).eq('email', email))
         
-        return result.data[0] if result.data else None
+        if not result.data:
+            return None
+        invalidate_user_profile(result.data[0]['id'])
+        return result.data[0]
         
-    except Exception as e:
-        print(f"Error linking account: {e}")
+    except Exception:
+        logger.exception("Error linking Google account for %s", email)
         return None
     
     
\ No newline at end of file
@@ -0,0 +1,47 @@
+// Loads the per-scene furniture bundle (scene.assets.bundle, layout in ml/assets.py)
+// and returns { type: blob URL } so useGLTF can load each model without another fetch.
+
+const API_BASE_URL = "http://localhost:5000";
+const bundles = new Map(); // bundle URL -> Promise<{ type: blob URL }>
+
+function unpack(buffer) {
+  const view = new DataView(buffer);
+  const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4));
+  if (magic !== "RVAB") throw new Error("Not a RoomView3D asset bundle");
+
+  const decoder = new TextDecoder();
+  const urls = {};
+  let offset = 8;
+  for (let i = view.getUint16(6, true); i > 0; i--) {
+    const nameLength = view.getUint16(offset, true);
+    const name = decoder.decode(new Uint8Array(buffer, offset + 2, nameLength));
+    offset += 2 + nameLength;
+    const start = view.getUint32(offset, true);
+    const length = view.getUint32(offset + 4, true);
+    offset += 8;
+    urls[name] = URL.createObjectURL(
+      new Blob([new Uint8Array(buffer, start, length)], { type: "model/gltf-binary" })
+    );
+  }
+  return urls;
+}
+
+export function loadAssetBundle(bundleUrl) {
+  // Content-hash URLs never change content, so one fetch per URL per page load
+  if (!bundles.has(bundleUrl)) {
+    bundles.set(
+      bundleUrl,
+      fetch(`${API_BASE_URL}${bundleUrl}`)
+        .then((res) => {
+          if (!res.ok) throw new Error(`Asset bundle ${res.status}`);
+          return res.arrayBuffer();
+        })
+        .then(unpack)
+        .catch((err) => {
+          bundles.delete(bundleUrl);
+          throw err;
+        })
+    );
+  }
+  return bundles.get(bundleUrl);
+}
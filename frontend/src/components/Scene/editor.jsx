@@ -4,6 +4,8 @@ import { OrbitControls, Grid, Sky, ContactShadows } from "@react-three/drei";
 import { useLocation } from "react-router-dom";
 import FurnitureDropdown from "./FurnitureDropdown";
 import { Furniture } from "./Furniture";
+import { loadAssetBundle } from "./assetBundle";
+import { fetchScene } from "./sceneCodec";
 import * as THREE from "three";
 
 const Room = () => (
@@ -27,22 +29,48 @@ const Room = () => (
 
 export default function Editor() {
   const { state } = useLocation();
-  const scene = state ? state.scene : undefined;
+  const projectId = state ? state.projectId : undefined;
   const projectName = state ? state.projectName : undefined;
   
+  const [scene, setScene] = useState(state ? state.scene : undefined);
   const [items, setItems] = useState([]);
   const orbitRef = useRef();
 
+  // Opened with a saved project instead of a scene: load it in the binary encoding
+  useEffect(() => {
+    if (scene || projectId === undefined) return;
+    let cancelled = false;
+    fetchScene(projectId)
+      .then((loaded) => !cancelled && setScene(loaded))
+      .catch(() => alert("Could not load the project's scene"));
+    return () => {
+      cancelled = true;
+    };
+  }, [projectId]);
+
   useEffect(() => {
     if (!scene?.furniture) return;
+    let cancelled = false;
 
-    const mapped = scene.furniture.map((f) => ({
-      id: f.id,
-      modelPath: `/models/${f.type}.glb`,
-      position: [f.position.x, f.position.y, f.position.z],
-    }));
+    const place = (modelUrls) => {
+      if (cancelled) return;
+      const mapped = scene.furniture.map((f) => ({
+        id: f.id,
+        // One bundle fetch for the whole scene; per-type files only as a fallback
+        modelPath: modelUrls[f.type] || `/models/${f.type}.glb`,
+        position: [f.position.x, f.position.y, f.position.z],
+      }));
+      setItems(mapped);
+    };
 
-    setItems(mapped);
+    if (scene.assets?.bundle) {
+      loadAssetBundle(scene.assets.bundle).then(place).catch(() => place({}));
+    } else {
+      place({});
+    }
+    return () => {
+      cancelled = true;
+    };
   }, [scene]);
 
   const handleFurnitureSelect = (item) => {
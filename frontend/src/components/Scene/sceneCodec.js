@@ -0,0 +1,92 @@
+// Decoder for the binary scene served by GET /api/ml/project/<id>/scene
+// with Accept: application/x-roomview3d-scene (layout in ml/scene_codec.py).
+// Returns the same object shape as the JSON scene.
+
+export const SCENE_MIMETYPE = "application/x-roomview3d-scene";
+
+const API_BASE_URL = "http://localhost:5000";
+
+const SURFACES = ["walls", "floor", "ceiling"];
+
+export function decodeScene(buffer) {
+  const view = new DataView(buffer);
+  const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4));
+  if (magic !== "RV3S") throw new Error("Not a RoomView3D scene");
+  const version = view.getUint16(4, true);
+  if (version !== 1) throw new Error(`Unsupported scene version ${version}`);
+
+  const decoder = new TextDecoder();
+  const strings = [];
+  let offset = 8;
+  for (let i = view.getUint16(6, true); i > 0; i--) {
+    const length = view.getUint16(offset, true);
+    strings.push(decoder.decode(new Uint8Array(buffer, offset + 2, length)));
+    offset += 2 + length;
+  }
+  offset += -offset & 3;
+
+  // Arrays are 4-byte aligned, so these are zero-copy views
+  const take = (ArrayType, count) => {
+    const array = new ArrayType(buffer, offset, count);
+    offset += array.byteLength;
+    return array;
+  };
+
+  const [count, lightCount] = take(Uint32Array, 2);
+  const scalars = take(Float32Array, 10);
+  const materials = take(Uint16Array, 6);
+  const lights = take(Float32Array, lightCount * 4);
+  const ids = take(Uint32Array, count);
+  const types = take(Uint16Array, count);
+  offset += -offset & 3;
+  const confidences = take(Float32Array, count);
+  const t = take(Float32Array, count * 9);
+  const extrasLength = view.getUint32(offset, true);
+  const { _furniture_extras: itemExtras = {}, ...extras } = extrasLength
+    ? JSON.parse(decoder.decode(new Uint8Array(buffer, offset + 4, extrasLength)))
+    : {};
+
+  const room = {
+    dimensions: { width: scalars[0], height: scalars[1], depth: scalars[2] },
+  };
+  SURFACES.forEach((surface, i) => {
+    room[surface] = { color: strings[materials[2 * i]], texture: strings[materials[2 * i + 1]] };
+  });
+
+  const furniture = [];
+  for (let i = 0; i < count; i++) {
+    const k = i * 9;
+    furniture.push({
+      id: ids[i],
+      type: strings[types[i]],
+      confidence: confidences[i],
+      position: { x: t[k], y: t[k + 1], z: t[k + 2] },
+      size: { width: t[k + 3], height: t[k + 4], depth: t[k + 5] },
+      rotation: { x: t[k + 6], y: t[k + 7], z: t[k + 8] },
+      ...itemExtras[i],
+    });
+  }
+
+  const directional = [];
+  for (let i = 0; i < lightCount; i++) {
+    const k = i * 4;
+    directional.push({ position: [lights[k], lights[k + 1], lights[k + 2]], intensity: lights[k + 3] });
+  }
+
+  return {
+    room,
+    furniture,
+    lighting: { ambient: scalars[3], directional },
+    camera: { position: Array.from(scalars.subarray(4, 7)), target: Array.from(scalars.subarray(7, 10)) },
+    ...extras,
+  };
+}
+
+// A saved project's scene (image: photo index for multi-image projects)
+export async function fetchScene(projectId, image = 0) {
+  const res = await fetch(`${API_BASE_URL}/api/ml/project/${projectId}/scene?image=${image}`, {
+    headers: { Accept: SCENE_MIMETYPE },
+  });
+  if (!res.ok) throw new Error(`Scene ${res.status}`);
+  return decodeScene(await res.arrayBuffer());
+}
@@ -2,6 +2,22 @@ import React, { useState } from "react";
 import { useNavigate } from "react-router-dom";
 import "../styles/entry.css";
 
+const API = "http://localhost:5000";
+// Opt-in (VITE_STREAM_PROGRESS=true): /process/stream shows the scene before it is
+// saved, but each open stream holds one gunicorn thread for the whole pipeline
+const STREAM_PROGRESS = import.meta.env.VITE_STREAM_PROGRESS === "true";
+
+// Poll GET /api/ml/jobs/<id> (any worker can answer) until the job finishes
+async function pollJob(statusUrl) {
+  for (;;) {
+    const res = await fetch(`${API}${statusUrl}`);
+    const job = await res.json();
+    if (!res.ok || job.status === "failed") throw new Error(job.error);
+    if (job.status === "completed") return job;
+    await new Promise((resolve) => setTimeout(resolve, 1500));
+  }
+}
+
 export default function Entry() {
   const [image, setImage] = useState(null);
   const [projectName, setProjectName] = useState("");
@@ -23,19 +39,63 @@ export default function Entry() {
    
     try {
       setLoading(true);
-      const res = await fetch("http://localhost:5000/api/ml/process", {
+      // The editor loads the saved scene itself (binary, smaller than the JSON)
+      const openProject = (projectId) => navigate("/editor", { state: { projectId, projectName } });
+      if (!STREAM_PROGRESS) {
+        // 202 + job polling: no request holds a server thread while the pipeline runs
+        const res = await fetch(`${API}/api/ml/process`, {
+          method: "POST",
+          body: formData,
+        });
+        const data = await res.json();
+        if (!res.ok) throw new Error(data.error);
+        openProject((await pollJob(data.status_url)).project_id);
+        return;
+      }
+
+      // Progress stream: open the editor as soon as the scene event arrives,
+      // saving to the database finishes in the background
+      const res = await fetch(`${API}/api/ml/process/stream`, {
         method: "POST",
         body: formData,
       });
+      if (!res.ok) throw new Error((await res.json()).error);
 
-      const data = await res.json();
+      const openEditor = (scene) => navigate("/editor", { state: { scene, projectName } });
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      let statusUrl = null;
+      for (;;) {
+        let chunk;
+        try {
+          chunk = await reader.read();
+        } catch (err) {
+          chunk = { done: true };
+        }
+        if (chunk.done) {
+          // Stream dropped before the scene: the job keeps running, poll it instead
+          if (!statusUrl) throw new Error("Stream ended before the job was accepted");
+          openProject((await pollJob(statusUrl)).project_id);
+          return;
+        }
+        buffer += decoder.decode(chunk.value, { stream: true });
 
-      navigate("/editor", {
-        state: {
-          scene: data.scene,
-          projectName,
-        },
-      });
+        let boundary;
+        while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+          const message = buffer.slice(0, boundary);
+          buffer = buffer.slice(boundary + 2);
+          const event = message.match(/^event: (.*)$/m)?.[1];
+          const data = message.match(/^data: (.*)$/m)?.[1];
+          if (event === "accepted") statusUrl = JSON.parse(data).status_url;
+          if (event === "error") throw new Error(JSON.parse(data).error);
+          if (event === "scene") {
+            reader.cancel();
+            openEditor(JSON.parse(data).scene);
+            return;
+          }
+        }
+      }
     } catch (err) {
       alert("Backend error");
     } finally {
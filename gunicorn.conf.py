@@ -0,0 +1,18 @@
+import gc
+import os
+from config import Config
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+workers = Config.WEB_CONCURRENCY
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+timeout = 120
+
+# ML_MODEL_SHARING=preload: create the app (and load the weights) once in the master
+preload_app = Config.ML_MODEL_SHARING == 'preload'
+
+
+def when_ready(server):
+    if preload_app:
+        # Move everything loaded so far out of GC tracking, otherwise collections in
+        # the workers touch those objects and un-share their pages
+        gc.freeze()
@@ -0,0 +1,37 @@
+"""
+Process-wide logging setup, called once by create_app() (and the inference server).
+
+Modules log through logging.getLogger(__name__) with %-style arguments, so a
+message below LOG_LEVEL is dropped before it is formatted. LOG_FORMAT=json
+writes one JSON object per line for log shippers; 'text' is for humans.
+"""
+import json
+import logging
+import sys
+from config import Config
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'thread': record.threadName
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(level=None, fmt=None):
+    handler = logging.StreamHandler(sys.stderr)
+    if (fmt or Config.LOG_FORMAT) == 'json':
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s [%(name)s] %(message)s'))
+
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel((level or Config.LOG_LEVEL).upper())
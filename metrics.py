@@ -0,0 +1,196 @@
+import bisect
+import math
+import re
+import threading
+
+
+class Histogram:
+    """
+    Bucketed observations, optionally per label set: observe(0.2, stage='ingest').
+    Unlabeled histograms snapshot as {buckets, count, sum}; labeled ones as
+    {values: {label key: {buckets, count, sum}}} like Counter and Gauge.
+    """
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help = help_text
+        self.buckets = sorted(buckets)
+        self._series = {}  # label key -> [bucket counts (last slot = +Inf), sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def _cumulative(self, counts):
+        cumulative = 0
+        for bound, count in zip(self.buckets + [float('inf')], counts):
+            cumulative += count
+            yield bound, cumulative
+
+    def _series_snapshot(self, counts, total):
+        buckets = {'+Inf' if bound == float('inf') else str(bound): n for bound, n in self._cumulative(counts)}
+        return {'buckets': buckets, 'count': sum(counts), 'sum': total}
+
+    def snapshot(self):
+        with self._lock:
+            series = {key: (list(counts), total) for key, (counts, total) in self._series.items()}
+
+        if set(series) <= {''}:
+            counts, total = series.get('', ([0] * (len(self.buckets) + 1), 0.0))
+            return {'type': 'histogram', 'help': self.help, **self._series_snapshot(counts, total)}
+        values = {key: self._series_snapshot(counts, total) for key, (counts, total) in series.items()}
+        return {'type': 'histogram', 'help': self.help, 'values': values}
+
+    def samples(self):
+        with self._lock:
+            series = {key: (list(counts), total) for key, (counts, total) in self._series.items()}
+        for key, (counts, total) in sorted(series.items()):
+            labels = _parse_label_key(key)
+            for bound, n in self._cumulative(counts):
+                yield '_bucket', dict(labels, le='+Inf' if bound == float('inf') else repr(float(bound))), n
+            yield '_sum', labels, total
+            yield '_count', labels, sum(counts)
+
+
+def _label_key(labels):
+    return ','.join(f"{k}={v}" for k, v in sorted(labels.items()))
+
+
+def _parse_label_key(key):
+    return dict(pair.split('=', 1) for pair in key.split(',')) if key else {}
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            values = dict(self._values)
+        return {'type': 'counter', 'help': self.help, 'values': values}
+
+    def samples(self):
+        for key, value in sorted(self.snapshot()['values'].items()):
+            yield '', _parse_label_key(key), value
+
+
+class Gauge:
+    """
+    Current value per label set. Either set()/inc() directly, or pass fn: a
+    callable returning [(labels_dict, value), ...], read at snapshot time.
+    """
+
+    def __init__(self, name, help_text, fn=None):
+        self.name = name
+        self.help = help_text
+        self.fn = fn
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def snapshot(self):
+        with self._lock:
+            values = dict(self._values)
+        if self.fn:
+            values.update((_label_key(labels), value) for labels, value in self.fn())
+        return {'type': 'gauge', 'help': self.help, 'values': values}
+
+    def samples(self):
+        for key, value in sorted(self.snapshot()['values'].items()):
+            yield '', _parse_label_key(key), value
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name, help_text, buckets):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Histogram(name, help_text, buckets)
+            return self._metrics[name]
+
+    def counter(self, name, help_text):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Counter(name, help_text)
+            return self._metrics[name]
+
+    def gauge(self, name, help_text, fn=None):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Gauge(name, help_text, fn)
+            return self._metrics[name]
+
+    def snapshot(self):
+        with self._lock:
+            metrics = dict(self._metrics)
+        return {name: metric.snapshot() for name, metric in metrics.items()}
+
+    def render_prometheus(self):
+        """Every metric in the Prometheus text exposition format (version 0.0.4)"""
+        with self._lock:
+            metrics = dict(self._metrics)
+
+        lines = []
+        for name, metric in sorted(metrics.items()):
+            name = _METRIC_NAME.sub('_', name)
+            kind = 'histogram' if isinstance(metric, Histogram) else 'counter' if isinstance(metric, Counter) else 'gauge'
+            lines.append(f"# HELP {name} {_escape(metric.help, quote=False)}")
+            lines.append(f"# TYPE {name} {kind}")
+            for suffix, labels, value in metric.samples():
+                if labels:
+                    rendered = ','.join(f'{_METRIC_NAME.sub("_", k)}="{_escape(v)}"' for k, v in labels.items())
+                    lines.append(f"{name}{suffix}{{{rendered}}} {_format_value(value)}")
+                else:
+                    lines.append(f"{name}{suffix} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+_METRIC_NAME = re.compile(r'[^a-zA-Z0-9_:]')
+
+
+def _escape(value, quote=True):
+    value = str(value).replace('\\', '\\\\').replace('\n', '\\n')
+    return value.replace('"', '\\"') if quote else value
+
+
+def _format_value(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        value = float(value)
+    if isinstance(value, float):
+        if math.isinf(value):
+            return '+Inf' if value > 0 else '-Inf'
+        if math.isnan(value):
+            return 'NaN'
+    return repr(value)
+
+
+registry = MetricsRegistry()
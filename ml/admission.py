@@ -0,0 +1,177 @@
+"""
+Admission control for the ML endpoints.
+
+ML_INFERENCE_SLOTS is the number of forward passes allowed to run at once
+per process; torch gets cpu_count // (WEB_CONCURRENCY x slots) intra-op
+threads so every worker's slots together use the cores without
+oversubscribing them.
+
+A request holds an inference place only while the batchers work on its
+images (not during decode, R2 or Supabase I/O, and not at all on a cache
+hit). There are slots x BATCH_MAX_SIZE places, so enough requests reach the
+batchers to fill a forward pass. Beyond those, at most ML_ADMISSION_QUEUE
+requests may wait, each for at most ML_ADMISSION_TIMEOUT seconds from
+admission. Anything else is turned away up front with 503 + Retry-After
+instead of queuing until every request times out.
+
+    ticket = inference_admission.admit()      # in the route, raises AdmissionRejected
+    job_queue.submit(run_room_pipeline, ..., ticket=ticket)
+    ticket.acquire()                          # in the pipeline, raises AdmissionTimeout past the deadline
+    ...submit to the batchers, release() once their futures are done
+"""
+import math
+import os
+import threading
+import time
+from config import Config
+from metrics import registry as metrics_registry
+
+WAIT_BUCKETS = [0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60]
+
+_torch_threads_configured = False
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionTimeout(Exception):
+    pass
+
+
+def torch_threads_per_slot(slots=None, processes=None):
+    # Every process that runs models (gunicorn workers, or the one inference server) gets its share
+    processes = processes or Config.WEB_CONCURRENCY
+    return max(1, (os.cpu_count() or 1) // (processes * (slots or Config.ML_INFERENCE_SLOTS)))
+
+
+def configure_torch_threads(processes=None):
+    # Called before the first local model load; processes x slots x threads = cores
+    global _torch_threads_configured
+    if _torch_threads_configured:
+        return
+    import torch
+    torch.set_num_threads(torch_threads_per_slot(processes=processes))
+    _torch_threads_configured = True
+
+
+class Ticket:
+    """One admitted request: waits for an inference place with a deadline, holds it, releases it once."""
+
+    def __init__(self, controller, deadline):
+        self.controller = controller
+        self.deadline = deadline
+        self.admitted_at = time.monotonic()
+        self._state = 'waiting'  # waiting -> running -> done
+
+    def acquire(self):
+        self.controller._acquire(self)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+    def release(self):
+        # Safe to call more than once, and for tickets that never ran (cache hit, request failed before submit)
+        self.controller._release(self)
+
+
+class AdmissionController:
+    def __init__(self, name, slots, max_waiting, wait_timeout):
+        self.name = name
+        self.slots = max(1, slots)
+        self.max_waiting = max_waiting
+        self.wait_timeout = wait_timeout
+        self._running = 0
+        self._waiting = 0
+        self._cond = threading.Condition()
+        self._avg_run_seconds = None
+
+        self.rejected = metrics_registry.counter(
+            f"{name}_admission_rejected_total", f"{name} requests turned away, by reason (queue_full, deadline)"
+        )
+        self.wait_hist = metrics_registry.histogram(
+            f"{name}_admission_wait_seconds", f"Time a {name} request waited for a slot", WAIT_BUCKETS
+        )
+        metrics_registry.gauge(
+            f"{name}_admission", f"{name} requests running and waiting for a slot",
+            fn=lambda: [({'state': 'running'}, self._running), ({'state': 'waiting'}, self._waiting),
+                        ({'state': 'slots'}, self.slots)]
+        )
+
+    def retry_after(self):
+        # Rough time until the current backlog drains, whole seconds, at least 1
+        with self._cond:
+            backlog = self._running + self._waiting
+            avg = self._avg_run_seconds or 5.0
+        return max(1, math.ceil(avg * backlog / self.slots))
+
+    def admit(self):
+        """Reserve a place in the wait queue or raise AdmissionRejected (never blocks)."""
+        with self._cond:
+            if self._waiting >= self.max_waiting:
+                full = True
+            else:
+                full = False
+                self._waiting += 1
+        if full:
+            self.rejected.inc(reason='queue_full')
+            raise AdmissionRejected('Server busy, try again shortly', self.retry_after())
+        return Ticket(self, time.monotonic() + self.wait_timeout)
+
+    def _acquire(self, ticket):
+        with self._cond:
+            while self._running >= self.slots:
+                remaining = ticket.deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            # A queued job picked up after its deadline is dropped, not run for a client that gave up
+            if self._running >= self.slots or time.monotonic() > ticket.deadline:
+                self._waiting -= 1
+                ticket._state = 'done'
+                self._cond.notify_all()
+                expired = True
+            else:
+                self._waiting -= 1
+                self._running += 1
+                ticket._state = 'running'
+                ticket.started_at = time.monotonic()
+                expired = False
+
+        self.wait_hist.observe(time.monotonic() - ticket.admitted_at)
+        if expired:
+            self.rejected.inc(reason='deadline')
+            raise AdmissionTimeout('Timed out waiting for an inference slot')
+
+    def _release(self, ticket):
+        with self._cond:
+            if ticket._state == 'waiting':
+                self._waiting -= 1
+            elif ticket._state == 'running':
+                self._running -= 1
+                run_seconds = time.monotonic() - ticket.started_at
+                self._avg_run_seconds = run_seconds if self._avg_run_seconds is None \
+                    else 0.8 * self._avg_run_seconds + 0.2 * run_seconds
+            else:
+                return
+            ticket._state = 'done'
+            self._cond.notify_all()
+
+
+# A place per image a batch can hold on every slot, so admission never caps batching
+inference_admission = AdmissionController(
+    'inference',
+    slots=Config.ML_INFERENCE_SLOTS * Config.BATCH_MAX_SIZE,
+    max_waiting=Config.ML_ADMISSION_QUEUE,
+    wait_timeout=Config.ML_ADMISSION_TIMEOUT
+)
+
+# Forward passes from all batchers, at most ML_INFERENCE_SLOTS at once
+forward_pass_slots = threading.BoundedSemaphore(Config.ML_INFERENCE_SLOTS)
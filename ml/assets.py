@@ -0,0 +1,138 @@
+"""
+Furniture meshes served as one bundle per scene instead of a GLB fetch per type.
+
+The GLBs in frontend/public/models are read once at startup. A bundle packs
+the GLBs for a set of furniture types and is stored gzip-compressed; its URL
+carries a content hash, so clients cache it forever and a changed model gets
+a new URL. Bundles live in an LRU keyed by the type set.
+
+Bundle layout (before gzip), little-endian:
+
+    magic    4s   b'RVAB'
+    version  u16
+    count    u16
+    index         per entry: u16 name length + UTF-8 type name, u32 offset, u32 length
+    data          the GLB files, each starting on a 4-byte boundary
+"""
+import gzip
+import hashlib
+import logging
+import os
+import struct
+import threading
+from collections import OrderedDict
+from urllib.parse import urlencode
+from config import Config
+
+MAGIC = b'RVAB'
+VERSION = 1
+MIMETYPE = 'application/x-roomview3d-assets'
+
+logger = logging.getLogger(__name__)
+
+
+def bundle_hash(data):
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+class AssetBundle:
+    def __init__(self, types, data):
+        self.types = types
+        self.size = len(data)
+        self.hash = bundle_hash(data)
+        self.compressed = gzip.compress(data, compresslevel=9, mtime=0)
+
+    @property
+    def url(self):
+        # Types ride along in the query so any worker can rebuild the bundle from the URL
+        return f"/api/ml/assets/{self.hash}?{urlencode({'types': ','.join(self.types)})}"
+
+
+def pack(glbs):
+    """{type: glb bytes} -> bundle bytes"""
+    names = sorted(glbs)
+    index_size = 8 + sum(2 + len(name.encode('utf-8')) + 8 for name in names)
+    offset = index_size + (-index_size % 4)
+
+    index = bytearray(struct.pack('<4sHH', MAGIC, VERSION, len(names)))
+    data = bytearray()
+    for name in names:
+        encoded = name.encode('utf-8')
+        index += struct.pack('<H', len(encoded)) + encoded + struct.pack('<II', offset + len(data), len(glbs[name]))
+        data += glbs[name]
+        data += b'\0' * (-len(data) % 4)
+    index += b'\0' * (-len(index) % 4)
+    return bytes(index + data)
+
+
+class AssetBundler:
+    def __init__(self, models_dir, max_bundles=64):
+        self.models_dir = models_dir
+        self.max_bundles = max_bundles
+        self._glbs = None
+        self._bundles = OrderedDict()  # tuple of types -> AssetBundle
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Read every GLB once and build the bundle with all of them"""
+        glbs = {}
+        if os.path.isdir(self.models_dir):
+            for filename in os.listdir(self.models_dir):
+                name, ext = os.path.splitext(filename)
+                if ext.lower() == '.glb':
+                    with open(os.path.join(self.models_dir, filename), 'rb') as f:
+                        glbs[name] = f.read()
+        self._glbs = glbs
+        self.bundle_for(glbs)
+        logger.info("Asset bundles: %d models from %s", len(glbs), self.models_dir)
+
+    @property
+    def available(self):
+        if self._glbs is None:
+            self.load()
+        return self._glbs
+
+    def bundle_for(self, types, expected_hash=None):
+        """
+        Bundle of the GLBs for these furniture types (types without a model are
+        skipped). With expected_hash (a URL from a client), None unless the
+        bundle has that hash: the packed bytes are checked before anything is
+        compressed or cached, so arbitrary type sets cost a copy, not a gzip.
+        """
+        key = tuple(sorted(set(types) & set(self.available)))
+        with self._lock:
+            bundle = self._bundles.get(key)
+            if bundle:
+                self._bundles.move_to_end(key)
+                return bundle if expected_hash in (None, bundle.hash) else None
+
+        data = pack({name: self.available[name] for name in key})
+        if expected_hash is not None and bundle_hash(data) != expected_hash:
+            return None
+        bundle = AssetBundle(key, data)
+        with self._lock:
+            self._bundles[key] = bundle
+            while len(self._bundles) > self.max_bundles:
+                self._bundles.popitem(last=False)
+        return bundle
+
+    def scene_assets(self, scene):
+        """The 'assets' reference for a scene: bundle URL plus types that have no model"""
+        types = {item['type'] for item in scene.get('furniture', [])}
+        bundle = self.bundle_for(types)
+        return {
+            'bundle': bundle.url,
+            'hash': bundle.hash,
+            'types': list(bundle.types),
+            'missing': sorted(types - set(bundle.types))
+        }
+
+
+def with_assets(scene):
+    # Added when the scene is served, not stored, so the URL always matches the current models
+    if not scene or 'furniture' not in scene:
+        return scene
+    return dict(scene, assets=asset_bundler.scene_assets(scene))
+
+
+asset_bundler = AssetBundler(Config.ASSET_MODELS_DIR, Config.ASSET_BUNDLE_CACHE_SIZE)
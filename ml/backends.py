@@ -0,0 +1,78 @@
+import logging
+import os
+import torch
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('eager', 'int8', 'compile', 'onnx')
+
+# Outputs each HF model's post-processing reads; the ONNX graphs export exactly these
+OUTPUT_NAMES = {
+    'depth': ['predicted_depth'],
+    'grounding_dino': ['logits', 'pred_boxes'],
+}
+
+
+def onnx_path(model_id):
+    return os.path.join(Config.ONNX_MODEL_DIR, model_id.replace('/', '__') + '.onnx')
+
+
+class OnnxOutputs:
+    # Attribute access like the HF ModelOutput the post-processing expects
+    def __init__(self, **outputs):
+        self.__dict__.update(outputs)
+
+    def __getitem__(self, key):
+        return self.__dict__[key]
+
+
+class OnnxModel:
+    """ONNX Runtime session behind the same model(**inputs) call as the torch model."""
+
+    def __init__(self, path):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        self.output_names = [o.name for o in self.session.get_outputs()]
+
+    def __call__(self, **inputs):
+        feed = {name: inputs[name].cpu().numpy() for name in self.input_names if name in inputs}
+        outputs = self.session.run(self.output_names, feed)
+        return OnnxOutputs(**{name: torch.from_numpy(value) for name, value in zip(self.output_names, outputs)})
+
+    def to(self, device):
+        return self
+
+    def eval(self):
+        return self
+
+
+def load_model(model_cls, model_id, backend, device):
+    """
+    eager    fp32 PyTorch
+    int8     dynamic int8 quantization of nn.Linear layers (CPU only)
+    compile  torch.compile of the fp32 model
+    onnx     exported graph from scripts/export_models.py run with ONNX Runtime
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend}', expected one of {BACKENDS}")
+
+    if backend == 'onnx':
+        return OnnxModel(onnx_path(model_id))
+
+    model = model_cls.from_pretrained(model_id)
+    model.to(device)
+    model.eval()
+
+    if backend == 'int8':
+        if device != 'cpu':
+            logger.warning("int8 backend is CPU only, using eager for %s on %s", model_id, device)
+            return model
+        return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    if backend == 'compile':
+        return torch.compile(model)
+    return model
@@ -0,0 +1,154 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from config import Config
+from metrics import registry
+from ml.registry import model_registry
+from ml.admission import forward_pass_slots
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64]
+QUEUE_WAIT_BUCKETS = [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0]
+
+
+class MicroBatcher:
+    """
+    Collects single-item requests from many threads and runs them through
+    one batched call.
+
+    Requests are grouped by key (e.g. image size + prompt), so every batch is
+    shape-compatible. A group is flushed when it reaches max_batch_size or
+    when its oldest request has waited max_wait_ms.
+
+    batch_fn(key, items) -> list of results, one per item, in order.
+    """
+
+    def __init__(self, name, batch_fn, max_batch_size, max_wait_ms):
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self._groups = OrderedDict()  # key -> [(item, future, enqueued_at)]
+        self._cond = threading.Condition()
+        self._thread = None
+
+        self.batch_size_hist = registry.histogram(
+            f"{name}_batch_size", f"Requests per {name} forward pass", BATCH_SIZE_BUCKETS
+        )
+        self.queue_wait_hist = registry.histogram(
+            f"{name}_queue_wait_seconds", f"Time a {name} request waited for its batch", QUEUE_WAIT_BUCKETS
+        )
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name=f"{self.name}-batcher", daemon=True)
+            self._thread.start()
+
+    def submit(self, key, item):
+        """Queue one item and return a Future for its result."""
+        future = Future()
+        with self._cond:
+            self._ensure_thread()
+            self._groups.setdefault(key, []).append((item, future, time.monotonic()))
+            self._cond.notify()
+        return future
+
+    def run(self, key, item):
+        """Blocking helper: submit and wait for the result."""
+        return self.submit(key, item).result()
+
+    def _next_batch(self):
+        # Called with the condition held. Picks the group whose oldest request
+        # is due (full or timed out) and pops up to max_batch_size of it.
+        while True:
+            if not self._groups:
+                self._cond.wait()
+                continue
+
+            now = time.monotonic()
+            earliest_deadline = None
+            for key, entries in self._groups.items():
+                deadline = entries[0][2] + self.max_wait
+                if len(entries) >= self.max_batch_size or deadline <= now:
+                    batch = entries[:self.max_batch_size]
+                    rest = entries[self.max_batch_size:]
+                    if rest:
+                        self._groups[key] = rest
+                    else:
+                        del self._groups[key]
+                    return key, batch
+                if earliest_deadline is None or deadline < earliest_deadline:
+                    earliest_deadline = deadline
+
+            self._cond.wait(timeout=max(0.0, earliest_deadline - now))
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                key, batch = self._next_batch()
+
+            # Requests cancelled while queued (their pipeline already failed) are dropped;
+            # the rest are marked running and can no longer be cancelled
+            batch = [entry for entry in batch if entry[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            started = time.monotonic()
+            self.batch_size_hist.observe(len(batch))
+            for _, _, enqueued_at in batch:
+                self.queue_wait_hist.observe(started - enqueued_at)
+
+            items = [item for item, _, _ in batch]
+            try:
+                # At most ML_INFERENCE_SLOTS forward passes at once across all batchers
+                with forward_pass_slots:
+                    results = self.batch_fn(key, items)
+                for (_, future, _), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                logger.exception("%s batch of %d failed", self.name, len(batch))
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+
+def _detect_batch(key, images):
+    _, prompt, threshold = key
+    return model_registry.get('grounding_dino').detect_batch(images, prompt=prompt, confidence_threshold=threshold)
+
+
+def _depth_batch(key, images):
+    quality, _ = key
+    return model_registry.get(f"depth:{quality}").estimate_depth_batch(images)
+
+
+detection_batcher = MicroBatcher(
+    'grounding_dino', _detect_batch,
+    max_batch_size=Config.BATCH_MAX_SIZE, max_wait_ms=Config.BATCH_MAX_WAIT_MS
+)
+depth_batcher = MicroBatcher(
+    'depth', _depth_batch,
+    max_batch_size=Config.BATCH_MAX_SIZE, max_wait_ms=Config.BATCH_MAX_WAIT_MS
+)
+
+
+def detect_async(pil_image, prompt=None, confidence_threshold=0.60):
+    # Images of the same resized shape and prompt share a forward pass
+    key = (pil_image.size, prompt, confidence_threshold)
+    return detection_batcher.submit(key, pil_image)
+
+
+def estimate_depth_async(pil_image, quality=None):
+    quality = quality or Config.DEFAULT_QUALITY
+    return depth_batcher.submit((quality, pil_image.size), pil_image)
+
+
+def detect(pil_image, prompt=None, confidence_threshold=0.60):
+    return detect_async(pil_image, prompt, confidence_threshold).result()
+
+
+def estimate_depth(pil_image, quality=None):
+    return estimate_depth_async(pil_image, quality).result()
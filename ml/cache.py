@@ -0,0 +1,125 @@
+import copy
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(pil_image):
+    # Hash of the decoded pixels, so re-encodes of the same photo still match
+    h = hashlib.sha256()
+    h.update(f"{pil_image.mode}:{pil_image.size}".encode('utf-8'))
+    h.update(pil_image.tobytes())
+    return h.hexdigest()
+
+
+def derive_key(*parts):
+    return hashlib.sha256("|".join(str(p) for p in parts).encode('utf-8')).hexdigest()
+
+
+def _without_derived_tables(value):
+    # The scene build has filled the depth map's summed-area table and pyramid
+    # (several times the map itself); copy.copy goes through
+    # DepthMap.__getstate__, so the cached copy shares values and drops them
+    depth_result = value.get('depth_result')
+    if not depth_result or depth_result.get('depth_map') is None:
+        return value
+    return dict(value, depth_result=dict(depth_result, depth_map=copy.copy(depth_result['depth_map'])))
+
+
+def _approx_size(value):
+    size = 64 * 1024  # detections + scene JSON, generous
+    depth_result = value.get('depth_result') or {}
+    depth_map = depth_result.get('depth_map')
+    if depth_map is not None:
+        size += depth_map.nbytes
+    return size
+
+
+class ResultCache:
+    """
+    Pipeline results keyed by derive_key(content hash, model ids, prompt, threshold,
+    scene depth settings).
+
+    Memory tier: LRU bounded by approximate bytes.
+    Disk tier (optional): one pickle per key under disk_dir, checked on a
+    memory miss and promoted back into memory on a hit.
+    """
+
+    def __init__(self, max_bytes, disk_dir=None):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                self._entries.move_to_end(key)
+                return entry[0]
+
+        value = self._read_disk(key)
+        if value is not None:
+            self._put_memory(key, value)
+        return value
+
+    def put(self, key, value):
+        value = _without_derived_tables(value)
+        self._put_memory(key, value)
+        self._write_disk(key, value)
+
+    def _put_memory(self, key, value):
+        size = _approx_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old:
+                self._bytes -= old[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key[:2], f"{key}.pkl")
+
+    def _read_disk(self, key):
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._disk_path(key), 'rb') as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning("Result cache read error: %s", e)
+            return None
+
+    def _write_disk(self, key, value):
+        if not self.disk_dir:
+            return
+        try:
+            path = self._disk_path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temp file first so readers never see a partial pickle
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning("Result cache write error: %s", e)
+
+
+result_cache = ResultCache(Config.RESULT_CACHE_MAX_BYTES, Config.RESULT_CACHE_DIR)
@@ -1,35 +1,79 @@
-import boto3
+import logging
+import os
+from boto3.s3.transfer import TransferConfig
 from botocore.exceptions import ClientError
+from clients import get_r2_client
 from config import Config
 from datetime import datetime
+from tracing import outbound
+
+logger = logging.getLogger(__name__)
 
 class CloudflareR2:
     
     def __init__(self):
-        self.s3_client = boto3.client(
-            's3',
-            endpoint_url=Config.R2_ENDPOINT_URL,  
-            aws_access_key_id=Config.R2_ACCESS_KEY_ID, 
-            aws_secret_access_key=Config.R2_SECRET_ACCESS_KEY,  
-            region_name='auto'  
-        )
         self.bucket_name = Config.R2_BUCKET_NAME  
+        # File-like uploads stream in parts above the threshold instead of one buffered body
+        self.transfer_config = TransferConfig(
+            multipart_threshold=Config.R2_MULTIPART_THRESHOLD,
+            multipart_chunksize=Config.R2_MULTIPART_CHUNKSIZE,
+            max_concurrency=Config.R2_MULTIPART_CONCURRENCY
+        )
+
+    @property
+    def s3_client(self):
+        # Shared pooled client, built on first use, not at import
+        return get_r2_client()
     
-    def upload_image(self, file_data, original_filename):
+    def _exists(self, s3_key):
         try:
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            s3_key = f"images/{timestamp}{original_filename}"
+            with outbound('r2', 'head'):
+                self.s3_client.head_object(Bucket=self.bucket_name, Key=s3_key)
+            return True
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+
+    def upload_image(self, file_data, original_filename, content_hash=None):
+        # file_data: bytes or a file-like object (streamed, multipart when large)
+        # With a content_hash the key is content-addressed, so identical images are stored once
+        try:
+            if content_hash:
+                extension = os.path.splitext(original_filename)[1]
+                s3_key = f"images/{content_hash}{extension}"
+                if self._exists(s3_key):
+                    logger.debug("Already in R2, skipping upload: %s", s3_key)
+                    return {
+                        'success': True,
+                        'url': f"{Config.R2_PUBLIC_BASE_URL}/{s3_key}",
+                        'key': s3_key,
+                        'filename': original_filename,
+                        'deduplicated': True
+                    }
+            else:
+                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+                s3_key = f"images/{timestamp}{original_filename}"
            
-            print(f"Uploading to R2: {s3_key}")
-            self.s3_client.put_object(
-                Bucket=self.bucket_name,
-                Key=s3_key,
-                Body=file_data,
-            )
+            logger.debug("Uploading to R2: %s", s3_key)
+            with outbound('r2', 'put'):
+                if hasattr(file_data, 'read'):
+                    self.s3_client.upload_fileobj(
+                        file_data,
+                        self.bucket_name,
+                        s3_key,
+                        Config=self.transfer_config
+                    )
+                else:
+                    self.s3_client.put_object(
+                        Bucket=self.bucket_name,
+                        Key=s3_key,
+                        Body=file_data,
+                    )
             
             image_url = f"{Config.R2_PUBLIC_BASE_URL}/{s3_key}"
             
-            print(f"Upload successful: {image_url}")
+            logger.debug("Upload successful: %s", image_url)
             
             return {
                 'success': True,
@@ -39,13 +83,13 @@ class CloudflareR2:
             }
             
         except ClientError as e:
-            print(f"R2 Upload Error: {e}")
+            logger.error("R2 upload error for %s: %s", original_filename, e)
             return {
                 'success': False,
                 'error': str(e)
             }
         except Exception as e:
-            print(f"Unexpected Error: {e}")
+            logger.exception("Unexpected error uploading %s to R2", original_filename)
             return {
                 'success': False,
                 'error': str(e) 
@@ -53,22 +97,23 @@ class CloudflareR2:
     
     def download_image(self, s3_key):
         try:
-            print(f"Downloading from R2: {s3_key}")
+            logger.debug("Downloading from R2: %s", s3_key)
             
-            response = self.s3_client.get_object(
-                Bucket=self.bucket_name,
-                Key=s3_key
-            )
-            image_data = response['Body'].read()
+            with outbound('r2', 'get'):
+                response = self.s3_client.get_object(
+                    Bucket=self.bucket_name,
+                    Key=s3_key
+                )
+                image_data = response['Body'].read()
             
-            print(f"Download successful: {len(image_data)} bytes")
+            logger.debug("Download successful: %d bytes", len(image_data))
             return image_data
             
         except ClientError as e:
-            print(f"R2 Download Error: {e}")
+            logger.error("R2 download error for %s: %s", s3_key, e)
             return None
-        except Exception as e:
-            print(f"Unexpected Error: {e}")
+        except Exception:
+            logger.exception("Unexpected error downloading %s from R2", s3_key)
             return None
        
 r2_service = CloudflareR2()
\ No newline at end of file
@@ -0,0 +1,176 @@
+import numpy as np
+from PIL import Image
+
+
+class DepthMap:
+    """
+    Depth kept at model output resolution (e.g. 384x384), addressed in pixel
+    coordinates of the image it was predicted for.
+
+    Consumers read only what they need: a few samples, region crops or stats.
+    Full-resolution upsampling happens only when upsample() is called.
+
+    Per-box statistics use a summed-area table (means) and a 2x mean-pooled
+    pyramid (medians), built once per map, so each box costs the same no
+    matter how large it is.
+    """
+
+    def __init__(self, values, image_size):
+        self.values = np.ascontiguousarray(values, dtype=np.float32)
+        self.image_size = tuple(image_size)  # (width, height)
+        map_height, map_width = self.values.shape
+        self.scale_x = map_width / self.image_size[0]
+        self.scale_y = map_height / self.image_size[1]
+        self._sat = None
+        self._levels = None
+
+    def __getstate__(self):
+        # Derived tables are rebuilt on demand, keep pickles (result cache) small
+        state = dict(self.__dict__)
+        state['_sat'] = None
+        state['_levels'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__dict__.setdefault('_sat', None)
+        self.__dict__.setdefault('_levels', None)
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes
+
+    def min(self):
+        return self.values.min()
+
+    def max(self):
+        return self.values.max()
+
+    def mean(self):
+        return self.values.mean()
+
+    def _map_index(self, xs, ys):
+        # Image pixel centre -> nearest map cell
+        map_height, map_width = self.values.shape
+        mx = np.clip(np.floor((np.asarray(xs) + 0.5) * self.scale_x).astype(np.intp), 0, map_width - 1)
+        my = np.clip(np.floor((np.asarray(ys) + 0.5) * self.scale_y).astype(np.intp), 0, map_height - 1)
+        return mx, my
+
+    def sample(self, xs, ys):
+        """Depth at image pixel(s) (x, y). Scalars in, scalar out; arrays in, array out."""
+        mx, my = self._map_index(xs, ys)
+        return self.values[my, mx]
+
+    def region(self, x0, y0, x1, y1):
+        """Map cells covering the image-space box [x0, x1) x [y0, y1), at least one cell."""
+        mx0, my0 = self._map_index(x0, y0)
+        mx1, my1 = self._map_index(max(x0, x1 - 1), max(y0, y1 - 1))
+        return self.values[my0:my1 + 1, mx0:mx1 + 1]
+
+    def upsample(self, size=None):
+        """Bicubic upsample to size (default: full image size). Allocates a full-res float map."""
+        size = size or self.image_size
+        resized = Image.fromarray(self.values, mode='F').resize(size, Image.BICUBIC)
+        return np.asarray(resized)
+
+    def visual_size(self):
+        """Image aspect ratio with the map's longer side: as much detail as the map has, not distorted"""
+        width, height = self.image_size
+        longest = max(self.values.shape)
+        scale = longest / max(width, height)
+        return max(1, round(width * scale)), max(1, round(height * scale))
+
+    def to_image(self, size=None):
+        """Grayscale visualization at visual_size() unless a size is given."""
+        depth_min = self.values.min()
+        depth_range = max(float(self.values.max() - depth_min), 1e-6)
+        depth_uint8 = ((self.values - depth_min) * (255.0 / depth_range)).astype(np.uint8)
+        image = Image.fromarray(depth_uint8, mode='L')
+        # The map is often square (e.g. 384x384 for DPT); stretch it back to the photo's shape
+        size = tuple(size or self.visual_size())
+        return image if size == image.size else image.resize(size, Image.BILINEAR)
+
+    def _box_cells(self, boxes):
+        # Image-space [x0, y0, x1, y1) boxes -> inclusive map cell ranges
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        mx0, my0 = self._map_index(boxes[:, 0], boxes[:, 1])
+        mx1, my1 = self._map_index(np.maximum(boxes[:, 0], boxes[:, 2] - 1), np.maximum(boxes[:, 1], boxes[:, 3] - 1))
+        return mx0, my0, np.maximum(mx0, mx1), np.maximum(my0, my1)
+
+    def _summed_area(self):
+        if self._sat is None:
+            sat = np.zeros((self.values.shape[0] + 1, self.values.shape[1] + 1), dtype=np.float64)
+            sat[1:, 1:] = self.values.cumsum(axis=0, dtype=np.float64).cumsum(axis=1)
+            self._sat = sat
+        return self._sat
+
+    def _pyramid(self):
+        if self._levels is None:
+            levels = [self.values]
+            while min(levels[-1].shape) > 1:
+                level = levels[-1]
+                # Repeat the last row/column on odd sizes so index // 2 stays valid
+                if level.shape[0] % 2:
+                    level = np.vstack([level, level[-1:]])
+                if level.shape[1] % 2:
+                    level = np.hstack([level, level[:, -1:]])
+                h, w = level.shape
+                levels.append(level.reshape(h // 2, 2, w // 2, 2).mean(axis=(1, 3)))
+            self._levels = levels
+        return self._levels
+
+    def region_means(self, boxes):
+        """Mean depth inside each image-space box, O(1) per box via the summed-area table."""
+        sat = self._summed_area()
+        mx0, my0, mx1, my1 = self._box_cells(boxes)
+        total = sat[my1 + 1, mx1 + 1] - sat[my0, mx1 + 1] - sat[my1 + 1, mx0] + sat[my0, mx0]
+        count = (mx1 - mx0 + 1) * (my1 - my0 + 1)
+        return (total / count).astype(np.float32)
+
+    def region_medians(self, boxes, max_cells=8):
+        """
+        Approximate median depth inside each box: the median over at most
+        max_cells x max_cells cells of the coarsest pyramid level that still
+        resolves the box.
+        """
+        levels = self._pyramid()
+        mx0, my0, mx1, my1 = self._box_cells(boxes)
+        span = np.maximum(mx1 - mx0, my1 - my0) + 1
+        level_index = np.zeros(len(span), dtype=np.intp)
+        large = span > max_cells
+        level_index[large] = np.ceil(np.log2(span[large] / max_cells)).astype(np.intp)
+        level_index = np.minimum(level_index, len(levels) - 1)
+
+        # Boxes on the same level are gathered into one (n, K*K) block, padded with NaN
+        offsets = np.arange(max_cells + 1)
+        medians = np.empty(len(span), dtype=np.float32)
+        for k in np.unique(level_index):
+            idx = np.nonzero(level_index == k)[0]
+            level = levels[k]
+            y0, y1 = my0[idx] >> k, my1[idx] >> k
+            x0, x1 = mx0[idx] >> k, mx1[idx] >> k
+            rows = y0[:, None] + offsets
+            cols = x0[:, None] + offsets
+            valid = (rows <= y1[:, None])[:, :, None] & (cols <= x1[:, None])[:, None, :]
+            cells = level[np.minimum(rows, level.shape[0] - 1)[:, :, None], np.minimum(cols, level.shape[1] - 1)[:, None, :]]
+            cells = np.where(valid, cells, np.nan).reshape(len(idx), -1)
+            medians[idx] = np.nanmedian(cells, axis=1)
+        return medians
+
+    def region_depths(self, boxes, stat='median', inset=0.2):
+        """
+        Robust depth per image-space box [x0, y0, x1, y1).
+
+        inset shrinks each box by that fraction of its width/height on every
+        side first, so edges (walls behind open frames, neighbouring objects)
+        are left out. stat is 'median' or 'mean'.
+        """
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        dx = (boxes[:, 2] - boxes[:, 0]) * inset
+        dy = (boxes[:, 3] - boxes[:, 1]) * inset
+        inner = np.stack([boxes[:, 0] + dx, boxes[:, 1] + dy, boxes[:, 2] - dx, boxes[:, 3] - dy], axis=1)
+        if stat == 'mean':
+            return self.region_means(inner)
+        if stat == 'median':
+            return self.region_medians(inner)
+        raise ValueError(f"Unknown depth statistic '{stat}'")
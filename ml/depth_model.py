@@ -1,32 +1,42 @@
+import logging
 import torch
-import numpy as np
-from PIL import Image
 from transformers import AutoImageProcessor, AutoModelForDepthEstimation
+from config import Config
+from ml.backends import load_model
+from ml.depth_map import DepthMap
+
+logger = logging.getLogger(__name__)
 
 class DepthEstimator:
-    def __init__(self):
+    def __init__(self, model_id=None, input_size=None, backend=None):
         try:
-            self.model_id = "Intel/dpt-large"
+            self.model_id = model_id or Config.DEPTH_MODEL_ID
+            self.backend = backend or Config.DEPTH_BACKEND
             self.processor = AutoImageProcessor.from_pretrained(self.model_id)
-            self.model = AutoModelForDepthEstimation.from_pretrained(self.model_id)
+            # Processor resize target (model input resolution); None keeps the model default
+            self.processor_kwargs = {'size': {'height': input_size, 'width': input_size}} if input_size else {}
             self.device = "cuda" if torch.cuda.is_available() else "cpu"
-            self.model.to(self.device)
-            self.model.eval() 
-        except Exception as e:
-            print(f"Error loading depth model: {e}")
+            self.model = load_model(AutoModelForDepthEstimation, self.model_id, self.backend, self.device)
+            logger.info("Depth model %s loaded (%s) on %s", self.model_id, self.backend, self.device)
+        except Exception:
+            logger.exception("Error loading depth model")
             self.model = None
             self.processor = None
     
     def estimate_depth(self, pil_image): #RGB image input
+        return self.estimate_depth_batch([pil_image])[0]
+
+    def estimate_depth_batch(self, pil_images):
+        # One forward pass for all images, returns a depth result per image
         if self.model is None:
-            print("Depth model not loaded")
-            return None
+            logger.warning("Depth model not loaded")
+            return [None for _ in pil_images]
         
         try:
-            print(f"Estimating depth for image size: {pil_image.size}")
+            logger.debug("Estimating depth for batch of %d", len(pil_images))
             
-            # Preprocess image
-            inputs = self.processor(images=pil_image, return_tensors="pt")
+            # Preprocess images (processor resizes each to the model input size)
+            inputs = self.processor(images=pil_images, return_tensors="pt", **self.processor_kwargs)
             inputs = {k: v.to(self.device) for k, v in inputs.items()}
             
             # Inference
@@ -34,39 +44,22 @@ class DepthEstimator:
                 outputs = self.model(**inputs)
                 predicted_depth = outputs.predicted_depth
             
-            # Post-process: interpolate to original size
-            prediction = torch.nn.functional.interpolate(
-                predicted_depth.unsqueeze(1),
-                size=pil_image.size[::-1],  # (height, width)
-                mode="bicubic",
-                align_corners=False,
-            )
-            
-            # Convert to numpy
-            depth_map = prediction.squeeze().cpu().numpy()
-            
-            # Normalize to 0-255 for visualization
-            depth_min = depth_map.min()
-            depth_max = depth_map.max() 
-            depth_normalized = (depth_map - depth_min) / (depth_max - depth_min)
-            depth_uint8 = (depth_normalized * 255).astype(np.uint8)
-            
-            # Create PIL image (grayscale)
-            depth_image = Image.fromarray(depth_uint8, mode='L')
-            
-            print(f"Depth estimated - range: [{depth_min:.2f}, {depth_max:.2f}]")
+            return [self._postprocess(predicted_depth[i], img) for i, img in enumerate(pil_images)]
             
-            return {
-                'depth_map': depth_map,  # Raw depth values
-                'depth_image': depth_image,  # Grayscale visualization
-                'min_depth': float(depth_min),
-                'max_depth': float(depth_max)
-            }
-            
-        except Exception as e:
-            print(f"Depth estimation error: {e}")
-            return None
-    
-
+        except Exception:
+            logger.exception("Depth estimation error")
+            return [None for _ in pil_images]
 
-depth_estimator = DepthEstimator()
+    def _postprocess(self, predicted_depth, pil_image):
+        # Kept at model resolution; DepthMap maps image pixel coords onto it
+        depth_map = DepthMap(predicted_depth.squeeze().cpu().numpy(), pil_image.size)
+        depth_min = depth_map.min()
+        depth_max = depth_map.max()
+        
+        logger.debug("Depth estimated - range: [%.2f, %.2f]", depth_min, depth_max)
+        
+        return {
+            'depth_map': depth_map,  # Raw depth values (DepthMap)
+            'min_depth': float(depth_min),
+            'max_depth': float(depth_max)
+        }
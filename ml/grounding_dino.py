@@ -1,39 +1,48 @@
+import logging
 from transformers import AutoProcessor, AutoModelForZeroShotObjectDetection
 import torch
 from PIL import Image
 from config import Config
+from ml.backends import load_model
+
+logger = logging.getLogger(__name__)
 
 class GroundingDINO:
     
-    def __init__(self):
+    def __init__(self, backend=None):
         try:
-            self.model_id = "IDEA-Research/grounding-dino-tiny"
+            self.model_id = Config.GROUNDING_DINO_MODEL_ID
+            self.backend = backend or Config.GROUNDING_DINO_BACKEND
             self.processor = AutoProcessor.from_pretrained(self.model_id)
-            self.model = AutoModelForZeroShotObjectDetection.from_pretrained(self.model_id)
             self.device = "cuda" if torch.cuda.is_available() else "cpu"
-            self.model.to(self.device)
-            print(f" Model loaded successfully on {self.device}") 
+            self.model = load_model(AutoModelForZeroShotObjectDetection, self.model_id, self.backend, self.device)
+            logger.info("Grounding DINO loaded (%s) on %s", self.backend, self.device)
             self.default_prompt = Config.FURNITURE_LIST
             
-        except Exception as e:
-            print(f"Error loading model: {e}")
+        except Exception:
+            logger.exception("Error loading Grounding DINO")
             self.model = None
             self.processor = None
     
     def detect(self, pil_image, prompt=None, confidence_threshold=0.60):
+        return self.detect_batch([pil_image], prompt, confidence_threshold)[0]
+
+    def detect_batch(self, pil_images, prompt=None, confidence_threshold=0.60):
+        # One forward pass for all images, returns a detections list per image
         if self.model is None:
-            print("Model not loaded")
-            return []
+            logger.warning("Grounding DINO not loaded")
+            return [[] for _ in pil_images]
         
         try:
             if prompt is None:
                 prompt = self.default_prompt
             
-            print("Detecting")
+            logger.debug("Detecting on batch of %d", len(pil_images))
         
             inputs = self.processor(
-                images=pil_image,
-                text=prompt,
+                images=pil_images,
+                text=[prompt] * len(pil_images),
+                padding=True,
                 return_tensors="pt"
             )
             inputs = {k: v.to(self.device) for k, v in inputs.items()}
@@ -42,48 +51,49 @@ class GroundingDINO:
             results = self.processor.post_process_grounded_object_detection(
                 outputs,
                 inputs["input_ids"],
-                target_sizes=[pil_image.size[::-1]],  
+                target_sizes=[img.size[::-1] for img in pil_images],
                 threshold=confidence_threshold
-            )[0]
-            detections = []
-            img_width, img_height = pil_image.size
+            )
+            return [self._to_detections(result, img.size) for result, img in zip(results, pil_images)]
             
-            for score, label, box in zip(
-                results["scores"],
-                results["labels"],
-                results["boxes"]
-            ):
-                x1, y1, x2, y2 = box.cpu().numpy()
-                width = x2 - x1
-                height = y2 - y1
-                normalized_bbox = {
-                    'x': float(x1 / img_width),
-                    'y': float(y1 / img_height),
-                    'width': float(width / img_width),
-                    'height': float(height / img_height)
-                }
-                absolute_bbox = {
-                    'x': float(x1),
-                    'y': float(y1),
-                    'width': float(width),
-                    'height': float(height)
-                }
-                detection = {
-                    'label': label,
-                    'confidence': float(score.cpu().numpy()),
-                    'bbox_normalized': normalized_bbox,
-                    'bbox_absolute': absolute_bbox
-                }
+        except Exception:
+            logger.exception("Detection error")
+            return [[] for _ in pil_images]
+
+    def _to_detections(self, results, image_size):
+        detections = []
+        img_width, img_height = image_size
+        
+        for score, label, box in zip(
+            results["scores"],
+            results["labels"],
+            results["boxes"]
+        ):
+            x1, y1, x2, y2 = box.cpu().numpy()
+            width = x2 - x1
+            height = y2 - y1
+            normalized_bbox = {
+                'x': float(x1 / img_width),
+                'y': float(y1 / img_height),
+                'width': float(width / img_width),
+                'height': float(height / img_height)
+            }
+            absolute_bbox = {
+                'x': float(x1),
+                'y': float(y1),
+                'width': float(width),
+                'height': float(height)
+            }
+            detection = {
+                'label': label,
+                'confidence': float(score.cpu().numpy()),
+                'bbox_normalized': normalized_bbox,
+                'bbox_absolute': absolute_bbox
+            }
             if detection['label'] in Config.FURNITURE_LIST:    
                 detections.append(detection)         
-                print(f"Detected {len(detections)} objects")
-                
-            detections.sort(key=lambda x: x['confidence'], reverse=True)
-            
-            return detections
-            
-        except Exception as e:
-            print(f"Detection error: {e}")
-            return []
-    
-grounding_dino = GroundingDINO()
+        
+        logger.debug("Detected %d objects", len(detections))
+        detections.sort(key=lambda x: x['confidence'], reverse=True)
+        
+        return detections
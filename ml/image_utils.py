@@ -1,6 +1,9 @@
+import logging
 from PIL import Image
 from io import BytesIO
 
+logger = logging.getLogger(__name__)
+
 class ImageProcessor:
     @staticmethod
     def bytes_to_pil(image_bytes):
@@ -9,57 +12,74 @@ class ImageProcessor:
             image = image.convert('RGB')
             return image
         except Exception as e:
-            print(f"Error converting bytes to PIL: {e}")
+            logger.warning("Error converting bytes to PIL: %s", e)
             return None
         
+    @staticmethod
+    def target_size(size, max_size=1024):
+        width, height = size
+        if width <= max_size and height <= max_size:
+            return width, height
+        if width > height:
+            return max_size, int((max_size / width) * height) # (aspect ratio maintain code)
+        return int((max_size / height) * width), max_size
+
     @staticmethod
     def resize_image(pil_image, max_size=1024):
         try:
             width, height = pil_image.size # (returns tuple)
             
-            print(f"Original size: {width}x{height}")
-            if width <= max_size and height <= max_size:
-                print(f"Image size OK, no resize needed")
+            logger.debug("Original size: %dx%d", width, height)
+            new_width, new_height = ImageProcessor.target_size(pil_image.size, max_size)
+            if (new_width, new_height) == (width, height):
+                logger.debug("Image size OK, no resize needed")
                 return pil_image
-            if width > height:
-                new_width = max_size # (aspect ratio maintain code)
-                new_height = int((max_size / width) * height)
-            else:
-                new_height = max_size
-                new_width = int((max_size / height) * width)
             
             resized = pil_image.resize((new_width, new_height), Image.LANCZOS)
             
-            print(f"Resized to: {new_width}x{new_height}")
+            logger.debug("Resized to: %dx%d", new_width, new_height)
             
             return resized
             
         except Exception as e:
-            print(f"Error resizing image: {e}")
+            logger.warning("Error resizing image: %s", e)
             return pil_image
+
+    @staticmethod
+    def decode(image, max_size=1024):
+        """
+        Decode an opened (header-only) PIL image straight to RGB at most max_size.
+
+        JPEGs use draft mode: libjpeg scales by 1/2, 1/4 or 1/8 while decoding
+        (never below the target), so a 12MP photo is never materialized at full
+        resolution. The remaining resize uses reducing_gap for a cheap first pass.
+        """
+        target = ImageProcessor.target_size(image.size, max_size)
+        if image.format == 'JPEG':
+            image.draft('RGB', target)
+        image = image.convert('RGB')
+        if image.size != target:
+            image = image.resize(target, Image.LANCZOS, reducing_gap=3.0)
+        return image
     
     @staticmethod
     def preprocess_for_detection(image_bytes, resize=True):
         try:
-            # Step 1: Bytes to PIL
-            pil_image = ImageProcessor.bytes_to_pil(image_bytes)
-            if pil_image is None:
-                return None
-            
-            original_size = pil_image.size
+            image = Image.open(BytesIO(image_bytes))
+            original_size = image.size
             
-            # Step 2: Resize
+            # Single decode (+ resize) of the upload
             if resize:
-                pil_image = ImageProcessor.resize_image(pil_image)
-            
-            processed_size = pil_image.size
+                pil_image = ImageProcessor.decode(image)
+            else:
+                pil_image = image.convert('RGB')
             
             return {
                 'pil_image': pil_image,
                 'original_size': original_size,
-                'processed_size': processed_size
+                'processed_size': pil_image.size
             }
             
         except Exception as e:
-            print(f"Preprocessing failed: {e}")
+            logger.warning("Preprocessing failed: %s", e)
             return None
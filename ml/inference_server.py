@@ -0,0 +1,163 @@
+"""
+Local inference process that owns the model weights.
+
+Flask workers started with ML_MODEL_SHARING=server get RemoteModel proxies from
+the model registry and send images over a Unix socket, so the weights exist
+once per host instead of once per worker. Requests from all workers go
+through this process's micro-batchers, so they can share forward passes.
+
+Run (INFERENCE_AUTHKEY must be set to the same secret for the server and the workers):
+    python -m ml.inference_server
+
+Messages are pickles, so the socket is protected twice: it is created 0600
+inside a directory only this user can enter, and both ends authenticate
+with INFERENCE_AUTHKEY (no default) before anything is unpickled.
+"""
+import logging
+import os
+import stat
+import threading
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener, Client
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+METHODS = ('detect_batch', 'estimate_depth_batch')
+
+
+def _authkey(value):
+    if not value:
+        raise RuntimeError("INFERENCE_AUTHKEY must be set to a secret to use the inference server")
+    return value.encode('utf-8')
+
+
+def _private_socket_dir(address):
+    # Created 0700 if missing; an existing directory must be ours and closed to everyone else
+    directory = os.path.dirname(os.path.abspath(address))
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    info = os.stat(directory)
+    if info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise RuntimeError(f"Inference socket directory {directory} must be owned by this user with mode 0700")
+
+
+class RemoteModel:
+    """Stand-in for GroundingDINO / DepthEstimator that forwards calls to the inference server."""
+
+    def __init__(self, name, address=None, authkey=None):
+        self.name = name
+        self.address = address or Config.INFERENCE_SOCKET
+        self.authkey = _authkey(authkey or Config.INFERENCE_AUTHKEY)
+        # Connections are not thread safe, so each thread gets its own
+        self._local = threading.local()
+        self._call('ping')
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = Client(self.address, family='AF_UNIX', authkey=self.authkey)
+            self._local.conn = conn
+        return conn
+
+    def _call(self, method, *args, **kwargs):
+        conn = self._connection()
+        try:
+            conn.send((self.name, method, args, kwargs))
+            ok, value = conn.recv()
+        except (EOFError, OSError):
+            # Server restarted; drop the stale connection so the next call reconnects
+            self._local.conn = None
+            raise
+        if not ok:
+            raise RuntimeError(f"Inference server error: {value}")
+        return value
+
+    def detect_batch(self, pil_images, prompt=None, confidence_threshold=0.60):
+        return self._call('detect_batch', pil_images, prompt=prompt, confidence_threshold=confidence_threshold)
+
+    def estimate_depth_batch(self, pil_images):
+        return self._call('estimate_depth_batch', pil_images)
+
+
+class InferenceServer:
+    def __init__(self, address, authkey):
+        self.address = address
+        self.authkey = _authkey(authkey)
+
+    def _run(self, name, method, args, kwargs):
+        from ml import batching
+
+        if method == 'ping':
+            return True
+        if method not in METHODS:
+            raise ValueError(f"Unknown method {method}")
+
+        # Fan each image into the local batchers so concurrent workers share batches
+        images = args[0]
+        if method == 'detect_batch':
+            futures = [
+                batching.detection_batcher.submit(
+                    (img.size, kwargs.get('prompt'), kwargs.get('confidence_threshold')), img
+                )
+                for img in images
+            ]
+        else:
+            quality = name.split(':', 1)[1]
+            futures = [batching.depth_batcher.submit((quality, img.size), img) for img in images]
+        return [future.result() for future in futures]
+
+    def _handle(self, conn):
+        try:
+            while True:
+                name, method, args, kwargs = conn.recv()
+                try:
+                    conn.send((True, self._run(name, method, args, kwargs)))
+                except Exception as e:
+                    conn.send((False, str(e)))
+        except EOFError:
+            pass
+        finally:
+            conn.close()
+
+    def serve_forever(self):
+        _private_socket_dir(self.address)
+        if os.path.lexists(self.address):
+            if not stat.S_ISSOCK(os.lstat(self.address).st_mode):
+                raise RuntimeError(f"{self.address} exists and is not a socket")
+            os.unlink(self.address)
+        # umask closes the window between bind and chmod
+        old_umask = os.umask(0o177)
+        try:
+            listener = Listener(self.address, family='AF_UNIX', authkey=self.authkey)
+        finally:
+            os.umask(old_umask)
+        os.chmod(self.address, 0o600)
+        logger.info("Inference server listening on %s", self.address)
+        while True:
+            try:
+                conn = listener.accept()
+            except (AuthenticationError, EOFError, OSError) as e:
+                # A client with the wrong key (or one that hung up) must not stop the server
+                logger.warning("Rejected inference connection: %s", e)
+                continue
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+
+def main():
+    from logging_config import configure_logging
+    from ml.admission import configure_torch_threads
+    from ml.registry import model_registry
+
+    configure_logging()
+    # The only process running models on this host: all the cores go to its slots
+    configure_torch_threads(processes=1)
+    # This process owns the weights, so its registry must load models locally
+    Config.ML_MODEL_SHARING = 'none'
+    model_registry.warmup(background=False)
+    logger.info("Models: %s", model_registry.status())
+
+    InferenceServer(Config.INFERENCE_SOCKET, Config.INFERENCE_AUTHKEY).serve_forever()
+
+
+if __name__ == '__main__':
+    main()
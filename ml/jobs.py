@@ -0,0 +1,207 @@
+import logging
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from config import Config
+from ml.supabase import JobDB
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class InProcessJobBackend:
+    """
+    Job queue that runs pipeline jobs on a bounded pool of worker threads
+    inside the current process.
+
+    Records live in this process; with a store (JobDB) every status change is
+    also mirrored there, so get() finds jobs that another worker accepted
+    (as a record with result None: the caller loads the project instead).
+    Store writes go through one publisher thread, in order, so neither the
+    request that submits a job nor the job workers wait on them; the same
+    thread deletes store rows older than retention_hours about once an hour.
+
+    Job record:
+        {
+            "id": str,
+            "status": "queued" | "running" | "completed" | "failed",
+            "stage": str | None,      # last on_stage milestone (inference_started, project_created,
+                                      # scene_built, ...), 'done' once completed
+            "project_id": int | None,
+            "result": dict | None,
+            "error": str | None,
+            "created_at" / "started_at" / "finished_at": float | None
+        }
+    """
+
+    def __init__(self, num_workers, max_queued, max_finished=1000, store=None, retention_hours=0):
+        self.num_workers = num_workers
+        self.store = store
+        self.retention_hours = retention_hours
+        self._outbox = queue.Queue()  # job snapshots waiting for the store
+        self.max_finished = max_finished
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._workers = []
+
+    def _ensure_workers(self):
+        # Workers start on first submit so importing this module stays cheap
+        with self._lock:
+            if self._workers:
+                return
+            for i in range(self.num_workers):
+                worker = threading.Thread(target=self._worker_loop, name=f"ml-job-{i}", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+            if self.store is not None:
+                publisher = threading.Thread(target=self._publisher_loop, name="ml-job-publisher", daemon=True)
+                publisher.start()
+                self._workers.append(publisher)
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Queue fn(*args, on_stage=..., **kwargs) and return the job id.
+        fn must return (result, error) like run_room_pipeline.
+        Raises JobQueueFull when the backlog is at capacity.
+        """
+        return self._submit(fn, args, kwargs)
+
+    def submit_streaming(self, fn, *args, **kwargs):
+        """
+        Like submit, but also returns a queue that receives (stage, payload)
+        for every on_stage call, then ('completed', result) or ('failed', error).
+        """
+        events = queue.Queue()
+        return self._submit(fn, args, kwargs, events), events
+
+    def _submit(self, fn, args, kwargs, events=None):
+        self._ensure_workers()
+
+        job_id = uuid.uuid4().hex
+        job = {
+            'id': job_id,
+            'status': 'queued',
+            'stage': None,
+            'project_id': None,
+            'result': None,
+            'error': None,
+            'created_at': time.time(),
+            'started_at': None,
+            'finished_at': None
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+
+        try:
+            self._queue.put_nowait((job_id, fn, args, kwargs, events))
+        except queue.Full:
+            with self._lock:
+                self._jobs.pop(job_id, None)
+            raise JobQueueFull("Too many jobs queued, try again later")
+
+        self._publish(job_id)
+        return job_id
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job:
+                return dict(job)
+        if self.store is None:
+            return None
+        try:
+            row = self.store.get(job_id)
+        except Exception as e:
+            logger.warning("Job store read failed for %s: %s", job_id, e)
+            return None
+        return dict(row, result=None) if row else None
+
+    def _publish(self, job_id):
+        if self.store is not None:
+            self._outbox.put(self.get(job_id))
+
+    def _publisher_loop(self):
+        # Best effort: the local record stays authoritative for this worker's own polls
+        pruned_at = None
+        while True:
+            try:
+                job = self._outbox.get(timeout=60)
+            except queue.Empty:
+                job = None
+            if job:
+                try:
+                    self.store.save(job)
+                except Exception as e:
+                    logger.warning("Job store write failed for %s: %s", job['id'], e)
+
+            if self.retention_hours and (pruned_at is None or time.monotonic() - pruned_at > 3600):
+                pruned_at = time.monotonic()
+                try:
+                    self.store.delete_older_than(self.retention_hours)
+                except Exception as e:
+                    logger.warning("Job store cleanup failed: %s", e)
+
+    def queued_count(self):
+        return self._queue.qsize()
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job:
+                job.update(fields)
+
+    def _evict_finished(self):
+        # Keep only the most recent finished jobs so memory stays bounded
+        with self._lock:
+            finished = [jid for jid, job in self._jobs.items()
+                        if job['status'] in ('completed', 'failed')]
+            for jid in finished[:max(0, len(finished) - self.max_finished)]:
+                del self._jobs[jid]
+
+    def _worker_loop(self):
+        while True:
+            job_id, fn, args, kwargs, events = self._queue.get()
+            self._update(job_id, status='running', started_at=time.time())
+            self._publish(job_id)
+            notify = events.put if events else (lambda event: None)
+
+            def on_stage(stage, payload=None):
+                fields = {'stage': stage}
+                if stage == 'project_created' and payload:
+                    fields['project_id'] = payload.get('project_id')
+                self._update(job_id, **fields)
+                if 'project_id' in fields:
+                    self._publish(job_id)
+                notify((stage, payload))
+
+            try:
+                result, error = fn(*args, on_stage=on_stage, **kwargs)
+                if error:
+                    self._update(job_id, status='failed', error=error)
+                    notify(('failed', error))
+                else:
+                    self._update(job_id, status='completed', stage='done', result=result)
+                    notify(('completed', result))
+            except Exception as e:
+                logger.exception("Job %s failed", job_id)
+                self._update(job_id, status='failed', error=str(e))
+                notify(('failed', str(e)))
+            finally:
+                self._update(job_id, finished_at=time.time())
+                self._publish(job_id)
+                self._queue.task_done()
+                self._evict_finished()
+
+
+job_queue = InProcessJobBackend(
+    num_workers=Config.ML_JOB_WORKERS,
+    max_queued=Config.ML_JOB_QUEUE_SIZE,
+    store=JobDB,
+    retention_hours=Config.ML_JOB_RETENTION_HOURS
+)
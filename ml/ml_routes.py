@@ -1,89 +1,472 @@
-from flask import Blueprint, app, request, jsonify
-from ml.utils import get_uploaded_file
-from ml.supabase import ProjectDB, DetectionDB, RoomDimensionsDB
-from ml.pipeline import run_room_pipeline
+import gzip
+import json
+import logging
+import queue
+from functools import wraps
+from flask import Blueprint, app, request, jsonify, Response, g
+from ml.utils import get_uploaded_file, spool_upload
+from ml.supabase import ProjectDB, PROJECT_FIELDS, PROJECT_STATUSES
+from ml.pipeline import run_room_pipeline, run_batch_pipeline
+from ml.scene_codec import encode_scene, MIMETYPE as SCENE_MIMETYPE
+from ml.assets import asset_bundler, with_assets, MIMETYPE as ASSETS_MIMETYPE
+from ml.jobs import job_queue, JobQueueFull
+from ml.admission import inference_admission, AdmissionRejected
+from ml.registry import model_registry
+from config import Config
 
 ml_bp = Blueprint('ml', __name__, url_prefix='/api/ml')
+logger = logging.getLogger(__name__)
+
+def admitted(view):
+    """
+    Admission control for pipeline endpoints: reserve a wait-queue place
+    before reading the upload, 503 + Retry-After when the queue is full.
+    The view hands g.admission_ticket to the job and clears it; otherwise
+    it is released here.
+    """
+    @wraps(view)
+    def decorated(*args, **kwargs):
+        try:
+            g.admission_ticket = inference_admission.admit()
+        except AdmissionRejected as e:
+            response = jsonify({'success': False, 'error': str(e)})
+            response.headers['Retry-After'] = str(e.retry_after)
+            return response, 503
+        try:
+            return view(*args, **kwargs)
+        finally:
+            ticket = g.pop('admission_ticket', None)
+            if ticket: ticket.release()
+    return decorated
+
+def _read_process_request():
+    """Form fields + spooled upload shared by /process and /process/stream"""
+    # Request data lena
+    file, error = get_uploaded_file(request)
+    if error: return None, (jsonify({'success': False, 'error': error}), 400)
+    
+    user_id = request.form.get('user_id', 'default')
+    project_name = request.form.get('project_name', 'My Room')
+    quality = request.form.get('quality', Config.DEFAULT_QUALITY)
+    if quality not in Config.DEPTH_TIERS:
+        return None, (jsonify({'success': False, 'error': f"quality must be one of {list(Config.DEPTH_TIERS)}"}), 400)
+
+    # Chunks mein spool, size limit + hash saath mein
+    upload, error = spool_upload(file)
+    if error: return None, (jsonify({'success': False, 'error': error}), 413)
+
+    return (upload, user_id, project_name, quality), None
 
 @ml_bp.route('/process', methods=['POST'])
+@admitted
 def process_complete():
     try:
-        # Request data lena
-        file, error = get_uploaded_file(request)
-        if error: return jsonify({'success': False, 'error': error}), 400
-        
+        fields, error_response = _read_process_request()
+        if error_response: return error_response
+        upload, user_id, project_name, quality = fields
+
+        # Pipeline worker pool pe chalegi, client job status poll karega
+        try:
+            job_id = job_queue.submit(run_room_pipeline, upload, user_id, project_name, quality=quality,
+                                      ticket=g.admission_ticket)
+            g.admission_ticket = None  # the job releases it
+        except JobQueueFull:
+            upload.close()
+            raise
+
+        return jsonify({
+            'success': True,
+            'job_id': job_id,
+            'status': 'queued',
+            'quality': quality,
+            'status_url': f"{ml_bp.url_prefix}/jobs/{job_id}"
+        }), 202
+
+    except JobQueueFull as e:
+        return jsonify({'success': False, 'error': str(e)}), 503
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@ml_bp.route('/process/batch', methods=['POST'])
+@admitted
+def process_batch():
+    """
+    Several photos under one project (form field "files", repeated), run
+    with one ingestion pass and batched inference. Returns 202 + job_id like
+    /process; the finished job has one scene per image plus aggregate stats.
+    """
+    uploads = []
+    try:
+        # Per-request body limit: up to BATCH_MAX_IMAGES files of MAX_UPLOAD_BYTES each
+        request.max_content_length = Config.MAX_UPLOAD_BYTES * Config.BATCH_MAX_IMAGES + 1024 * 1024
+
+        files = [f for f in request.files.getlist('files') if f.filename]
+        if not files:
+            return jsonify({'success': False, 'error': 'No files provided. Please send files with key "files"'}), 400
+        if len(files) > Config.BATCH_MAX_IMAGES:
+            return jsonify({'success': False, 'error': f"At most {Config.BATCH_MAX_IMAGES} images per batch"}), 400
+
         user_id = request.form.get('user_id', 'default')
-        project_name = request.form.get('project_name', 'My Room')
+        project_name = request.form.get('project_name', 'My Apartment')
+        quality = request.form.get('quality', Config.DEFAULT_QUALITY)
+        if quality not in Config.DEPTH_TIERS:
+            return jsonify({'success': False, 'error': f"quality must be one of {list(Config.DEPTH_TIERS)}"}), 400
 
-        # Service ko call karna (Pura kaam yahan ho raha hai)
-        result, error = run_room_pipeline(file.read(), user_id, project_name)
-        
-        if error:
-            return jsonify({'success': False, 'error': error}), 400
+        for index, file in enumerate(files):
+            upload, error = spool_upload(file)
+            if error:
+                return jsonify({'success': False, 'error': f"Image {index + 1}: {error}"}), 413
+            uploads.append(upload)
+
+        job_id = job_queue.submit(run_batch_pipeline, uploads, user_id, project_name, quality=quality,
+                                  ticket=g.admission_ticket)
+        uploads = []  # the job owns them now, and the ticket
+        g.admission_ticket = None
 
         return jsonify({
             'success': True,
-            'project_id': result['project_id'],
-            'scene': result['scene'],
-            'stats': {
-                'furniture_count': len(result['detections']),
-                'room_dimensions': result['scene']['room']['dimensions']
-            }
-        }), 200
+            'job_id': job_id,
+            'status': 'queued',
+            'images': len(files),
+            'quality': quality,
+            'status_url': f"{ml_bp.url_prefix}/jobs/{job_id}"
+        }), 202
 
+    except JobQueueFull as e:
+        return jsonify({'success': False, 'error': str(e)}), 503
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
+    finally:
+        for upload in uploads:
+            upload.close()
+
+def _sse(event, data):
+    # numpy scalars (depth stats, confidences) -> plain numbers
+    body = json.dumps(data, default=lambda value: value.item() if hasattr(value, 'item') else str(value))
+    return f"event: {event}\ndata: {body}\n\n"
+
+@ml_bp.route('/process/stream', methods=['POST'])
+@admitted
+def process_stream():
+    """
+    Same input as /process, but the response is a text/event-stream that
+    reports each stage as soon as it completes (read it with fetch + a
+    stream reader; EventSource cannot POST):
+
+        accepted   {"job_id", "quality", "status_url"}
+        project    {"project_id"}
+        detections {"detections": [...]}
+        depth      {"min_depth", "max_depth"}
+        scene      {"scene": {...}}          # coarse scene, before anything is persisted
+        persisted  {"project_id"}
+        done       {"project_id", "timings", "cache_hit", "quality"}
+        error      {"error"}
+
+    The job runs on the same queue as /process, so it can still be polled
+    at status_url if the stream drops. Unlike /process, the response holds a
+    gunicorn thread until the pipeline finishes (threads x workers streams
+    block everything else), so clients use it only when opted in.
+    """
+    try:
+        fields, error_response = _read_process_request()
+        if error_response: return error_response
+        upload, user_id, project_name, quality = fields
+
+        try:
+            job_id, events = job_queue.submit_streaming(
+                run_room_pipeline, upload, user_id, project_name, quality=quality, ticket=g.admission_ticket
+            )
+            g.admission_ticket = None
+        except JobQueueFull:
+            upload.close()
+            raise
+
+    except JobQueueFull as e:
+        return jsonify({'success': False, 'error': str(e)}), 503
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+    def stream():
+        yield _sse('accepted', {
+            'job_id': job_id,
+            'quality': quality,
+            'status_url': f"{ml_bp.url_prefix}/jobs/{job_id}"
+        })
+        while True:
+            try:
+                stage, payload = events.get(timeout=Config.SSE_KEEPALIVE_SECONDS)
+            except queue.Empty:
+                # Comment line keeps proxies from closing an idle stream during inference
+                yield ": keepalive\n\n"
+                continue
+
+            if stage == 'project_created':
+                yield _sse('project', payload)
+            elif stage == 'detected':
+                yield _sse('detections', payload)
+            elif stage == 'depth_estimated':
+                yield _sse('depth', payload)
+            elif stage == 'scene_built':
+                yield _sse('scene', {'scene': with_assets(payload['scene'])})
+            elif stage == 'persisted':
+                yield _sse('persisted', payload)
+            elif stage == 'completed':
+                yield _sse('done', {
+                    'project_id': payload['project_id'],
+                    'timings': payload['timings'],
+                    'cache_hit': payload['cache_hit'],
+                    'quality': payload['quality']
+                })
+                return
+            elif stage == 'failed':
+                yield _sse('error', {'error': payload})
+                return
+
+    return Response(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # nginx: flush each event instead of buffering the response
+    })
+
+@ml_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Poll a processing job
+
+    Response:
+        {
+            "success": true,
+            "job_id": "...",
+            "status": "queued" | "running" | "completed" | "failed",
+            "stage": "project_created",   # last milestone: cache_hit | inference_started | project_created |
+                                          # detected | depth_estimated | scene_built | persisted, then "done"
+            "project_id": 12,
+            "scene": {...},        # once completed, with scene.assets -> mesh bundle URL
+            "images": [...],       # instead of scene, for /process/batch jobs
+            "stats": {...},        # once completed
+            "timings": {...},      # per-stage ms, once completed
+            "quality": "high",     # depth tier that ran, once completed
+            "error": "..."         # once failed
+        }
+
+    A job accepted by another worker comes from the shared job store; once
+    completed its scene is read from the project (no timings, cache_hit or quality).
+    """
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+
+    response = {
+        'success': True,
+        'job_id': job['id'],
+        'status': job['status'],
+        'stage': job['stage'],
+        'project_id': job['project_id']
+    }
+
+    if job['status'] == 'completed' and job['result'] is None:
+        # Finished on another worker: the pipeline persisted everything to the project
+        project = ProjectDB.get_full(job['project_id'], ('project', 'detections', 'scene'))
+        if not project or project['scene'] is None:
+            return jsonify({'success': False, 'error': 'Project not found'}), 404
+        detections = project['detections'] or []
+        if project['scenes'] is not None:
+            response['images'] = [
+                {
+                    'index': index,
+                    'furniture_count': sum(1 for det in detections if det.get('image_index') == index),
+                    'scene': with_assets(scene)
+                }
+                for index, scene in enumerate(project['scenes'])
+            ]
+        else:
+            response['scene'] = with_assets(project['scene'])
+            response['stats'] = {
+                'furniture_count': len(detections),
+                'room_dimensions': project['scene']['room']['dimensions']
+            }
+    elif job['status'] == 'completed' and 'images' in job['result']:
+        # /process/batch: one scene per image
+        result = job['result']
+        response['project_id'] = result['project_id']
+        response['images'] = [
+            {
+                'index': image['index'],
+                'image_url': image['image_url'],
+                'furniture_count': len(image['detections']),
+                'scene': with_assets(image['scene']),
+                'cache_hit': image['cache_hit']
+            }
+            for image in result['images']
+        ]
+        response['stats'] = result['stats']
+        response['timings'] = result['timings']
+        response['quality'] = result['quality']
+    elif job['status'] == 'completed':
+        result = job['result']
+        response['project_id'] = result['project_id']
+        response['scene'] = with_assets(result['scene'])
+        response['stats'] = {
+            'furniture_count': len(result['detections']),
+            'room_dimensions': result['scene']['room']['dimensions']
+        }
+        response['timings'] = result['timings']
+        response['cache_hit'] = result['cache_hit']
+        response['quality'] = result['quality']
+    elif job['status'] == 'failed':
+        response['error'] = job['error']
+
+    return jsonify(response), 200
+
+@ml_bp.route('/ready', methods=['GET'])
+def ready():
+    """Readiness check: 200 once every model is loaded, 503 while any is still loading"""
+    return jsonify({
+        'ready': model_registry.is_ready(),
+        'models': model_registry.status()
+    }), 200 if model_registry.is_ready() else 503
 
 @ml_bp.route('/project/<project_id>', methods=['GET'])
 def get_project(project_id):
     """
-    Get complete project data
+    Get complete project data in one query
+
+    Query params:
+        fields: comma separated subset of project, detections, scene,
+                scene.room, scene.furniture, scene.lighting, scene.camera
+                (default: project,detections,scene)
     
     Response:
         {
             "success": true,
             "project": {...},
-            "detections": [...],
-            "scene": {...}
+            "detections": [...],   # with image_index for multi-image projects
+            "scene": {...},        # the first photo's scene
+            "scenes": [...]        # multi-image projects only: every photo's scene, by image_index
         }
     """
     try:
-        # Fetch project
-        project = ProjectDB.get(project_id)
-        if not project:
+        fields = [f.strip() for f in request.args.get('fields', 'project,detections,scene').split(',') if f.strip()]
+        unknown = [f for f in fields if f not in PROJECT_FIELDS]
+        if unknown:
+            return jsonify({
+                'success': False,
+                'error': f"Unknown fields: {', '.join(unknown)}. Choose from: {', '.join(PROJECT_FIELDS)}"
+            }), 400
+
+        data = ProjectDB.get_full(project_id, fields)
+        if not data:
             return jsonify({'success': False, 'error': 'Project not found'}), 404
         
-        # Fetch detections
-        detections = DetectionDB.get_by_project(project_id)
+        response = {'success': True, 'project': data['project']}
+        if 'detections' in fields:
+            response['detections'] = data['detections']
+        if any(f.startswith('scene') for f in fields):
+            response['scene'] = with_assets(data['scene'])
+            if data['scenes'] is not None:
+                response['scenes'] = [with_assets(scene) for scene in data['scenes']]
+        return jsonify(response), 200
         
-        # Fetch scene data
-        room_data = RoomDimensionsDB.get_by_project(project_id)
-        
-        return jsonify({
-            'success': True,
-            'project': project,
-            'detections': detections,
-            'scene': room_data['scene_data'] if room_data else None
-        }), 200
+    except Exception as e:
+        logger.exception("Error fetching project %s", project_id)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@ml_bp.route('/project/<project_id>/scene', methods=['GET'])
+def get_project_scene(project_id):
+    """
+    Scene only, as JSON or, with Accept: application/x-roomview3d-scene,
+    in the compact binary encoding (ml/scene_codec.py).
+    ?image=<index> picks a photo of a multi-image project (default the first).
+    """
+    try:
+        image = request.args.get('image', 0, type=int)
+        data = ProjectDB.get_full(project_id, ('scene',))
+        scenes = (data['scenes'] or [data['scene']]) if data else []
+        if not 0 <= image < len(scenes) or scenes[image] is None:
+            return jsonify({'success': False, 'error': 'Scene not found'}), 404
+
+        scene = with_assets(scenes[image])
+        if request.accept_mimetypes.best_match(['application/json', SCENE_MIMETYPE]) == SCENE_MIMETYPE:
+            response = Response(encode_scene(scene), mimetype=SCENE_MIMETYPE)
+        else:
+            response = jsonify({'success': True, 'scene': scene})
+        response.headers['Vary'] = 'Accept'
+        return response
         
     except Exception as e:
-        print(f"Error fetching project: {e}")
+        logger.exception("Error fetching scene for project %s", project_id)
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@ml_bp.route('/assets/<bundle_hash>', methods=['GET'])
+def get_asset_bundle(bundle_hash):
+    """
+    Furniture GLBs for ?types=bed,chair,... packed into one gzip bundle (ml/assets.py).
+    The hash pins the content, so the response is cacheable forever.
+    """
+    types = [t for t in request.args.get('types', '').split(',') if t]
+    bundle = asset_bundler.bundle_for(types, expected_hash=bundle_hash)
+    if bundle is None:
+        # Models changed since the URL was issued; the scene response has the new one
+        return jsonify({'success': False, 'error': 'Asset bundle not found'}), 404
+
+    if 'gzip' in request.accept_encodings:
+        response = Response(bundle.compressed, mimetype=ASSETS_MIMETYPE)
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = Response(gzip.decompress(bundle.compressed), mimetype=ASSETS_MIMETYPE)
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.set_etag(bundle.hash)
+    return response
+
 @ml_bp.route('/projects/<user_id>', methods=['GET'])
 def get_user_projects(user_id):
-    """Get all projects for a user"""
+    """
+    One page of a user's projects (summary columns), newest first
+
+    Query params:
+        limit: page size, 1-100 (default 20)
+        cursor: next_cursor from the previous page
+        status: processing | completed | failed (optional)
+
+    Response (ETag set; If-None-Match gets a 304 when unchanged):
+        {
+            "success": true,
+            "projects": [{"id", "project_name", "status", "image_url", "created_at"}, ...],
+            "count": 20,
+            "next_cursor": "..." or null
+        }
+    """
     try:
-        from ml.supabase import ProjectDB
-        
-        projects = ProjectDB.get_user_projects(user_id)
-        
-        return jsonify({
+        try:
+            limit = min(max(int(request.args.get('limit', 20)), 1), 100)
+        except ValueError:
+            return jsonify({'success': False, 'error': 'limit must be an integer'}), 400
+
+        status = request.args.get('status')
+        if status and status not in PROJECT_STATUSES:
+            return jsonify({
+                'success': False,
+                'error': f"Invalid status. Choose from: {', '.join(PROJECT_STATUSES)}"
+            }), 400
+
+        try:
+            projects, next_cursor = ProjectDB.list_for_user(
+                user_id, limit=limit, cursor=request.args.get('cursor'), status=status
+            )
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+
+        response = jsonify({
             'success': True,
             'projects': projects,
-            'count': len(projects)
-        }), 200
+            'count': len(projects),
+            'next_cursor': next_cursor
+        })
+        # Revalidate every time, but let unchanged pages come back as 304
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.add_etag()
+        return response.make_conditional(request)
         
     except Exception as e:
-        print(f"Error fetching projects: {e}")
-        return jsonify({'success': False, 'error': str(e)}), 500
\ No newline at end of file
+        logger.exception("Error fetching projects for user %s", user_id)
+        return jsonify({'success': False, 'error': str(e)}), 500
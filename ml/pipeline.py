@@ -1,44 +1,370 @@
+import copy
+import threading
+import time
 from io import BytesIO
-from ml.utils import validate_and_format
-from ml.image_utils import ImageProcessor
+from concurrent.futures import ThreadPoolExecutor, Future
+from config import Config
+from ml.utils import ingest_image
 from ml.cloudflare import r2_service
-from ml.grounding_dino import grounding_dino
-from ml.depth_model import depth_estimator
+from ml import batching
+from ml.cache import result_cache, content_hash, derive_key
 from ml.scene_builder import scene_builder
 from ml.supabase import ProjectDB, DetectionDB, RoomDimensionsDB
+from ml.admission import AdmissionTimeout
+from tracing import StageTimings
 
+DETECTION_THRESHOLD = 0.4
 
-def run_room_pipeline(file_data, user_id, project_name):
-    filename, error = validate_and_format(file_data)
+# Shared by all pipelines: inference waits + R2/Supabase network calls
+_executor = ThreadPoolExecutor(max_workers=Config.PIPELINE_THREADS, thread_name_prefix='pipeline')
+
+
+class PipelineError(Exception):
+    pass
+
+
+def _noop_stage(stage, payload=None):
+    pass
+
+
+def _timed(timings, stage, fn, *args, **kwargs):
+    start = time.perf_counter()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        timings.record(stage, time.perf_counter() - start)
+
+
+def _release_when_done(ticket, futures):
+    # The inference place is held until the batchers have answered for every image
+    if not ticket:
+        return
+    pending = [len(futures)]
+    lock = threading.Lock()
+
+    def done(_):
+        with lock:
+            pending[0] -= 1
+            if pending[0]:
+                return
+        ticket.release()
+
+    for future in futures:
+        future.add_done_callback(done)
+
+
+def _resolved(value):
+    future = Future()
+    future.set_result(value)
+    return future
+
+
+def _result_cache_key(image_hash, depth_tier):
+    # Everything the cached detections, depth and built scene depend on
+    return derive_key(image_hash, Config.GROUNDING_DINO_MODEL_ID, Config.GROUNDING_DINO_BACKEND,
+                      depth_tier['model_id'], depth_tier['input_size'], Config.DEPTH_BACKEND,
+                      Config.FURNITURE_LIST, DETECTION_THRESHOLD,
+                      Config.SCENE_DEPTH_STAT, Config.SCENE_DEPTH_INSET)
+
+
+def _upload_and_create_project(upload, filename, user_id, project_name, timings):
+    # Original is keyed by the sha256 computed while spooling the request body
+    upload_result = _timed(timings, 'upload', r2_service.upload_image, upload.open(), filename, content_hash=upload.sha256)
+    if not upload_result['success']: raise PipelineError("Upload failed")
+
+    project = _timed(timings, 'create_project', ProjectDB.create, user_id, project_name, upload_result['url'])
+    if not project: raise PipelineError("DB Project creation failed")
+    return project['id']
+
+
+def _upload_depth_image(depth_result, image_hash, depth_model_id):
+    depth_bytes = BytesIO()
+    # Visualization is encoded from the model-resolution map in the photo's aspect ratio, no full-size upsample
+    depth_result['depth_map'].to_image().save(depth_bytes, format='PNG')
+    depth_hash = derive_key('depth', image_hash, depth_model_id)
+    return r2_service.upload_image(depth_bytes.getvalue(), "depth.png", content_hash=depth_hash)
+
+
+def run_room_pipeline(upload, user_id, project_name, quality=None, on_stage=None, ticket=None):
+    """
+    upload is a SpooledUpload (ml.utils.spool_upload); the pipeline closes it.
+
+    Dependency graph (-> = waits on):
+
+        ingest (validate + single decode)
+        upload original -> create project          (network, parallel with inference)
+        detect, estimate depth                     (parallel, share pil_img)
+        save detections -> project, detect         (background)
+        depth PNG upload -> depth                  (background)
+        build scene -> detect, depth
+        save scene -> project, scene, depth PNG upload
+
+    quality picks the depth tier from Config.DEPTH_TIERS (default Config.DEFAULT_QUALITY).
+
+    Detections, depth and scene are cached by image content + model config,
+    so a re-upload of the same photo skips detect/depth/build scene.
+
+    on_stage(stage, payload) is called as each milestone completes.
+    ticket (ml.admission) makes a cache miss wait for an inference place before
+    anything is uploaded; the place is released as soon as detect and depth return.
+    Returns ({project_id, detections, scene, timings}, None) or (None, error).
+    """
+    try:
+        return _run_room_pipeline(upload, user_id, project_name, quality, on_stage, ticket)
+    except AdmissionTimeout as e:
+        return None, str(e)
+    finally:
+        upload.close()
+        if ticket: ticket.release()
+
+
+def _run_room_pipeline(upload, user_id, project_name, quality, on_stage, ticket):
+    on_stage = on_stage or _noop_stage
+    quality = quality or Config.DEFAULT_QUALITY
+    depth_tier = Config.DEPTH_TIERS[quality]
+    timings = StageTimings('room')
+    started = time.perf_counter()
+
+    processed, error = _timed(timings, 'ingest', ingest_image, upload)
     if error: return None, error
+    filename = processed['filename']
+    pil_img = processed['pil_image']
+
+    image_hash = _timed(timings, 'hash', content_hash, pil_img)
+    cache_key = _result_cache_key(image_hash, depth_tier)
+    cached = result_cache.get(cache_key)
+
+    inference_started = None
+    if cached:
+        on_stage('cache_hit')
+        detect_future = _resolved(copy.deepcopy(cached['detections']))
+        depth_future = _resolved(cached['depth_result'])
+    else:
+        # Raises AdmissionTimeout past the deadline, before the project exists
+        if ticket: ticket.acquire()
+        on_stage('inference_started')
+        inference_started = time.perf_counter()
+        detect_future = batching.detect_async(pil_img, confidence_threshold=DETECTION_THRESHOLD)
+        depth_future = batching.estimate_depth_async(pil_img, quality)
+    _release_when_done(ticket, [detect_future, depth_future])
 
-    upload_result = r2_service.upload_image(file_data, filename)
-    if not upload_result['success']: return None, "Upload failed"
-    
-    project = ProjectDB.create(user_id, project_name, upload_result['url'])
-    if not project: return None, "DB Project creation failed"
+    # Decoding is finished, so the upload task is now the only reader of the spooled file
+    project_future = _executor.submit(_upload_and_create_project, upload, filename, user_id, project_name, timings)
+
+    try:
+        project_id = project_future.result()
+    except PipelineError as e:
+        # Nothing will use the images' inference; drop them if they are still queued
+        detect_future.cancel()
+        depth_future.cancel()
+        return None, str(e)
+    on_stage('project_created', {'project_id': project_id})
+
+    try:
+        # Submit-to-result (queue wait + forward pass), recorded here rather than in a
+        # done-callback on the batcher thread, which can run after result() returns
+        detections = detect_future.result()
+        if inference_started: timings.record('detection', time.perf_counter() - inference_started)
+        on_stage('detected', {'detections': detections})
+        save_detections_future = None
+        if detections:
+            save_detections_future = _executor.submit(
+                _timed, timings, 'save_detections', DetectionDB.save_batch, project_id, detections
+            )
+
+        depth_result = depth_future.result()
+        if inference_started: timings.record('depth', time.perf_counter() - inference_started)
+        if depth_result is None: raise PipelineError("Depth estimation failed")
+        on_stage('depth_estimated', {'min_depth': depth_result['min_depth'], 'max_depth': depth_result['max_depth']})
+        depth_upload_future = _executor.submit(_timed, timings, 'depth_upload', _upload_depth_image, depth_result, image_hash,
+                                               depth_tier['model_id'])
+
+        if cached:
+            scene_data = copy.deepcopy(cached['scene'])
+        else:
+            scene_data = _timed(timings, 'scene', scene_builder.build_scene, detections, depth_result, *processed['processed_size'])
+            if scene_data is None: raise PipelineError("Scene building failed")
+            result_cache.put(cache_key, {
+                'detections': copy.deepcopy(detections),
+                'depth_result': depth_result,
+                'scene': copy.deepcopy(scene_data)
+            })
+        on_stage('scene_built', {'scene': scene_data})
+
+        depth_upload = depth_upload_future.result()
+        _timed(timings, 'save_scene', RoomDimensionsDB.save,
+               project_id, depth_upload.get('url'), scene_data['room']['dimensions'], scene_data)
+        if save_detections_future: save_detections_future.result()
+
+        ProjectDB.update_status(project_id, 'completed')
+        timings.record('total', time.perf_counter() - started)
+        on_stage('persisted', {'project_id': project_id})
+        return {"project_id": project_id, "detections": detections, "scene": scene_data,
+                "timings": timings, "cache_hit": bool(cached), "quality": quality}, None
+
+    except Exception as e:
+        ProjectDB.update_status(project_id, 'failed')
+        raise e
+
+
+def run_batch_pipeline(uploads, user_id, project_name, quality=None, on_stage=None, ticket=None):
+    """
+    Several photos (e.g. a whole apartment) under one project; closes the uploads.
+
+        ingest all images                          (one pass, in parallel on the pipeline threads)
+        detect, estimate depth for every image     (submitted together, so same-size images share forward passes)
+        upload all originals -> create project     (concurrent with inference; the first is the project image)
+        save detections -> all detections          (one insert, rows tagged with image_index)
+        depth PNG uploads                          (concurrent)
+        build scene per image
+        save scenes                                (one insert)
+
+    Per-image results come from and go to the same result cache as run_room_pipeline.
+    The batch takes one inference place (ticket, as in run_room_pipeline) only when
+    some image misses the cache, and frees it once every image is inferred.
+    Returns ({project_id, images, stats, timings, quality}, None) or (None, error).
+    """
+    try:
+        return _run_batch_pipeline(uploads, user_id, project_name, quality, on_stage, ticket)
+    except AdmissionTimeout as e:
+        return None, str(e)
+    finally:
+        for upload in uploads:
+            upload.close()
+        if ticket: ticket.release()
+
+
+def _ingest_all(uploads):
+    return list(_executor.map(ingest_image, uploads))
+
+
+def _run_batch_pipeline(uploads, user_id, project_name, quality, on_stage, ticket):
+    on_stage = on_stage or _noop_stage
+    quality = quality or Config.DEFAULT_QUALITY
+    depth_tier = Config.DEPTH_TIERS[quality]
+    timings = StageTimings('batch')
+    started = time.perf_counter()
+
+    ingested = _timed(timings, 'ingest', _ingest_all, uploads)
+    for index, (_, error) in enumerate(ingested):
+        if error: return None, f"Image {index + 1}: {error}"
+    processed = [p for p, _ in ingested]
+    images = [p['pil_image'] for p in processed]
+
+    image_hashes = _timed(timings, 'hash', lambda: [content_hash(img) for img in images])
+    cache_keys = [_result_cache_key(image_hash, depth_tier) for image_hash in image_hashes]
+    cached = [result_cache.get(key) for key in cache_keys]
+    if ticket and not all(cached):
+        ticket.acquire()
+
+    # Decoding is finished, so each upload task is the only reader of its spooled file
+    upload_futures = [
+        _executor.submit(r2_service.upload_image, upload.open(), p['filename'], content_hash=upload.sha256)
+        for upload, p in zip(uploads, processed)
+    ]
+
+    # All misses go to the batchers at once instead of one image per call
+    inference_started = time.perf_counter()
+    detect_futures, depth_futures = [], []
+    for img, hit in zip(images, cached):
+        if hit:
+            detect_futures.append(_resolved(copy.deepcopy(hit['detections'])))
+            depth_futures.append(_resolved(hit['depth_result']))
+        else:
+            detect_futures.append(batching.detect_async(img, confidence_threshold=DETECTION_THRESHOLD))
+            depth_futures.append(batching.estimate_depth_async(img, quality))
+    _release_when_done(ticket, detect_futures + depth_futures)
+    on_stage('inference_started', {'images': len(images), 'cache_hits': sum(1 for hit in cached if hit)})
+
+    # Wait for every original (they upload concurrently) so none is still reading its file on return
+    uploads_done = _timed(timings, 'upload', lambda: [future.result() for future in upload_futures])
+    if not all(u['success'] for u in uploads_done):
+        error = "Upload failed"
+    else:
+        project = _timed(timings, 'create_project', ProjectDB.create, user_id, project_name, uploads_done[0]['url'])
+        error = None if project else "DB Project creation failed"
+    if error:
+        # Nothing will use the images' inference now; drop whatever is still queued
+        for future in detect_futures + depth_futures:
+            future.cancel()
+        return None, error
     project_id = project['id']
+    on_stage('project_created', {'project_id': project_id})
 
     try:
-        processed = ImageProcessor.preprocess_for_detection(file_data, resize=True)
-        pil_img = processed['pil_image']
-        
-        detections = grounding_dino.detect(pil_img, confidence_threshold=0.4)
-        if detections: DetectionDB.save_batch(project_id, detections)
-        
-        depth_result = depth_estimator.estimate_depth(pil_img)
-        
-        depth_bytes = BytesIO()
-        depth_result['depth_image'].save(depth_bytes, format='PNG')
-        depth_bytes.seek(0)
-        depth_upload = r2_service.upload_image(depth_bytes.read(), f"depth_{filename}")
-  
-        scene_data = scene_builder.build_scene(detections, depth_result, *processed['processed_size'])
-        RoomDimensionsDB.save(project_id, depth_upload.get('url'), scene_data['room']['dimensions'], scene_data)
-        
+        all_detections = [future.result() for future in detect_futures]
+        all_depths = [future.result() for future in depth_futures]
+        timings.record('inference', time.perf_counter() - inference_started)
+        if any(depth is None for depth in all_depths): raise PipelineError("Depth estimation failed")
+        on_stage('detected', {'detections': all_detections})
+
+        rows = [dict(det, image_index=index) for index, dets in enumerate(all_detections) for det in dets]
+        save_detections_future = None
+        if rows:
+            save_detections_future = _executor.submit(
+                _timed, timings, 'save_detections', DetectionDB.save_batch, project_id, rows
+            )
+        depth_upload_futures = [
+            _executor.submit(_upload_depth_image, depth, image_hash, depth_tier['model_id'])
+            for depth, image_hash in zip(all_depths, image_hashes)
+        ]
+
+        scene_started = time.perf_counter()
+        scenes = []
+        for index, (p, detections, depth_result, hit) in enumerate(zip(processed, all_detections, all_depths, cached)):
+            if hit:
+                scene_data = copy.deepcopy(hit['scene'])
+            else:
+                scene_data = scene_builder.build_scene(detections, depth_result, *p['processed_size'])
+                if scene_data is None: raise PipelineError(f"Scene building failed for image {index + 1}")
+                result_cache.put(cache_keys[index], {
+                    'detections': copy.deepcopy(detections),
+                    'depth_result': depth_result,
+                    'scene': copy.deepcopy(scene_data)
+                })
+            scenes.append(scene_data)
+            on_stage('scene_built', {'image_index': index, 'scene': scene_data})
+        timings.record('scene', time.perf_counter() - scene_started)
+
+        depth_uploads = [future.result() for future in depth_upload_futures]
+
+        _timed(timings, 'save_scene', RoomDimensionsDB.save_batch, project_id, [
+            (index, depth_upload.get('url'), scene['room']['dimensions'], scene)
+            for index, (depth_upload, scene) in enumerate(zip(depth_uploads, scenes))
+        ])
+        if save_detections_future: save_detections_future.result()
+
         ProjectDB.update_status(project_id, 'completed')
-        return {"project_id": project_id, "detections": detections, "scene": scene_data}, None
+        timings.record('total', time.perf_counter() - started)
+        on_stage('persisted', {'project_id': project_id})
+
+        furniture_by_type = {}
+        for det in rows:
+            furniture_by_type[det['label']] = furniture_by_type.get(det['label'], 0) + 1
+        return {
+            "project_id": project_id,
+            "images": [
+                {
+                    "index": index,
+                    "image_url": upload_result['url'],
+                    "detections": detections,
+                    "scene": scene,
+                    "cache_hit": bool(hit)
+                }
+                for index, (upload_result, detections, scene, hit)
+                in enumerate(zip(uploads_done, all_detections, scenes, cached))
+            ],
+            "stats": {
+                "image_count": len(images),
+                "furniture_count": len(rows),
+                "furniture_by_type": furniture_by_type,
+                "cache_hits": sum(1 for hit in cached if hit),
+                "images_per_second": round(len(images) / (time.perf_counter() - started), 2)
+            },
+            "timings": timings,
+            "quality": quality
+        }, None
 
     except Exception as e:
         ProjectDB.update_status(project_id, 'failed')
-        raise e
\ No newline at end of file
+        raise e
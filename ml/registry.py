@@ -0,0 +1,116 @@
+import logging
+import threading
+import time
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRegistry:
+    """
+    Loads models on first use (or in a background warm-up thread) instead of
+    at import time, and tracks per-model load state for the readiness check.
+
+    States: not_loaded -> loading -> ready | failed
+    """
+
+    def __init__(self):
+        self._factories = {}
+        self._models = {}
+        self._status = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, factory, required=True):
+        # required models are warmed up at startup and gate readiness; others load on first use
+        with self._lock:
+            self._factories[name] = factory
+            self._locks[name] = threading.Lock()
+            self._status[name] = {'state': 'not_loaded', 'error': None, 'load_seconds': None, 'required': required}
+
+    def names(self):
+        return list(self._factories)
+
+    def get(self, name):
+        model = self._models.get(name)
+        if model is not None:
+            return model
+
+        # Per-model lock: concurrent first requests wait for a single load
+        with self._locks[name]:
+            model = self._models.get(name)
+            if model is not None:
+                return model
+
+            self._status[name].update(state='loading', error=None)
+            started = time.perf_counter()
+            try:
+                model = self._factories[name]()
+            except Exception as e:
+                logger.exception("Error loading %s", name)
+                self._status[name].update(state='failed', error=str(e))
+                raise
+
+            # Model classes swallow from_pretrained errors and leave .model as None
+            if getattr(model, 'model', True) is None:
+                self._status[name].update(state='failed', error='Model failed to load')
+            else:
+                self._status[name]['state'] = 'ready'
+            self._status[name]['load_seconds'] = round(time.perf_counter() - started, 2)
+            self._models[name] = model
+            return model
+
+    def warmup(self, names=None, background=True):
+        names = names or [name for name in self.names() if self._status[name]['required']]
+
+        def load_all():
+            for name in names:
+                try:
+                    self.get(name)
+                except Exception:
+                    pass
+
+        if not background:
+            load_all()
+            return None
+        thread = threading.Thread(target=load_all, name='model-warmup', daemon=True)
+        thread.start()
+        return thread
+
+    def status(self):
+        return {name: dict(status) for name, status in self._status.items()}
+
+    def is_ready(self):
+        return all(status['state'] == 'ready' for status in self._status.values() if status['required'])
+
+
+def _remote(name):
+    from ml.inference_server import RemoteModel
+    return RemoteModel(name)
+
+
+def _load_grounding_dino():
+    if Config.ML_MODEL_SHARING == 'server':
+        return _remote('grounding_dino')
+    from ml.admission import configure_torch_threads
+    from ml.grounding_dino import GroundingDINO
+    configure_torch_threads()
+    return GroundingDINO()
+
+
+def _depth_loader(tier):
+    def load():
+        if Config.ML_MODEL_SHARING == 'server':
+            return _remote(f"depth:{tier}")
+        from ml.admission import configure_torch_threads
+        from ml.depth_model import DepthEstimator
+        configure_torch_threads()
+        settings = Config.DEPTH_TIERS[tier]
+        return DepthEstimator(model_id=settings['model_id'], input_size=settings['input_size'])
+    return load
+
+
+model_registry = ModelRegistry()
+model_registry.register('grounding_dino', _load_grounding_dino)
+for _tier in Config.DEPTH_TIERS:
+    model_registry.register(f"depth:{_tier}", _depth_loader(_tier), required=_tier == Config.DEFAULT_QUALITY)
@@ -1,4 +1,8 @@
+import logging
 import numpy as np
+from config import Config
+
+logger = logging.getLogger(__name__)
 
 class SceneBuilder:
     """
@@ -14,16 +18,19 @@ class SceneBuilder:
         - Complete scene JSON
     """
     
-    def __init__(self):
+    def __init__(self, depth_stat=None, depth_inset=None):
         # Default camera parameters (assumed)
         self.focal_length = 1825.0  # Typical for smartphone cameras
         self.default_room_height = 2.7  # meters 
+        # Per-object depth: 'median' / 'mean' over the inset bbox, or 'center' (single pixel)
+        self.depth_stat = depth_stat or Config.SCENE_DEPTH_STAT
+        self.depth_inset = Config.SCENE_DEPTH_INSET if depth_inset is None else depth_inset
     
     def estimate_room_dimensions(self, depth_map, image_width):
         try:
             # Average depth (room ka approximate depth)
-            avg_depth = np.mean(depth_map)
-            max_depth = np.max(depth_map)   
+            avg_depth = depth_map.mean()
+            max_depth = depth_map.max()   
             
             # Estimate room width aur height based on depth
             # Using camera intrinsics approximation
@@ -31,7 +38,7 @@ class SceneBuilder:
             room_depth = max_depth  # Farthest point = back wall
             room_height = self.default_room_height  # Assumed ceiling height
     
-            print(f"Room dimensions: W={room_width:.2f}m, H={room_height:.2f}m, D={room_depth:.2f}m")
+            logger.debug("Room dimensions: W=%.2fm, H=%.2fm, D=%.2fm", room_width, room_height, room_depth)
             
             return {
                 'width': float(room_width),
@@ -39,8 +46,8 @@ class SceneBuilder:
                 'depth': float(room_depth)
             }
             
-        except Exception as e:
-            print(f"Error estimating room dimensions: {e}")
+        except Exception:
+            logger.exception("Error estimating room dimensions")
             # Fallback default room
             return {
                 'width': 5.0,   
@@ -65,7 +72,7 @@ class SceneBuilder:
             pixel_y = max(0, min(pixel_y, image_height - 1))
             
             # Get depth at furniture center
-            furniture_depth = depth_map[pixel_y, pixel_x]
+            furniture_depth = depth_map.sample(pixel_x, pixel_y)
             
             # Convert to 3D coordinates (simplified projection)
             # Origin at center of image plane
@@ -79,8 +86,70 @@ class SceneBuilder:
                 'z': float(z_3d)
             }
             
-        except Exception as e:
-            print(f"Error converting to 3D: {e}")
+        except Exception:
+            logger.exception("Error converting to 3D")
+    
+    def build_furniture(self, detections, depth_map, room_dimensions, image_width, image_height):
+        """
+        Batched convert_to_3d + size estimate for all detections.
+
+        Object depth is a robust statistic (self.depth_stat) over the inset
+        bbox; with depth_stat='center' it is the single center pixel and the
+        output is identical to looping convert_to_3d over the detections
+        (same int() truncation, clamping and float32 depth products).
+        """
+        if not detections:
+            return []
+        
+        # (N, 4) boxes: x, y, width, height
+        norm = np.array([[d['bbox_normalized']['x'], d['bbox_normalized']['y'],
+                          d['bbox_normalized']['width'], d['bbox_normalized']['height']]
+                         for d in detections], dtype=np.float64)
+        absolute = np.array([[d['bbox_absolute']['width'], d['bbox_absolute']['height']]
+                             for d in detections], dtype=np.float64)
+        
+        # Bounding box centers -> clamped pixel coordinates
+        center_x = norm[:, 0] + norm[:, 2] / 2
+        center_y = norm[:, 1] + norm[:, 3] / 2
+        pixel_x = np.clip(np.trunc(center_x * image_width).astype(np.intp), 0, image_width - 1)
+        pixel_y = np.clip(np.trunc(center_y * image_height).astype(np.intp), 0, image_height - 1)
+        
+        # Object depth, then the same projection as convert_to_3d through the bbox center
+        if self.depth_stat == 'center':
+            depths = np.asarray(depth_map.sample(pixel_x, pixel_y))
+        else:
+            size = np.array([image_width, image_height, image_width, image_height], dtype=np.float64)
+            boxes_px = np.stack([norm[:, 0], norm[:, 1], norm[:, 0] + norm[:, 2], norm[:, 1] + norm[:, 3]], axis=1) * size
+            depths = depth_map.region_depths(boxes_px, stat=self.depth_stat, inset=self.depth_inset)
+        x_3d = ((pixel_x - image_width / 2) / self.focal_length).astype(depths.dtype) * depths
+        y_3d = ((image_height / 2 - pixel_y) / self.focal_length).astype(depths.dtype) * depths
+        
+        widths = (absolute[:, 0] / image_width) * room_dimensions['width']
+        heights = (absolute[:, 1] / image_height) * room_dimensions['height']
+        
+        # Back to Python floats in bulk before building the per-item dicts
+        positions = np.stack([x_3d, y_3d, depths], axis=1).tolist()
+        sizes = np.stack([widths, heights], axis=1).tolist()
+        
+        return [
+            {
+                'id': i + 1,
+                'type': detection['label'],
+                'confidence': detection['confidence'],
+                'position': {'x': position[0], 'y': position[1], 'z': position[2]},
+                'size': {
+                    'width': size[0],
+                    'height': size[1],
+                    'depth': 0.5  # Default depth estimate
+                },
+                'rotation': {
+                    'x': 0,
+                    'y': 0,
+                    'z': 0
+                }
+            }
+            for i, (detection, position, size) in enumerate(zip(detections, positions, sizes))
+        ]
     
     def build_scene(self, detections, depth_result, image_width, image_height):
         """ 
@@ -104,43 +173,14 @@ class SceneBuilder:
                 image_width
             )
             
-            # Convert each detection to 3D
-            furniture_3d = []
-            
-            for detection in detections:
-                position_3d = self.convert_to_3d(
-                    detection,
-                    depth_map,
-                    image_width,
-                    image_height
-                )
-                
-                # Estimate furniture dimensions from bounding box
-                bbox = detection['bbox_absolute']
-                
-                # Approximate 3D size (simplified)
-                furniture_width = (bbox['width'] / image_width) * room_dimensions['width']
-                furniture_height = (bbox['height'] / image_height) * room_dimensions['height']
-                furniture_depth = 0.5  # Default depth estimate
-                
-                furniture_item = {
-                    'id': len(furniture_3d) + 1,
-                    'type': detection['label'],
-                    'confidence': detection['confidence'],
-                    'position': position_3d,
-                    'size': {
-                        'width': float(furniture_width),
-                        'height': float(furniture_height),
-                        'depth': float(furniture_depth)
-                    },
-                    'rotation': {
-                        'x': 0,
-                        'y': 0,
-                        'z': 0
-                    }
-                }
-                
-                furniture_3d.append(furniture_item)
+            # Convert all detections to 3D in one vectorized pass
+            furniture_3d = self.build_furniture(
+                detections,
+                depth_map,
+                room_dimensions,
+                image_width,
+                image_height
+            )
             
             # Complete scene data
             scene_data = {
@@ -172,12 +212,12 @@ class SceneBuilder:
                 }
             }
             
-            print(f"Scene built with {len(furniture_3d)} furniture items")
+            logger.debug("Scene built with %d furniture items", len(furniture_3d))
             
             return scene_data
             
-        except Exception as e:
-            print(f"Error building scene: {e}")
+        except Exception:
+            logger.exception("Error building scene")
             return None
 
 scene_builder = SceneBuilder()
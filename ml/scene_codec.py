@@ -0,0 +1,186 @@
+"""
+Compact binary encoding of SceneBuilder.build_scene output.
+
+Served instead of JSON when the client sends Accept: application/x-roomview3d-scene.
+All numbers are little-endian; every array starts on a 4-byte boundary so
+the frontend can view them as typed arrays without copying.
+
+Version 1 layout:
+
+    magic       4s    b'RV3S'
+    version     u16
+    strings     u16   number of entries in the string table
+    string table      per entry: u16 byte length + UTF-8 bytes, padded to 4
+    furniture   u32   n
+    lights      u32   m (directional lights)
+    scalars     f32[10]  room width, height, depth, ambient,
+                         camera position xyz, camera target xyz
+    materials   u16[6]   string ids: walls color/texture, floor color/texture,
+                         ceiling color/texture
+    lights      f32[m*4] position xyz, intensity
+    ids         u32[n]
+    types       u16[n]   string ids, padded to 4
+    confidence  f32[n]
+    transforms  f32[n*9] position xyz, size width/height/depth, rotation xyz
+    extras      u32 byte length + UTF-8 JSON of any other top-level scene keys,
+                plus {item index: other keys} under '_furniture_extras' for
+                furniture items with keys beyond the fixed fields above
+
+Floats are float32, so values round-trip to float32 precision.
+"""
+import json
+import struct
+
+import numpy as np
+
+MAGIC = b'RV3S'
+VERSION = 1
+MIMETYPE = 'application/x-roomview3d-scene'
+
+SCENE_KEYS = ('room', 'furniture', 'lighting', 'camera')
+SURFACES = ('walls', 'floor', 'ceiling')
+ITEM_KEYS = ('id', 'type', 'confidence', 'position', 'size', 'rotation')
+ITEM_EXTRAS_KEY = '_furniture_extras'
+
+
+class SceneCodecError(ValueError):
+    pass
+
+
+def _pad(buffer):
+    buffer.extend(b'\0' * (-len(buffer) % 4))
+
+
+def encode_scene(scene):
+    """scene dict (build_scene output) -> bytes"""
+    room = scene['room']
+    furniture = scene['furniture']
+    lights = scene['lighting'].get('directional', [])
+    camera = scene['camera']
+
+    strings = []
+    index = {}
+
+    def string_id(value):
+        value = str(value)
+        if value not in index:
+            index[value] = len(strings)
+            strings.append(value)
+        return index[value]
+
+    materials = [string_id(room[surface][attr]) for surface in SURFACES for attr in ('color', 'texture')]
+    types = np.array([string_id(f['type']) for f in furniture], dtype='<u2')
+    if len(strings) > 0xFFFF:
+        raise SceneCodecError('Too many distinct strings for a v1 scene')
+
+    out = bytearray(struct.pack('<4sHH', MAGIC, VERSION, len(strings)))
+    for value in strings:
+        encoded = value.encode('utf-8')
+        out += struct.pack('<H', len(encoded)) + encoded
+    _pad(out)
+
+    dims = room['dimensions']
+    out += struct.pack('<II', len(furniture), len(lights))
+    out += np.array(
+        [dims['width'], dims['height'], dims['depth'], scene['lighting'].get('ambient', 0)]
+        + list(camera['position']) + list(camera['target']),
+        dtype='<f4'
+    ).tobytes()
+    out += np.array(materials, dtype='<u2').tobytes()
+    out += np.array([list(light['position']) + [light['intensity']] for light in lights], dtype='<f4').tobytes()
+
+    out += np.array([f['id'] for f in furniture], dtype='<u4').tobytes()
+    out += types.tobytes()
+    _pad(out)
+    out += np.array([f['confidence'] for f in furniture], dtype='<f4').tobytes()
+    out += np.array([
+        [f['position']['x'], f['position']['y'], f['position']['z'],
+         f['size']['width'], f['size']['height'], f['size']['depth'],
+         f['rotation']['x'], f['rotation']['y'], f['rotation']['z']]
+        for f in furniture
+    ], dtype='<f4').reshape(-1, 9).tobytes()
+
+    if ITEM_EXTRAS_KEY in scene:
+        raise SceneCodecError(f'{ITEM_EXTRAS_KEY} is reserved')
+    extras = {key: value for key, value in scene.items() if key not in SCENE_KEYS}
+    item_extras = {}
+    for i, item in enumerate(furniture):
+        extra = {key: value for key, value in item.items() if key not in ITEM_KEYS}
+        if extra:
+            item_extras[str(i)] = extra
+    if item_extras:
+        extras[ITEM_EXTRAS_KEY] = item_extras
+    encoded_extras = json.dumps(extras, separators=(',', ':')).encode('utf-8') if extras else b''
+    out += struct.pack('<I', len(encoded_extras)) + encoded_extras
+    return bytes(out)
+
+
+def decode_scene(data):
+    """bytes -> scene dict in the same shape build_scene returns"""
+    view = memoryview(data)
+    try:
+        magic, version, string_count = struct.unpack_from('<4sHH', view, 0)
+        if magic != MAGIC:
+            raise SceneCodecError('Not a RoomView3D scene')
+        if version != VERSION:
+            raise SceneCodecError(f'Unsupported scene version {version}')
+        offset = 8
+
+        strings = []
+        for _ in range(string_count):
+            (length,) = struct.unpack_from('<H', view, offset)
+            strings.append(bytes(view[offset + 2:offset + 2 + length]).decode('utf-8'))
+            offset += 2 + length
+        offset += -offset % 4
+
+        def take(dtype, count):
+            nonlocal offset
+            array = np.frombuffer(view, dtype=dtype, count=count, offset=offset)
+            offset += array.nbytes
+            return array
+
+        count, light_count = take('<u4', 2).tolist()
+        scalars = take('<f4', 10).tolist()
+        materials = [strings[i] for i in take('<u2', 6).tolist()]
+        lights = take('<f4', light_count * 4).reshape(-1, 4).tolist()
+        ids = take('<u4', count).tolist()
+        types = take('<u2', count).tolist()
+        offset += -offset % 4
+        confidences = take('<f4', count).tolist()
+        transforms = take('<f4', count * 9).reshape(-1, 9).tolist()
+        (extras_length,) = struct.unpack_from('<I', view, offset)
+        extras_bytes = bytes(view[offset + 4:offset + 4 + extras_length])
+    except (struct.error, ValueError, IndexError) as e:
+        if isinstance(e, SceneCodecError):
+            raise
+        raise SceneCodecError(f'Truncated or corrupt scene: {e}')
+
+    room = {'dimensions': {'width': scalars[0], 'height': scalars[1], 'depth': scalars[2]}}
+    for i, surface in enumerate(SURFACES):
+        room[surface] = {'color': materials[2 * i], 'texture': materials[2 * i + 1]}
+
+    scene = {
+        'room': room,
+        'furniture': [
+            {
+                'id': item_id,
+                'type': strings[type_id],
+                'confidence': confidence,
+                'position': {'x': t[0], 'y': t[1], 'z': t[2]},
+                'size': {'width': t[3], 'height': t[4], 'depth': t[5]},
+                'rotation': {'x': t[6], 'y': t[7], 'z': t[8]}
+            }
+            for item_id, type_id, confidence, t in zip(ids, types, confidences, transforms)
+        ],
+        'lighting': {
+            'ambient': scalars[3],
+            'directional': [{'position': light[:3], 'intensity': light[3]} for light in lights]
+        },
+        'camera': {'position': scalars[4:7], 'target': scalars[7:10]}
+    }
+    if extras_bytes:
+        extras = json.loads(extras_bytes)
+        for i, extra in extras.pop(ITEM_EXTRAS_KEY, {}).items():
+            scene['furniture'][int(i)].update(extra)
+        scene.update(extras)
+    return scene
@@ -1,7 +1,43 @@
-from supabase import create_client, Client
+import base64
+import json
+from datetime import datetime, timedelta, timezone
+from clients import get_supabase, execute
 from config import Config
+from ttl_cache import TTLCache
+
+# Dashboard listing: summary columns only, newest first
+PROJECT_SUMMARY_COLUMNS = "id, project_name, status, image_url, created_at"
+PROJECT_STATUSES = ("processing", "completed", "failed")
+
+# Project page: one embedded query instead of a round trip per table
+PROJECT_COLUMNS = "id, user_id, project_name, status, image_url, created_at"
+DETECTION_COLUMNS = "id, image_index, object_type, confidence, bbox_x, bbox_y, bbox_width, bbox_height"
+SCENE_KEYS = ("room", "furniture", "lighting", "camera")
+PROJECT_FIELDS = ("project", "detections", "scene") + tuple(f"scene.{key}" for key in SCENE_KEYS)
+
+# Read-through, keyed by project id. Only finished projects (completed / failed) are
+# cached: a 'processing' row is about to change, and update_status can only drop this
+# worker's copy, so other workers would serve it without a scene until the TTL ran out.
+FINAL_STATUSES = ("completed", "failed")
+_projects = TTLCache("projects", maxsize=Config.PROJECT_CACHE_SIZE, ttl=Config.PROJECT_CACHE_TTL)
+
+
+def encode_cursor(row):
+    # Opaque keyset cursor: the (created_at, id) of the last row on the page
+    raw = json.dumps([row["created_at"], row["id"]]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    # The cursor comes from the client and ends up in a PostgREST filter string, so
+    # created_at must parse as a timestamp and is re-serialized rather than passed through
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, project_id = json.loads(raw)
+        return datetime.fromisoformat(created_at).isoformat(), int(project_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
 
-supabase = create_client(Config.SUPABASE_URL, Config.SUPABASE_KEY)
 
 class ProjectDB:
     @staticmethod
@@ -12,24 +48,127 @@ class ProjectDB:
             "image_url": image_url,
             "status": "processing"
         }
-        response = supabase.table("projects").insert(data).execute()
+        response = execute(get_supabase().table("projects").insert(data), idempotent=False)
         return response.data[0] if response.data else None
 
     @staticmethod
     def update_status(project_id, status):
-        supabase.table("projects").update({"status": status}).eq("id", project_id).execute()
+        execute(get_supabase().table("projects").update({"status": status}).eq("id", project_id))
+        _projects.pop(str(project_id))
 
     @staticmethod
     def get(project_id):
-        response = supabase.table("projects").select("*").eq("id", project_id).execute()
+        response = execute(get_supabase().table("projects").select("*").eq("id", project_id))
         return response.data[0] if response.data else None
 
+    @staticmethod
+    def get_full(project_id, fields=PROJECT_FIELDS[:3]):
+        """
+        Project with its detections and scene in one round trip.
+
+        fields picks what to embed: 'detections', 'scene', or only parts of the
+        scene ('scene.room', 'scene.furniture', ...), projected by PostgREST so
+        the rest of scene_data never leaves the database. The project columns
+        are always included. Returns {'project', 'detections', 'scene', 'scenes'}
+        or None. scene is the first photo's; for multi-image projects (/process/batch)
+        scenes lists every photo's scene by image_index, and detections carry
+        image_index. scenes is None for single-image projects.
+        """
+        fields = tuple(sorted(set(fields)))
+        select = _project_select(fields)
+        cached = _projects.get(str(project_id)) or {}
+        if select in cached:
+            return cached[select]
+
+        response = execute(get_supabase().table("projects").select(select).eq("id", project_id))
+        if not response.data:
+            return None
+        row = response.data[0]
+
+        detections = row.pop("detections", None)
+        rooms = row.pop("room_dimensions", None)
+        if isinstance(rooms, dict):
+            rooms = [rooms]
+        rooms = sorted(rooms or [], key=lambda room: room.get("image_index") or 0)
+        scenes = [_room_scene(room, fields) for room in rooms]
+        result = {
+            "project": row,
+            "detections": detections,
+            "scene": scenes[0] if scenes else None,
+            "scenes": scenes if any(room.get("image_index") is not None for room in rooms) else None
+        }
+
+        if row.get("status") in FINAL_STATUSES:
+            _projects.set(str(project_id), dict(cached, **{select: result}))
+        return result
+
+    @staticmethod
+    def list_for_user(user_id, limit=20, cursor=None, status=None):
+        """
+        One page of a user's projects, newest first, keyset-paginated on
+        (created_at, id). Returns (projects, next_cursor); next_cursor is None
+        on the last page.
+        """
+        query = get_supabase().table("projects").select(PROJECT_SUMMARY_COLUMNS).eq("user_id", user_id)
+        if status:
+            query = query.eq("status", status)
+        if cursor:
+            created_at, project_id = decode_cursor(cursor)
+            query = query.or_(
+                f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{project_id})'
+            )
+        # One extra row tells whether another page follows
+        query = query.order("created_at", desc=True).order("id", desc=True).limit(limit + 1)
+        rows = execute(query).data or []
+
+        projects = rows[:limit]
+        next_cursor = encode_cursor(projects[-1]) if len(rows) > limit else None
+        return projects, next_cursor
+
+class JobDB:
+    """Shared copy of ml/jobs.py job records, so any worker can answer GET /api/ml/jobs/<id>"""
+    COLUMNS = ("id", "status", "stage", "project_id", "error")
+
+    @staticmethod
+    def save(job):
+        # Upsert: the same row is rewritten at every status change
+        row = {key: job[key] for key in JobDB.COLUMNS}
+        execute(get_supabase().table("jobs").upsert(row))
+
+    @staticmethod
+    def get(job_id):
+        response = execute(get_supabase().table("jobs").select(", ".join(JobDB.COLUMNS)).eq("id", job_id))
+        return response.data[0] if response.data else None
+
+    @staticmethod
+    def delete_older_than(hours):
+        # Retention: jobs are only polled while they run and shortly after
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=hours)
+        execute(get_supabase().table("jobs").delete().lt("created_at", cutoff.isoformat()))
+
+def _project_select(fields):
+    parts = [PROJECT_COLUMNS]
+    if "detections" in fields:
+        parts.append(f"detections({DETECTION_COLUMNS})")
+    if "scene" in fields:
+        parts.append("room_dimensions(image_index, scene_data)")
+    else:
+        scene_parts = [f"{key}:scene_data->{key}" for key in SCENE_KEYS if f"scene.{key}" in fields]
+        if scene_parts:
+            parts.append(f"room_dimensions(image_index, {', '.join(scene_parts)})")
+    return ", ".join(parts)
+
+def _room_scene(room, fields):
+    if "scene_data" in room:
+        return room["scene_data"]
+    return {key: room.get(key) for key in SCENE_KEYS if f"scene.{key}" in fields}
+
 class DetectionDB:
     @staticmethod
     def save_batch(project_id, detections):
         bulk_data = []
         for det in detections:
-            bulk_data.append({
+            row = {
                 "project_id": project_id,
                 "object_type": det['label'],
                 "confidence": det['confidence'],
@@ -37,15 +176,19 @@ class DetectionDB:
                 "bbox_y": det['bbox_normalized']['y'],
                 "bbox_width": det['bbox_normalized']['width'],
                 "bbox_height": det['bbox_normalized']['height']
-            })
+            }
+            # Multi-image projects (run_batch_pipeline) tag each row with its photo
+            if 'image_index' in det:
+                row["image_index"] = det['image_index']
+            bulk_data.append(row)
         
         if bulk_data:
-            supabase.table("detections").insert(bulk_data).execute()
+            execute(get_supabase().table("detections").insert(bulk_data), idempotent=False)
 
 class RoomDimensionsDB:
     @staticmethod
-    def save(project_id, depth_map_url, dimensions, scene_data):
-        data = {
+    def _row(project_id, depth_map_url, dimensions, scene_data):
+        return {
             "project_id": project_id,
             "depth_map_url": depth_map_url,
             "room_width": float(dimensions.get('width', 0)),
@@ -53,4 +196,18 @@ class RoomDimensionsDB:
             "room_depth": float(dimensions.get('depth', 0)),
             "scene_data": scene_data 
         }
-        supabase.table("room_dimensions").insert(data).execute()
\ No newline at end of file
+
+    @staticmethod
+    def save(project_id, depth_map_url, dimensions, scene_data):
+        data = RoomDimensionsDB._row(project_id, depth_map_url, dimensions, scene_data)
+        execute(get_supabase().table("room_dimensions").insert(data), idempotent=False)
+
+    @staticmethod
+    def save_batch(project_id, rooms):
+        # rooms: [(image_index, depth_map_url, dimensions, scene_data)], one insert for all photos
+        bulk_data = [
+            dict(RoomDimensionsDB._row(project_id, depth_map_url, dimensions, scene_data), image_index=image_index)
+            for image_index, depth_map_url, dimensions, scene_data in rooms
+        ]
+        if bulk_data:
+            execute(get_supabase().table("room_dimensions").insert(bulk_data), idempotent=False)
\ No newline at end of file
@@ -0,0 +1,59 @@
+"""
+Upload bodies written once: while Werkzeug parses the multipart body it
+writes each file part into an UploadSpool, which hashes it and enforces the
+per-file limit as the bytes arrive. spool_upload (ml.utils) then takes the
+spool over as it is instead of copying the part into a second temp file.
+
+Installed by create_app as the app's request_class on ML workers.
+"""
+import hashlib
+import tempfile
+from flask import Request
+from config import Config
+
+
+class UploadSpool:
+    """
+    SpooledTemporaryFile (memory up to UPLOAD_SPOOL_BYTES, disk after that)
+    that keeps size and sha256 of what was written. Bytes past max_size are
+    dropped and too_large is set, so the view can answer with its own 413.
+    """
+
+    def __init__(self, max_size=Config.MAX_UPLOAD_BYTES):
+        self.file = tempfile.SpooledTemporaryFile(max_size=Config.UPLOAD_SPOOL_BYTES)
+        self.max_size = max_size
+        self.size = 0
+        self.too_large = False
+        self._digest = hashlib.sha256()
+        self._detached = False
+
+    @property
+    def sha256(self):
+        return self._digest.hexdigest()
+
+    def write(self, data):
+        self.size += len(data)
+        if self.size > self.max_size:
+            self.too_large = True
+        if not self.too_large:
+            self._digest.update(data)
+            self.file.write(data)
+        return len(data)
+
+    def detach(self):
+        # From here on the pipeline owns the file: the request's teardown close() is ignored
+        self._detached = True
+        return self.file
+
+    def close(self):
+        if not self._detached:
+            self.file.close()
+
+    def __getattr__(self, name):
+        # read / seek / tell etc. for Werkzeug and FileStorage
+        return getattr(self.file, name)
+
+
+class UploadRequest(Request):
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return UploadSpool()
@@ -1,6 +1,16 @@
 from PIL import Image
 from io import BytesIO
+import hashlib
+import tempfile
 import uuid
+from config import Config
+from ml.image_utils import ImageProcessor
+from ml.uploads import UploadSpool
+
+ALLOWED_FORMATS = {'png', 'jpg', 'jpeg', 'webp'}
+MAX_UPLOAD_BYTES = Config.MAX_UPLOAD_BYTES
+MAX_IMAGE_PIXELS = 50_000_000
+
 
 def get_uploaded_file(request):
     if 'file' not in request.files:
@@ -14,40 +24,99 @@ def get_uploaded_file(request):
     return file, None
 
 
-def validate_image(file_data):
-    try:
-        img = Image.open(BytesIO(file_data))
-        img.verify()
-        return True, None
-    except Exception:
-        return False, 'Uploaded file is not a valid image'
+class SpooledUpload:
+    """
+    Upload body held in a SpooledTemporaryFile (memory up to
+    UPLOAD_SPOOL_BYTES, disk after that), with its size and sha256
+    computed as it was spooled.
+    """
 
+    def __init__(self, file, size, sha256):
+        self.file = file
+        self.size = size
+        self.sha256 = sha256
 
-def get_image_format(file_data, allowed_ext = {'png', 'jpg', 'jpeg', 'webp'}):
-    img = Image.open(BytesIO(file_data))
-    image_format = img.format.lower()
+    def open(self):
+        # Every reader (decode, R2 upload) starts from the beginning
+        self.file.seek(0)
+        return self.file
 
-    if image_format not in allowed_ext:
-        return None, 'Unsupported image format'
+    def close(self):
+        self.file.close()
+
+
+def spool_upload(file_storage, max_size=MAX_UPLOAD_BYTES, chunk_size=64 * 1024):
+    """
+    SpooledUpload for an uploaded file. Returns (SpooledUpload, None) or (None, error).
+
+    With ml.uploads.UploadRequest installed the part was already spooled,
+    hashed and size-checked while Werkzeug parsed the body, so the spool is
+    taken over without another copy. Any other stream is copied out in
+    chunks, enforcing the limit and hashing as it goes.
+    """
+    stream = file_storage.stream
+    if isinstance(stream, UploadSpool):
+        if stream.too_large or stream.size > max_size:
+            return None, 'File too large. Maximum size: 16MB'
+        return SpooledUpload(stream.detach(), stream.size, stream.sha256), None
+
+    spooled = tempfile.SpooledTemporaryFile(max_size=Config.UPLOAD_SPOOL_BYTES)
+    digest = hashlib.sha256()
+    size = 0
+
+    while True:
+        chunk = file_storage.stream.read(chunk_size)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > max_size:
+            spooled.close()
+            return None, 'File too large. Maximum size: 16MB'
+        digest.update(chunk)
+        spooled.write(chunk)
 
-    return image_format, None
+    return SpooledUpload(spooled, size, digest.hexdigest()), None
 
 
-def check_file_size(file_data, max_size):
-    if len(file_data) > max_size:
-        return False, 'File too large. Maximum size: 16MB'
-    return True, None
+def ingest_image(upload, max_size=1024):
+    """
+    Single ingestion pass for an upload (SpooledUpload or raw bytes): size
+    check, one header read for format and dimensions, then one decode
+    straight to the model size. Returns ({pil_image, format, filename,
+    original_size, processed_size}, None) or (None, error).
+    """
+    if isinstance(upload, (bytes, bytearray)):
+        size, source = len(upload), BytesIO(upload)
+    else:
+        size, source = upload.size, upload.open()
 
+    # Reject oversized uploads before touching the image
+    if size > MAX_UPLOAD_BYTES:
+        return None, 'File too large. Maximum size: 16MB'
+
+    try:
+        image = Image.open(source)  # reads the header only
+    except Exception:
+        return None, 'Uploaded file is not a valid image'
+
+    image_format = (image.format or '').lower()
+    if image_format not in ALLOWED_FORMATS:
+        return None, 'Unsupported image format'
+
+    original_size = image.size
+    if original_size[0] * original_size[1] > MAX_IMAGE_PIXELS:
+        return None, 'Image dimensions too large'
+
+    try:
+        pil_image = ImageProcessor.decode(image, max_size)
+    except Exception:
+        # Truncated / corrupt data fails here instead of in a separate verify() pass
+        return None, 'Uploaded file is not a valid image'
 
-def validate_and_format(file_data):
-    is_valid, error = validate_image(file_data)
-    if not is_valid: return None, error
-    
-    image_format, error = get_image_format(file_data)
-    if error: return None, error
-    
-    is_ok, error = check_file_size(file_data, 16 * 1024 * 1024)
-    if not is_ok: return None, error
-    
-    filename = f"{uuid.uuid4()}.{image_format}"
-    return filename, None
\ No newline at end of file
+    return {
+        'pil_image': pil_image,
+        'format': image_format,
+        'filename': f"{uuid.uuid4()}.{image_format}",
+        'original_size': original_size,
+        'processed_size': pil_image.size
+    }, None
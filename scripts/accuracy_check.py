@@ -0,0 +1,124 @@
+"""
+How much quality each inference backend costs, measured against eager fp32.
+
+For every image in the set, depth maps are compared pixel-wise (abs-rel error,
+RMSE) and detections are matched by label + IoU against the fp32 boxes.
+
+Usage (from repo root):
+    python scripts/accuracy_check.py --images benchmarks/images --backends int8 compile onnx
+"""
+import argparse
+import glob
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.backends import BACKENDS
+from ml.image_utils import ImageProcessor
+
+
+def load_images(directory):
+    paths = sorted(
+        p for p in glob.glob(os.path.join(directory, '*'))
+        if p.lower().endswith(('.jpg', '.jpeg', '.png', '.webp'))
+    )
+    if not paths:
+        raise SystemExit(f"No images found in {directory}")
+    images = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            processed = ImageProcessor.preprocess_for_detection(f.read(), resize=True)
+        images.append((os.path.basename(path), processed['pil_image']))
+    return images
+
+
+def compare_depth(reference, other):
+    # DepthMap or plain array
+    ref = np.asarray(getattr(reference, 'values', reference), dtype=np.float64)
+    out = np.asarray(getattr(other, 'values', other), dtype=np.float64)
+    diff = np.abs(out - ref)
+    return {
+        'abs_rel': float(np.mean(diff / np.maximum(np.abs(ref), 1e-6))),
+        'rmse': float(np.sqrt(np.mean(diff ** 2))),
+        'max_abs': float(diff.max())
+    }
+
+
+def _iou(a, b):
+    ax2, ay2 = a['x'] + a['width'], a['y'] + a['height']
+    bx2, by2 = b['x'] + b['width'], b['y'] + b['height']
+    iw = max(0.0, min(ax2, bx2) - max(a['x'], b['x']))
+    ih = max(0.0, min(ay2, by2) - max(a['y'], b['y']))
+    inter = iw * ih
+    union = a['width'] * a['height'] + b['width'] * b['height'] - inter
+    return inter / union if union > 0 else 0.0
+
+
+def compare_detections(reference, other, iou_threshold=0.5):
+    # Greedy match, highest-confidence reference box first
+    unmatched = list(other)
+    ious, conf_diffs = [], []
+    for ref in reference:
+        best, best_iou = None, iou_threshold
+        for candidate in unmatched:
+            if candidate['label'] != ref['label']:
+                continue
+            iou = _iou(ref['bbox_normalized'], candidate['bbox_normalized'])
+            if iou >= best_iou:
+                best, best_iou = candidate, iou
+        if best is not None:
+            unmatched.remove(best)
+            ious.append(best_iou)
+            conf_diffs.append(abs(best['confidence'] - ref['confidence']))
+    return {
+        'recall': len(ious) / len(reference) if reference else 1.0,
+        'extra': len(unmatched),
+        'mean_iou': float(np.mean(ious)) if ious else None,
+        'mean_conf_diff': float(np.mean(conf_diffs)) if conf_diffs else None
+    }
+
+
+def run_models(backend, images):
+    from ml.depth_model import DepthEstimator
+    from ml.grounding_dino import GroundingDINO
+
+    detector = GroundingDINO(backend=backend)
+    depth = DepthEstimator(backend=backend)
+    if detector.model is None or depth.model is None:
+        raise SystemExit(f"Could not load models with backend '{backend}'")
+    return {
+        name: {
+            'detections': detector.detect(img, confidence_threshold=0.4),
+            'depth_map': depth.estimate_depth(img)['depth_map']
+        }
+        for name, img in images
+    }
+
+
+def summarize(rows):
+    keys = rows[0].keys()
+    return {
+        key: float(np.mean([row[key] for row in rows if row[key] is not None]))
+        if any(row[key] is not None for row in rows) else None
+        for key in keys
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--images', default='benchmarks/images')
+    parser.add_argument('--backends', nargs='+', default=[b for b in BACKENDS if b != 'eager'])
+    args = parser.parse_args()
+
+    images = load_images(args.images)
+    reference = run_models('eager', images)
+
+    for backend in args.backends:
+        results = run_models(backend, images)
+        depth_rows = [compare_depth(reference[n]['depth_map'], results[n]['depth_map']) for n, _ in images]
+        det_rows = [compare_detections(reference[n]['detections'], results[n]['detections']) for n, _ in images]
+        print(f"{backend}: depth {summarize(depth_rows)}")
+        print(f"{backend}: detections {summarize(det_rows)}")
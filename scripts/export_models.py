@@ -0,0 +1,147 @@
+"""
+Export GroundingDINO and every depth tier's model (Config.DEPTH_TIERS) to
+ONNX, then load every inference backend, check it runs, time it and compare
+it against eager fp32 on one image.
+
+Usage (from repo root):
+    python scripts/export_models.py --image benchmarks/images/room.jpg
+
+The ONNX files go to Config.ONNX_MODEL_DIR, where DEPTH_BACKEND=onnx /
+GROUNDING_DINO_BACKEND=onnx pick them up.
+"""
+import argparse
+import os
+import sys
+import time
+
+import torch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transformers import (
+    AutoImageProcessor, AutoModelForDepthEstimation,
+    AutoProcessor, AutoModelForZeroShotObjectDetection
+)
+from config import Config
+from ml.backends import BACKENDS, OUTPUT_NAMES, onnx_path
+from ml.image_utils import ImageProcessor
+from scripts.accuracy_check import compare_depth, compare_detections
+
+
+class _ExportWrapper(torch.nn.Module):
+    # ONNX export traces positional tensors; map them back to the HF keyword inputs
+    def __init__(self, model, input_names, output_names):
+        super().__init__()
+        self.model = model
+        self.input_names = input_names
+        self.output_names = output_names
+
+    def forward(self, *args):
+        outputs = self.model(**dict(zip(self.input_names, args)))
+        return tuple(getattr(outputs, name) for name in self.output_names)
+
+
+def depth_models():
+    # One export per distinct tier model, traced at that tier's input size
+    models = {}
+    for tier in Config.DEPTH_TIERS.values():
+        models.setdefault(tier['model_id'], tier['input_size'])
+    return models
+
+
+def export_onnx(name, image, model_id=None, input_size=None):
+    if name == 'depth':
+        processor = AutoImageProcessor.from_pretrained(model_id)
+        model = AutoModelForDepthEstimation.from_pretrained(model_id).eval()
+        # Same resize target DepthEstimator passes for this tier
+        size = {'size': {'height': input_size, 'width': input_size}} if input_size else {}
+        inputs = processor(images=image, return_tensors='pt', **size)
+        # Spatial axes dynamic too, in case another tier runs the same model at a different size
+        dynamic_axes = {
+            'pixel_values': {0: 'batch', 2: 'height', 3: 'width'},
+            'predicted_depth': {0: 'batch', 1: 'height', 2: 'width'},
+        }
+    else:
+        model_id = Config.GROUNDING_DINO_MODEL_ID
+        processor = AutoProcessor.from_pretrained(model_id)
+        model = AutoModelForZeroShotObjectDetection.from_pretrained(model_id).eval()
+        inputs = processor(images=image, text=Config.FURNITURE_LIST, return_tensors='pt')
+        dynamic_axes = {
+            'pixel_values': {0: 'batch', 2: 'height', 3: 'width'},
+            'pixel_mask': {0: 'batch', 1: 'height', 2: 'width'},
+            'input_ids': {0: 'batch', 1: 'tokens'},
+            'token_type_ids': {0: 'batch', 1: 'tokens'},
+            'attention_mask': {0: 'batch', 1: 'tokens'},
+            'logits': {0: 'batch', 2: 'tokens'},
+            'pred_boxes': {0: 'batch'},
+        }
+
+    input_names = list(inputs.keys())
+    output_names = OUTPUT_NAMES[name]
+    path = onnx_path(model_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    with torch.no_grad():
+        torch.onnx.export(
+            _ExportWrapper(model, input_names, output_names),
+            tuple(inputs[k] for k in input_names),
+            path,
+            input_names=input_names,
+            output_names=output_names,
+            dynamic_axes={k: v for k, v in dynamic_axes.items() if k in input_names + output_names},
+            opset_version=17,
+        )
+    print(f"Exported {name} {model_id} -> {path}")
+
+
+def check_backend(backend, image, reference, runs):
+    from ml.depth_model import DepthEstimator
+    from ml.grounding_dino import GroundingDINO
+
+    models = [('grounding_dino', lambda: GroundingDINO(backend=backend))] + [
+        (f"depth:{quality}", lambda tier=tier: DepthEstimator(tier['model_id'], tier['input_size'], backend=backend))
+        for quality, tier in Config.DEPTH_TIERS.items()
+    ]
+
+    report = {}
+    for name, load in models:
+        model = load()
+        if model.model is None:
+            report[name] = 'failed to load'
+            continue
+        run = (lambda: model.detect(image, confidence_threshold=0.4)) if name == 'grounding_dino' \
+            else (lambda: model.estimate_depth(image))
+        output = run()  # warm-up (torch.compile compiles here)
+        started = time.perf_counter()
+        for _ in range(runs):
+            run()
+        latency_ms = (time.perf_counter() - started) * 1000 / runs
+
+        if name == 'grounding_dino':
+            quality = compare_detections(reference[name], output) if name in reference else None
+        else:
+            quality = compare_depth(reference[name]['depth_map'], output['depth_map']) if name in reference else None
+        report[name] = {'latency_ms': round(latency_ms, 1), 'vs_eager': quality}
+        if backend == 'eager':
+            reference[name] = output
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--image', required=True)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--skip-export', action='store_true')
+    args = parser.parse_args()
+
+    with open(args.image, 'rb') as f:
+        image = ImageProcessor.preprocess_for_detection(f.read(), resize=True)['pil_image']
+
+    if not args.skip_export:
+        for model_id, input_size in depth_models().items():
+            export_onnx('depth', image, model_id, input_size)
+        export_onnx('grounding_dino', image)
+
+    reference = {}
+    for backend in BACKENDS:  # eager first, it is the reference
+        print(backend, check_backend(backend, image, reference, args.runs))
@@ -0,0 +1,94 @@
+"""
+Round-trip check for the binary scene encoding (ml/scene_codec.py): every
+case is encoded, decoded and compared with the original to float32
+precision. Exits non-zero on the first mismatch.
+
+Cases: an empty scene, top-level extras (e.g. assets), per-item extra keys,
+non-ASCII type and material strings, and more distinct types than fit in
+one byte.
+
+Usage (from repo root):
+    python scripts/scene_codec_check.py
+"""
+import math
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.scene_codec import encode_scene, decode_scene, SceneCodecError, ITEM_EXTRAS_KEY
+
+
+def make_scene(furniture, **extras):
+    # Same shape as SceneBuilder.build_scene
+    return dict({
+        'room': {
+            'dimensions': {'width': 5.3, 'height': 2.7, 'depth': 6.1},
+            'walls': {'color': '#ffffff', 'texture': 'default'},
+            'floor': {'color': '#8B7355', 'texture': 'wood'},
+            'ceiling': {'color': '#f0f0f0', 'texture': 'default'}
+        },
+        'furniture': furniture,
+        'lighting': {'ambient': 0.5, 'directional': [{'position': [5, 5, 5], 'intensity': 1.0}]},
+        'camera': {'position': [0, 2, 5], 'target': [0, 1, 0]}
+    }, **extras)
+
+
+def make_item(item_id, item_type, **extras):
+    return dict({
+        'id': item_id,
+        'type': item_type,
+        'confidence': 0.8125,
+        'position': {'x': -1.25, 'y': 0.4, 'z': 3.1},
+        'size': {'width': 1.9, 'height': 0.6, 'depth': 0.5},
+        'rotation': {'x': 0, 'y': 0, 'z': 0}
+    }, **extras)
+
+
+def assert_close(expected, actual, path='scene'):
+    if isinstance(expected, dict):
+        assert set(expected) == set(actual), f"{path}: keys {set(expected)} != {set(actual)}"
+        for key in expected:
+            assert_close(expected[key], actual[key], f"{path}.{key}")
+    elif isinstance(expected, (list, tuple)):
+        assert len(expected) == len(actual), f"{path}: length {len(expected)} != {len(actual)}"
+        for i, (e, a) in enumerate(zip(expected, actual)):
+            assert_close(e, a, f"{path}[{i}]")
+    elif isinstance(expected, float) or isinstance(actual, float):
+        assert math.isclose(expected, actual, rel_tol=1e-6, abs_tol=1e-6), f"{path}: {expected} != {actual}"
+    else:
+        assert expected == actual, f"{path}: {expected!r} != {actual!r}"
+
+
+def cases():
+    yield 'empty scene', make_scene([])
+    yield 'top-level extras', make_scene(
+        [make_item(1, 'bed')],
+        assets={'bundle': '/api/ml/assets/abc?types=bed', 'missing': []},
+        image_index=2
+    )
+    yield 'per-item extras', make_scene([
+        make_item(1, 'chair', label_score=[0.1, 0.9]),
+        make_item(2, 'chair'),
+        make_item(3, 'table', bbox={'x': 10, 'y': 20, 'width': 30, 'height': 40})
+    ])
+    unicode_scene = make_scene([make_item(1, 'sofá'), make_item(2, 'стол'), make_item(3, '椅子 🪑')])
+    unicode_scene['room']['walls']['texture'] = 'béton'
+    yield 'non-ASCII strings', unicode_scene
+    yield 'many types', make_scene([make_item(i + 1, f"type-{i}") for i in range(300)])
+
+
+if __name__ == '__main__':
+    for name, scene in cases():
+        try:
+            assert_close(scene, decode_scene(encode_scene(scene)))
+        except AssertionError as e:
+            raise SystemExit(f"{name}: {e}")
+        print(f"{name}: ok")
+
+    try:
+        encode_scene(make_scene([], **{ITEM_EXTRAS_KEY: {}}))
+    except SceneCodecError:
+        print("reserved key rejected: ok")
+    else:
+        raise SystemExit("reserved key: encoded without an error")
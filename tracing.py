@@ -0,0 +1,86 @@
+"""
+Latency tracing: pipeline stages and outbound calls into histograms, served
+by /metrics, plus an optional Server-Timing header per request.
+
+    with outbound('r2', 'put'):          # outbound_request_duration_seconds{client, op}
+        ...
+    timings = StageTimings('room')       # pipeline_stage_duration_seconds{pipeline, stage}
+    timings.record('ingest', seconds)
+
+Clients: supabase (op = select/insert/update/delete), r2 (head/put/get) and
+http (op = host, i.e. the Google OAuth endpoints). Everything that is timed
+also lands in the current request's Server-Timing entries when
+SERVER_TIMING is on; off the request thread (pipeline jobs) or with it off
+that is one context variable lookup.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from metrics import registry as metrics_registry
+
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+
+outbound_seconds = metrics_registry.histogram(
+    'outbound_request_duration_seconds',
+    'Outbound call latency by client and operation, retries included',
+    LATENCY_BUCKETS
+)
+stage_seconds = metrics_registry.histogram(
+    'pipeline_stage_duration_seconds',
+    'Processing pipeline stage latency by pipeline (room, batch) and stage',
+    LATENCY_BUCKETS
+)
+
+# {name: [total seconds, count]} for the request being served, None when not collecting
+_server_timing = ContextVar('server_timing', default=None)
+
+
+def _add_server_timing(name, seconds):
+    entries = _server_timing.get()
+    if entries is not None:
+        entry = entries.setdefault(name, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+
+
+@contextmanager
+def outbound(client, op):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        outbound_seconds.observe(elapsed, client=client, op=op)
+        _add_server_timing(f"{client}-{op}", elapsed)
+
+
+class StageTimings(dict):
+    """
+    {stage: milliseconds} for one pipeline run, returned to the client as
+    'timings'; every stage recorded is also observed into stage_seconds.
+    """
+
+    def __init__(self, pipeline):
+        super().__init__()
+        self.pipeline = pipeline
+
+    def record(self, stage, seconds):
+        self[stage] = round(seconds * 1000, 1)
+        stage_seconds.observe(seconds, pipeline=self.pipeline, stage=stage)
+        _add_server_timing(stage, seconds)
+
+
+def start_server_timing():
+    _server_timing.set({})
+
+
+def server_timing_header(total_seconds):
+    """Server-Timing value for everything timed since start_server_timing(), then stop collecting"""
+    entries = _server_timing.get() or {}
+    _server_timing.set(None)
+    parts = []
+    for name, (seconds, count) in entries.items():
+        part = f"{name};dur={seconds * 1000:.1f}"
+        parts.append(part + f';desc="x{count}"' if count > 1 else part)
+    parts.append(f"total;dur={total_seconds * 1000:.1f}")
+    return ', '.join(parts)
@@ -0,0 +1,61 @@
+import threading
+import time
+from collections import OrderedDict
+from metrics import registry as metrics_registry
+
+cache_requests = metrics_registry.counter(
+    'ttl_cache_requests_total',
+    'In-process TTL cache lookups by cache and result (hit, miss)'
+)
+
+
+class TTLCache:
+    """
+    Small thread-safe LRU whose entries expire after ttl seconds, or sooner
+    when set() is given a shorter per-entry ttl. Expired entries are dropped
+    on access.
+    """
+
+    def __init__(self, name, maxsize, ttl):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(key)
+                value = entry[1]
+            else:
+                if entry:
+                    del self._entries[key]
+                value = None
+        cache_requests.inc(cache=self.name, result='miss' if value is None else 'hit')
+        return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.monotonic() + ttl, value)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        return entry[1] if entry else None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)